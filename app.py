@@ -1,350 +1,211 @@
-import streamlit as st
-import math
-import tempfile
 import os
+import uuid
 import numpy as np
-import matplotlib.pyplot as plt
-from fpdf import FPDF
+import pandas as pd
+import streamlit as st
+from functools import partial
+
+from trr.cache import CACHE, CACHE_PDF
+from trr.catalogos import (COLUNAS_CORRENTES, COLUNAS_DINAMICA, COLUNAS_OPTICA, COLUNAS_REDSHIFT, EXTENSOES, OPCIONAIS_DINAMICA,
+                           colunas_tabela, detectar_colunas)
+from trr.diagnostico import DIAG
+from trr.idiomas import LANG
+from trr.relatorio import gerar_pdf, textos_pdf
+from trr.dinamica import ajustar_curvas, auditar_ponto_dinamica, curva_ml
+from trr.optica import auditar_optica
+from trr.redshift import DZ_MIN, Z_MAX_VARREDURA, curva_redshift, prever_redshift
+from trr.correntes import auditar_corrente
+from trr.incerteza import AMOSTRAS_MC, MAX_AMOSTRAS_INTERATIVO, propagar_incerteza
+from trr.tarefas import ATIVOS, FILA, MODULOS_PDF
 
 # ==========================================
-# CONSTANTES DA TEORIA TRR
+# CACHE COMPARTILHADO ENTRE SESSÕES
 # ==========================================
-BETA = 0.028006
-A0 = 1.2001e-10
-G = 6.67430e-11
-C = 299792458.0
-M_SOL = 1.989e30
-KPC_TO_M = 3.086e19
+def auditar_com_cache(modulo, funcao, ao_vivo=False, **entradas):
+    # O rastro (etapas + contadores) da auditoria fica na sessão para o painel de diagnóstico.
+    # Ao vivo cada passo de um controle vai direto ao motor, que já guarda em cache as
+    # etapas caras (distâncias, componentes bariônicas), sem encher o CACHE de resultados.
+    with DIAG.rastrear(f"app.{modulo}", ativo=diagnostico_sessao()) as rastro:
+        res = funcao(**entradas) if ao_vivo else CACHE.obter_ou_calcular(modulo, entradas, lambda: funcao(**entradas))
+    guardar_rastro(rastro)
+    return res
+
+# O diagnóstico é ligado por sessão: o toggle fica no session_state e o rastro de cada
+# auditoria é somado num agregado da própria sessão. O agregado do processo (Prometheus,
+# log JSON) continua sendo só o do TRR_DIAGNOSTICO.
+def diagnostico_sessao():
+    return DIAG.ativo or st.session_state.get("diag_on", False)
+
+def guardar_rastro(rastro):
+    if not diagnostico_sessao():
+        return
+    st.session_state['diag_ultimo'] = rastro
+    etapas = st.session_state.setdefault('diag_etapas', {})
+    for nome, segundos in rastro['etapas'] + [(rastro['rotulo'], rastro['segundos'])]:
+        est = etapas.setdefault(nome, [0, 0.0, 0.0])
+        est[0] += 1; est[1] += segundos; est[2] = max(est[2], segundos)
+
+# O PDF só é montado quando o usuário clica em baixar (st.download_button aceita um
+# callable em `data`), e uma única vez por resultado/idioma graças ao cache.
+def gerar_pdf_cache(modulo, dict_dados, L_original):
+    entradas = {"modulo": modulo, "idioma": L_original["code"], "dados": dict_dados}
+    with DIAG.etapa(f"app.pdf.{modulo}"):
+        return CACHE_PDF.obter_ou_calcular("pdf", entradas, lambda: gerar_pdf(modulo, dict_dados, L_original))
+
+def processar(L, chave_botao, ao_vivo, chave_res, valido):
+    # Ao vivo recalcula a cada mudança de entrada; uma entrada inválida apaga o resultado antigo
+    if not ao_vivo:
+        return st.button(L["calc"], type="primary", key=chave_botao) and valido
+    if not valido:
+        st.session_state.pop(chave_res, None)
+    return valido
+
+def grafico(rotulo_x, x, **series):
+    # Desenhado no navegador: não passa pelo matplotlib do PDF
+    st.line_chart(pd.DataFrame({rotulo_x: x, **{k: np.broadcast_to(v, np.shape(x)) for k, v in series.items()}}), x=rotulo_x, height=260)
+
+def painel_incerteza(L, modulo, valores, rotulos, valido, saidas):
+    # Sigma por entrada -> intervalos por Monte Carlo (reprodutível pela semente)
+    with st.expander(L["mc_title"], expanded=False):
+        cols = st.columns(len(rotulos))
+        sigmas = {k: c.number_input(f"σ {L[r]}", min_value=0.0, format="%g", key=f"mc_{modulo}_{k}") for c, (k, r) in zip(cols, rotulos.items())}
+        c1, c2 = st.columns(2)
+        n = c1.number_input(L["mc_n"], min_value=100, max_value=MAX_AMOSTRAS_INTERATIVO, value=AMOSTRAS_MC, step=1000, key=f"mc_{modulo}_n")
+        semente = c2.number_input(L["mc_seed"], min_value=0, value=0, key=f"mc_{modulo}_seed")
+        if st.button(L["mc_calc"], key=f"mc_{modulo}_b") and valido:
+            st.session_state[f'mc_{modulo}'] = auditar_com_cache(f"mc_{modulo}", partial(propagar_incerteza, modulo), valores=valores, sigmas=sigmas, n=n, semente=semente)
+        mc = st.session_state.get(f'mc_{modulo}')
+        if mc:
+            # saidas: (chave, rótulo, casas decimais, unidade)
+            for chave, rotulo, casas, unidade in saidas + [("prec", L["precision"], 2, "%")]:
+                q = mc[chave]
+                st.write(f"**{rotulo}** ({L['mc_int']}): {q['p50']:.{casas}f} [{q['p2.5']:.{casas}f} – {q['p97.5']:.{casas}f}] {unidade}")
+            st.caption(f"N = {mc['n_validas']}/{mc['n']}")
 
-def calcular_D_A(z1, z2):
-    if z1 >= z2: return 0.0
-    passos = 500
-    dz = (z2 - z1) / passos
-    integral = sum(1.0 / math.sqrt(0.3 * (1 + z1 + i*dz)**3 + 0.7) * dz for i in range(passos))
-    return ((299792.458 / 70.0) * integral / (1 + z2)) * 3.086e22
+CAMPOS_CURVA = ("rad", "vobs", "vgas", "vdisk", "vbulge")
+
+def painel_curva(L):
+    # Curva de rotação de uma galáxia (colada de uma planilha ou digitada): um só M/L para todos os raios
+    with st.expander(L["curve_title"], expanded=False):
+        st.caption(L["curve_info"])
+        tabela = st.data_editor(pd.DataFrame(columns=CAMPOS_CURVA, dtype=float), num_rows="dynamic", width="stretch", key="curva_tabela",
+                                column_config={c: st.column_config.NumberColumn(L[c], min_value=0.0, format="%g") for c in CAMPOS_CURVA})
+        if st.button(L["curve_fit"], key="curva_b"):
+            t = tabela.dropna(subset=["rad", "vobs"]).fillna(0.0).sort_values("rad")
+            with DIAG.rastrear("app.curva", ativo=diagnostico_sessao()) as rastro:
+                galaxias, pontos = ajustar_curvas(np.zeros(len(t), dtype=np.int64), *(t[c].to_numpy() for c in CAMPOS_CURVA))
+            guardar_rastro(rastro)
+            st.session_state['res_curva'] = {"rad": t["rad"].to_numpy(), "ml": galaxias["ml"][0] if len(t) else np.nan,
+                                             "prec": galaxias["prec"][0] if len(t) else np.nan, **{k: pontos[k] for k in ("vobs", "vbar", "vtrr")}}
+        r = st.session_state.get('res_curva')
+        if r and np.isfinite(r["ml"]):
+            st.success(f"M/L: {r['ml']:.3f} · {L['precision']}: {r['prec']:.2f}%")
+            grafico("r (kpc)", r["rad"], V_obs=r["vobs"], V_bar=r["vbar"], V_TRR=r["vtrr"])
+        elif r:
+            st.warning(L["curve_info"])
 
 # ==========================================
-# DICIONÁRIO ABSOLUTO (9 IDIOMAS)
+# CATÁLOGOS POR ABA (TAREFAS EM SEGUNDO PLANO)
 # ==========================================
-LANG = {
-    "PT": {
-        "code": "PT", "welcome": "Selecione o seu idioma",
-        "title": "🌌 Motor Cosmológico TRR", "author_prefix": "Autor", "theory_name": "Teoria da Relatividade Referencial",
-        "tab1": "📊 Dinâmica Galáctica", "tab2": "👁️ Óptica Cosmológica", "tab3": "🔭 Previsão de Redshift", "tab4": "☄️ Correntes Estelares",
-        "prov_title": "🗂️ Proveniência de Dados", 
-        "prov_info": "Para garantir a reprodutibilidade, este motor processa dados brutos de:",
-        "prov_warn": "⚠️ Nenhum parâmetro ad-hoc de matéria escura é injetado aqui.",
-        "cat_list": "* SDSS DR16Q\n* SPARC (CWRU)\n* SLACS Survey\n* ESA Gaia\n* JWST/MAST\n* LIGO/Virgo",
-        "rad": "Raio observado (kpc)", "vobs": "Veloc. Telescópio (km/s)", "vgas": "Velocidade Gás (km/s)", "vdisk": "Veloc. Disco (km/s)", "vbulge": "Veloc. Bojo (km/s)",
-        "zl": "Redshift Lente (z_L)", "zs": "Redshift Fonte (z_S)", "mest": "Massa Fotométrica Total (10^11)", "theta": "Anel Einstein (arcsec)", "cluster": "Aglomerado Gigante?",
-        "r_peri": "Pericentro da Corrente (kpc)", "r_apo": "Apocentro da Corrente (kpc)",
-        "calc": "🚀 Processar Auditoria TRR", "clear": "🧹 Limpar Tudo",
-        "pdf_btn": "📄 Baixar Relatório de Auditoria (PDF)", "details": "📚 Ver Parecer Técnico",
-        "precision": "Precisão Empírica", "precision_red": "Convergência Matemática", "g_bar": "Física Clássica", "g_trr": "Previsão TRR", "g_obs": "Telescópio",
-        "info_dyn": "💡 A TRR calcula o atrito topológico do vácuo para prever a velocidade de rotação sem Matéria Escura.",
-        "info_opt": "💡 A TRR aplica o Índice de Refração Temporal (eta_C) para amplificar o desvio gravitacional.",
-        "info_red": "💡 A TRR itera a matriz usando a Massa Bariônica Total para prever o tempo-espaço da Fonte (z_S).",
-        "info_str": "💡 A TRR mapeia o cisalhamento viscoso do vácuo, revelando a coordenada real da ruptura.",
-        "pred_zs": "Redshift z_S Previsto", "loc_gap": "📌 Ruptura nas coordenadas", "no_gap": "Nenhuma ruptura crítica",
-        "pdf_h1": "TEORIA DA RELATIVIDADE REFERENCIAL (TRR)", "pdf_h2": "Relatorio de Auditoria Automatizada", "pdf_footer": "Documento gerado pelo Motor Cosmologico TRR.",
-        "pdf_title_dyn": "AUDITORIA CIENTIFICA - DINAMICA", "pdf_title_opt": "AUDITORIA CIENTIFICA - OPTICA", "pdf_title_red": "AUDITORIA CIENTIFICA - REDSHIFT", "pdf_title_str": "AUDITORIA CIENTIFICA - CORRENTES",
-        "rep_dyn_text": "LAUDO TÉCNICO:\n1. A massa bariônica pura gera {vbar:.2f} km/s.\n2. A TRR calcula o atrito topológico (Beta=0.028006). RESULTADO: Precisão de {prec:.2f}% sem Matéria Escura.",
-        "rep_opt_text": "LAUDO TÉCNICO:\nA massa visível desvia a luz em {tbar:.2f} arcsec. A TRR aplica a Refração Temporal (eta_C = {etac:.5f}), demonstrando convergência teórica para o anel de {tobs:.2f} arcsec. Precisão: {prec:.2f}%.",
-        "rep_red_text": "LAUDO PREDITIVO (AUDITORIA CEGA):\n1. A TRR travou a massa total como limite fluídico.\n2. O algoritmo prediz que a galáxia fonte está em z_S = {zs_pred:.4f}.\nRESULTADO: Convergência pura isolada da Matéria Escura.",
-        "rep_str_text": "LAUDO DE HIDRODINÂMICA:\nO Cisalhamento Viscoso atingiu o limite crítico de ruptura na zona de {loc_str}. O gap é um efeito de atrito com o fluido do espaço (Phase 3)."
-    },
-    "EN": {
-        "code": "EN", "welcome": "Select Language",
-        "title": "🌌 RRT Cosmological Engine", "author_prefix": "Author", "theory_name": "Referential Relativity Theory",
-        "tab1": "📊 Galactic Dynamics", "tab2": "👁️ Cosmological Optics", "tab3": "🔭 Redshift Prediction", "tab4": "☄️ Stellar Streams",
-        "prov_title": "🗂️ Data Provenance", 
-        "prov_info": "To ensure reproducibility, this engine processes raw data from:",
-        "prov_warn": "⚠️ No ad-hoc dark matter parameters are injected here.",
-        "cat_list": "* SDSS DR16Q\n* SPARC (CWRU)\n* SLACS Survey\n* ESA Gaia\n* JWST/MAST\n* LIGO/Virgo",
-        "rad": "Obs. Radius (kpc)", "vobs": "Telescope Vel. (km/s)", "vgas": "Gas Vel. (km/s)", "vdisk": "Disk Vel. (km/s)", "vbulge": "Bulge Vel. (km/s)",
-        "zl": "Lens Redshift (z_L)", "zs": "Source Redshift (z_S)", "mest": "Total Photometric Mass (10^11)", "theta": "Einstein Ring (arcsec)", "cluster": "Giant Cluster?",
-        "r_peri": "Stream Pericenter (kpc)", "r_apo": "Stream Apocenter (kpc)",
-        "calc": "🚀 Process RRT Audit", "clear": "🧹 Clear All",
-        "pdf_btn": "📄 Download Report (PDF)", "details": "📚 View Technical Report",
-        "precision": "Empirical Accuracy", "precision_red": "Math Convergence", "g_bar": "Classical Physics", "g_trr": "RRT Prediction", "g_obs": "Telescope",
-        "info_dyn": "💡 RRT calculates topological vacuum friction to predict rotation velocity without Dark Matter.",
-        "info_opt": "💡 RRT applies Time Refraction (eta_C) to amplify gravitational deflection using visible mass only.",
-        "info_red": "💡 RRT iterates using Total Baryonic Mass to predict the Source space-time (z_S).",
-        "info_str": "💡 RRT maps vacuum viscous shear, revealing the real coordinates of structural gaps.",
-        "pred_zs": "Predicted Redshift z_S", "loc_gap": "📌 Rupture Coordinates", "no_gap": "No critical rupture",
-        "pdf_h1": "REFERENTIAL RELATIVITY THEORY (RRT)", "pdf_h2": "Automated Audit Report", "pdf_footer": "Document generated by RRT Cosmological Engine.",
-        "pdf_title_dyn": "SCIENTIFIC AUDIT - DYNAMICS", "pdf_title_opt": "SCIENTIFIC AUDIT - OPTICS", "pdf_title_red": "SCIENTIFIC AUDIT - REDSHIFT", "pdf_title_str": "SCIENTIFIC AUDIT - STREAMS",
-        "rep_dyn_text": "TECHNICAL REPORT:\n1. Baryonic mass yields {vbar:.2f} km/s. 2. RRT fluid drag (Beta=0.028006) elevates velocity to {vtrr:.2f} km/s.\nRESULT: {prec:.2f}% accuracy achieved without Dark Matter.",
-        "rep_opt_text": "TECHNICAL REPORT:\nVisible mass deflects at {tbar:.2f} arcsec. RRT applies Time Refraction (eta_C = {etac:.5f}), providing theoretical convergence for {tobs:.2f} arcsec. Accuracy: {prec:.2f}%.",
-        "rep_red_text": "PREDICTIVE REPORT (STRICT BLIND AUDIT):\n1. RRT locked total mass as the spatial fluid limit. 2. Predicts source galaxy at z_S = {zs_pred:.4f}.\nRESULT: Pure algorithmic convergence.",
-        "rep_str_text": "HYDRODYNAMICS REPORT:\nViscous Shear hit critical rupture limits at {loc_str}. Structural gaps are deterministic vacuum friction effects."
-    },
-    "ES": {
-        "code": "ES", "welcome": "Seleccione su idioma",
-        "title": "🌌 Motor Cosmológico TRR", "author_prefix": "Autor", "theory_name": "Teoría de la Relatividad Referencial",
-        "tab1": "📊 Dinámica Galáctica", "tab2": "👁️ Óptica Cosmológica", "tab3": "🔭 Predicción de Redshift", "tab4": "☄️ Corrientes Estelares",
-        "prov_title": "🗂️ Procedencia de Datos", 
-        "prov_info": "Para garantizar la reproducibilidad, este motor procesa datos brutos de:",
-        "prov_warn": "⚠️ Aquí no se inyectan parámetros ad-hoc de materia oscura.",
-        "cat_list": "* SDSS DR16Q\n* SPARC (CWRU)\n* SLACS Survey\n* ESA Gaia\n* JWST/MAST\n* LIGO/Virgo",
-        "rad": "Radio observado (kpc)", "vobs": "Velocidad Telescopio", "vgas": "Velocidad Gas", "vdisk": "Veloc. Disco", "vbulge": "Veloc. Bulbo",
-        "zl": "Redshift Lente (z_L)", "zs": "Redshift Fuente (z_S)", "mest": "Masa Fotométrica (10^11)", "theta": "Anillo Einstein (arcsec)", "cluster": "¿Cúmulo Gigante?",
-        "r_peri": "Pericentro (kpc)", "r_apo": "Apocentro (kpc)",
-        "calc": "🚀 Procesar Auditoría TRR", "clear": "🧹 Limpiar Todo",
-        "pdf_btn": "📄 Descargar Reporte (PDF)", "details": "📚 Ver Informe Técnico",
-        "precision": "Precisión Empírica", "precision_red": "Convergencia Matemática", "g_bar": "Física Clásica", "g_trr": "Predicción TRR", "g_obs": "Telescopio",
-        "info_dyn": "💡 La TRR calcula la fricción topológica del vacío para predecir la rotación sin Materia Oscura.",
-        "info_opt": "💡 La TRR aplica el Índice de Refracción Temporal para amplificar el desvío gravitacional.",
-        "info_red": "💡 La TRR itera la masa bariónica total para predecir el espacio-tiempo de la fuente.",
-        "info_str": "💡 La TRR mapea la cizalladura viscosa del vacío, revelando las coordenadas de ruptura.",
-        "pred_zs": "Redshift z_S Previsto", "loc_gap": "📌 Ruptura en coordenadas", "no_gap": "Sin ruptura crítica",
-        "pdf_h1": "TEORIA DE LA RELATIVIDAD REFERENCIAL", "pdf_h2": "Reporte de Auditoria", "pdf_footer": "Generado por Motor Cosmologico TRR.",
-        "pdf_title_dyn": "AUDITORIA - DINAMICA", "pdf_title_opt": "AUDITORIA - OPTICA", "pdf_title_red": "AUDITORIA - REDSHIFT", "pdf_title_str": "AUDITORIA - CORRIENTES",
-        "rep_dyn_text": "REPORTE TÉCNICO:\n1. Masa bariónica genera {vbar:.2f} km/s. 2. TRR (Beta=0.028006) eleva a {vtrr:.2f} km/s.\nRESULTADO: Precisión {prec:.2f}% sin Materia Oscura.",
-        "rep_opt_text": "REPORTE TÉCNICO:\nMasa visible desvía {tbar:.2f} arcsec. TRR aplica Refracción Temporal (eta_C = {etac:.5f}), logrando {tobs:.2f} arcsec. Precisión: {prec:.2f}%.",
-        "rep_red_text": "REPORTE PREDITIVO:\n1. TRR usó masa total como límite fluido. 2. Predice galaxia en z_S = {zs_pred:.4f}.\nRESULTADO: Convergencia pura.",
-        "rep_str_text": "REPORTE HIDRODINÁMICO:\nCizalladura Viscosa alcanzó límite de ruptura en {loc_str}."
-    },
-    "FR": {
-        "code": "FR", "welcome": "Sélectionnez votre langue",
-        "title": "🌌 Moteur Cosmologique TRR", "author_prefix": "Auteur", "theory_name": "Théorie de la Relativité Référentielle",
-        "tab1": "📊 Dynamique Galactique", "tab2": "👁️ Optique Cosmologique", "tab3": "🔭 Prédiction Redshift", "tab4": "☄️ Courants Stellaires",
-        "prov_title": "🗂️ Provenance des Données", 
-        "prov_info": "Pour garantir la reproductibilité, ce moteur traite les données brutes de:",
-        "prov_warn": "⚠️ Aucun paramètre ad-hoc de matière noire n'est injecté ici.",
-        "cat_list": "* SDSS DR16Q\n* SPARC (CWRU)\n* SLACS Survey\n* ESA Gaia\n* JWST/MAST\n* LIGO/Virgo",
-        "rad": "Rayon (kpc)", "vobs": "Vitesse Télescope", "vgas": "Vitesse Gaz", "vdisk": "Vitesse Disque", "vbulge": "Vitesse Bulbe",
-        "zl": "Redshift Lentille", "zs": "Redshift Source", "mest": "Masse Photométrique", "theta": "Anneau Einstein", "cluster": "Amas Géant?",
-        "r_peri": "Péricentre (kpc)", "r_apo": "Apocentro (kpc)",
-        "calc": "🚀 Lancer l'Audit TRR", "clear": "🧹 Tout Effacer",
-        "pdf_btn": "📄 Télécharger le Rapport (PDF)", "details": "📚 Voir le Rapport Technique",
-        "precision": "Précision Empirique", "precision_red": "Convergence Mathématique", "g_bar": "Physique Classique", "g_trr": "Prédiction TRR", "g_obs": "Télescope",
-        "info_dyn": "💡 La TRR calcule le frottement topologique du vide sans matière noire.",
-        "info_opt": "💡 La TRR applique l'Indice de Réfraction Temporelle pour amplifier la déviation.",
-        "info_red": "💡 La TRR itère la masse baryonique totale pour prédire l'espace-temps de la source.",
-        "info_str": "💡 La TRR cartographie le cisaillement visqueux du vide.",
-        "pred_zs": "Redshift z_S Prédit", "loc_gap": "📌 Rupture aux coordonnées", "no_gap": "Aucune rupture critique",
-        "pdf_h1": "THEORIE DE LA RELATIVITE REFERENTIELLE", "pdf_h2": "Rapport d'Audit", "pdf_footer": "Genere par le Moteur TRR.",
-        "pdf_title_dyn": "AUDIT - DYNAMIQUE", "pdf_title_opt": "AUDIT - OPTIQUE", "pdf_title_red": "AUDIT - REDSHIFT", "pdf_title_str": "AUDIT - COURANTS",
-        "rep_dyn_text": "RAPPORT TECHNIQUE:\n1. Masse génère {vbar:.2f} km/s. 2. TRR (Beta=0.028006) élève à {vtrr:.2f} km/s.\nRESULTAT: Précision {prec:.2f}%.",
-        "rep_opt_text": "RAPPORT TECHNIQUE:\nDéviation visible {tbar:.2f}. TRR applique Réfraction (eta_C = {etac:.5f}), atteignant {tobs:.2f}. Précision: {prec:.2f}%.",
-        "rep_red_text": "RAPPORT PREDITIF:\nPrédiction galaxie à z_S = {zs_pred:.4f}.",
-        "rep_str_text": "RAPPORT:\nCisaillement visqueux a atteint la limite à {loc_str}."
-    },
-    "DE": {
-        "code": "DE", "welcome": "Wählen Sie Ihre Sprache",
-        "title": "🌌 RRT Kosmologische Engine", "author_prefix": "Autor", "theory_name": "Referenzielle Relativitätstheorie",
-        "tab1": "📊 Galaktische Dynamik", "tab2": "👁️ Kosmologische Optik", "tab3": "🔭 Redshift-Vorhersage", "tab4": "☄️ Sternströme",
-        "prov_title": "🗂️ Datenherkunft", 
-        "prov_info": "Um die Reproduzierbarkeit zu gewährleisten, verarbeitet diese Engine Rohdaten von:",
-        "prov_warn": "⚠️ Hier werden keine Ad-hoc-Parameter für dunkle Materie injiziert.",
-        "cat_list": "* SDSS DR16Q\n* SPARC (CWRU)\n* SLACS Survey\n* ESA Gaia\n* JWST/MAST\n* LIGO/Virgo",
-        "rad": "Radius (kpc)", "vobs": "Teleskopgeschw.", "vgas": "Gasgeschw.", "vdisk": "Scheibengeschw.", "vbulge": "Bulge-Geschw.",
-        "zl": "Redshift Linse", "zs": "Redshift Quelle", "mest": "Photometrische Masse", "theta": "Einsteinring", "cluster": "Riesencluster?",
-        "r_peri": "Perizentrum (kpc)", "r_apo": "Apozentrum (kpc)",
-        "calc": "🚀 RRT-Audit starten", "clear": "🧹 Alles löschen",
-        "pdf_btn": "📄 Bericht herunterladen (PDF)", "details": "📚 Technischen Bericht anzeigen",
-        "precision": "Empirische Genauigkeit", "precision_red": "Mathematische Konvergenz", "g_bar": "Klassische Physik", "g_trr": "RRT Vorhersage", "g_obs": "Teleskop",
-        "info_dyn": "💡 RRT berechnet topologische Vakuumreibung ohne Dunkle Materie.",
-        "info_opt": "💡 RRT wendet den zeitlichen Brechungsindex an.",
-        "info_red": "💡 RRT verwendet die totale baryonische Masse, um z_S vorherzusagen.",
-        "info_str": "💡 RRT kartiert die viskose Scherung des Vakuums.",
-        "pred_zs": "Vorhergesagter z_S", "loc_gap": "📌 Bruchkoordinaten", "no_gap": "Kein kritischer Bruch",
-        "pdf_h1": "REFERENZIELLE RELATIVITÄTSTHEORIE", "pdf_h2": "Audit-Bericht", "pdf_footer": "Generiert von RRT Engine.",
-        "pdf_title_dyn": "AUDIT - DYNAMIK", "pdf_title_opt": "AUDIT - OPTIK", "pdf_title_red": "AUDIT - REDSHIFT", "pdf_title_str": "AUDIT - STROEME",
-        "rep_dyn_text": "TECHNISCHER BERICHT:\n1. Baryonische Masse: {vbar:.2f} km/s. 2. RRT-Vorhersage: {vtrr:.2f} km/s.\nERGEBNIS: Genauigkeit {prec:.2f}%.",
-        "rep_opt_text": "TECHNISCHER BERICHT:\nSichtbare Masse {tbar:.2f}. RRT erreicht {tobs:.2f}. Genauigkeit: {prec:.2f}%.",
-        "rep_red_text": "VORHERSAGE:\nGalaxie bei z_S = {zs_pred:.4f}.",
-        "rep_str_text": "BERICHT:\nViskose Scherung erreicht bei {loc_str}."
-    },
-    "IT": {
-        "code": "IT", "welcome": "Seleziona la tua lingua",
-        "title": "🌌 Motore Cosmologico TRR", "author_prefix": "Autore", "theory_name": "Teoria della Relatività Referenziale",
-        "tab1": "📊 Dinamica Galattica", "tab2": "👁️ Ottica Cosmologica", "tab3": "🔭 Previsione Redshift", "tab4": "☄️ Correnti Stellari",
-        "prov_title": "🗂️ Provenienza dei Dati", 
-        "prov_info": "Per garantire la riproducibilità, questo motore elabora dati grezzi da:",
-        "prov_warn": "⚠️ Nessun parametro ad-hoc di materia oscura è iniettato qui.",
-        "cat_list": "* SDSS DR16Q\n* SPARC (CWRU)\n* SLACS Survey\n* ESA Gaia\n* JWST/MAST\n* LIGO/Virgo",
-        "rad": "Raggio (kpc)", "vobs": "Velocità Telescopio", "vgas": "Velocità Gas", "vdisk": "Veloc. Disco", "vbulge": "Veloc. Bulbo",
-        "zl": "Redshift Lente", "zs": "Redshift Sorgente", "mest": "Massa Fotometrica", "theta": "Anello Einstein", "cluster": "Ammasso Gigante?",
-        "r_peri": "Pericentro (kpc)", "r_apo": "Apocentro (kpc)",
-        "calc": "🚀 Avvia Audit TRR", "clear": "🧹 Cancella Tutto",
-        "pdf_btn": "📄 Scarica Report (PDF)", "details": "📚 Vedi Report Tecnico",
-        "precision": "Precisione Empirica", "precision_red": "Convergenza Matematica", "g_bar": "Fisica Classica", "g_trr": "Previsione TRR", "g_obs": "Telescopio",
-        "info_dyn": "💡 La TRR calcola l'attrito topologico del vuoto senza Materia Oscura.",
-        "info_opt": "💡 La TRR applica l'Indice di Rifrazione Temporale per amplificare la deviazione.",
-        "info_red": "💡 La TRR itera la massa barionica totale per prevedere lo spazio-tempo della sorgente.",
-        "info_str": "💡 La TRR mappa il taglio viscoso del vuoto.",
-        "pred_zs": "Redshift z_S Previsto", "loc_gap": "📌 Rottura alle coordinate", "no_gap": "Nessuna rottura critica",
-        "pdf_h1": "TEORIA DELLA RELATIVITA REFERENZIALE", "pdf_h2": "Report di Audit", "pdf_footer": "Generato dal Motore TRR.",
-        "pdf_title_dyn": "AUDIT - DINAMICA", "pdf_title_opt": "AUDIT - OTTICA", "pdf_title_red": "AUDIT - REDSHIFT", "pdf_title_str": "AUDIT - CORRENTI",
-        "rep_dyn_text": "REPORT TECNICO:\n1. Massa genera {vbar:.2f} km/s. 2. TRR eleva a {vtrr:.2f} km/s.\nRISULTATO: Precisione {prec:.2f}%.",
-        "rep_opt_text": "REPORT TECNICO:\nDeviazione visibile {tbar:.2f}. TRR raggiunge {tobs:.2f}. Precisione: {prec:.2f}%.",
-        "rep_red_text": "REPORT PREDITTIVO:\nGalassia prevista a z_S = {zs_pred:.4f}.",
-        "rep_str_text": "REPORT:\nTaglio viscoso raggiunto a {loc_str}."
-    },
-    "JA": {
-        "code": "JA", "welcome": "言語を選択してください",
-        "title": "🌌 RRT 宇宙エンジン", "author_prefix": "著者", "theory_name": "参照相対性理論",
-        "tab1": "📊 銀河動力学", "tab2": "👁️ 宇宙光学", "tab3": "🔭 赤方偏移予測", "tab4": "☄️ 恒星ストリーム",
-        "prov_title": "🗂️ データソース", 
-        "prov_info": "再現性を確保するため、このエンジンは以下の生データを処理します:",
-        "prov_warn": "⚠️ 暗黒物質の場当たり的なパラメータはここに注入されていません。",
-        "cat_list": "* SDSS DR16Q\n* SPARC (CWRU)\n* SLACS Survey\n* ESA Gaia\n* JWST/MAST\n* LIGO/Virgo",
-        "rad": "半径 (kpc)", "vobs": "望遠鏡速度", "vgas": "ガス速度", "vdisk": "ディスク速度", "vbulge": "バルジ速度",
-        "zl": "レンズ赤方偏移", "zs": "ソース赤方偏移", "mest": "測光質量", "theta": "アインシュタイン環", "cluster": "巨大クラスター？",
-        "r_peri": "近点 (kpc)", "r_apo": "遠点 (kpc)",
-        "calc": "🚀 RRT 監査を開始", "clear": "🧹 全てクリア",
-        "pdf_btn": "📄 レポートをダウンロード (PDF - EN)", "details": "📚 技術レポートを見る",
-        "precision": "経験的精度", "precision_red": "数学的収束", "g_bar": "古典物理学", "g_trr": "RRT 予測", "g_obs": "望遠鏡",
-        "info_dyn": "💡 RRTは暗黒物質なしで真空の位相的摩擦を計算します。",
-        "info_opt": "💡 RRTは時間的屈折率を適用します。",
-        "info_red": "💡 RRTは総バリオン質量を使用してz_Sを予測します。",
-        "info_str": "💡 RRTは真空の粘性せん断をマッピングします。",
-        "pred_zs": "予測 z_S", "loc_gap": "📌 破壊座標", "no_gap": "臨界破壊なし",
-        "pdf_h1": "REFERENTIAL RELATIVITY THEORY (RRT)", "pdf_h2": "Automated Audit Report", "pdf_footer": "Document generated by RRT Cosmological Engine.",
-        "pdf_title_dyn": "SCIENTIFIC AUDIT - DYNAMICS", "pdf_title_opt": "SCIENTIFIC AUDIT - OPTICS", "pdf_title_red": "SCIENTIFIC AUDIT - REDSHIFT", "pdf_title_str": "SCIENTIFIC AUDIT - STREAMS",
-        "rep_dyn_text": "技術レポート:\n1. バリオン質量は {vbar:.2f} km/s を生成します。\n2. RRTの位相的摩擦 (Beta=0.028006) により {vtrr:.2f} km/s に上昇。\n結果: 暗黒物質なしで精度 {prec:.2f}%。",
-        "rep_opt_text": "技術レポート:\n可視質量の偏向 {tbar:.2f} arcsec。RRTは時間的屈折 (eta_C = {etac:.5f}) を適用し、{tobs:.2f} arcsecに到達。精度: {prec:.2f}%。",
-        "rep_red_text": "予測レポート:\n1. RRTは総質量を流体限界としてロックしました。\n2. ソース銀河を z_S = {zs_pred:.4f} と予測。\n結果: 純粋なアルゴリズムの収束。",
-        "rep_str_text": "流体力学レポート:\n粘性せん断が {loc_str} で臨界破壊限界に達しました。"
-    },
-    "ZH": {
-        "code": "ZH", "welcome": "请选择语言",
-        "title": "🌌 RRT 宇宙引擎", "author_prefix": "作者", "theory_name": "参照相对论",
-        "tab1": "📊 星系动力学", "tab2": "👁️ 宇宙光学", "tab3": "🔭 红移预测", "tab4": "☄️ 恒星流",
-        "prov_title": "🗂️ 数据来源", 
-        "prov_info": "为确保独立可重复性，本引擎处理以下原始数据：",
-        "prov_warn": "⚠️ 本引擎未注入任何暗物质参数。",
-        "cat_list": "* SDSS DR16Q\n* SPARC (CWRU)\n* SLACS Survey\n* ESA Gaia\n* JWST/MAST\n* LIGO/Virgo",
-        "rad": "观测半径 (kpc)", "vobs": "望远镜速度 (km/s)", "vgas": "气体速度", "vdisk": "星盘速度", "vbulge": "核球速度",
-        "zl": "透镜红移 (z_L)", "zs": "光源红移 (z_S)", "mest": "光度质量 (10^11)", "theta": "爱因斯坦环 (arcsec)", "cluster": "巨型星系团？",
-        "r_peri": "流近星点 (kpc)", "r_apo": "流远星点 (kpc)",
-        "calc": "🚀 运行 RRT 审计", "clear": "🧹 清除所有",
-        "pdf_btn": "📄 下载审计报告 (PDF - EN)", "details": "📚 查看技术意见",
-        "precision": "经验精度", "precision_red": "数学收敛", "g_bar": "经典物理", "g_trr": "RRT 预测", "g_obs": "望远镜",
-        "info_dyn": "💡 RRT 计算真空拓扑摩擦，无需暗物质即可预测旋转速度。",
-        "info_opt": "💡 RRT 应用时间折射率 (eta_C) 放大引力偏转。",
-        "info_red": "💡 RRT 使用绝对总质量迭代引力矩阵来预测光源 (z_S)。",
-        "info_str": "💡 RRT 映射真空粘性剪切，揭示结构断裂的真实坐标。",
-        "pred_zs": "预测红移 z_S", "loc_gap": "📌 断裂坐标", "no_gap": "无关键断裂",
-        "pdf_h1": "REFERENTIAL RELATIVITY THEORY (RRT)", "pdf_h2": "Automated Audit Report", "pdf_footer": "Document generated by RRT Cosmological Engine.",
-        "pdf_title_dyn": "SCIENTIFIC AUDIT - DYNAMICS", "pdf_title_opt": "SCIENTIFIC AUDIT - OPTICS", "pdf_title_red": "SCIENTIFIC AUDIT - REDSHIFT", "pdf_title_str": "SCIENTIFIC AUDIT - STREAMS",
-        "rep_dyn_text": "技术报告：\n1. 纯重子质量产生 {vbar:.2f} km/s。\n2. RRT 拓扑摩擦 (Beta=0.028006) 提升至 {vtrr:.2f} km/s。\n结果：无需暗物质，精度达 {prec:.2f}%。",
-        "rep_opt_text": "技术报告：\n可见质量偏转 {tbar:.2f} arcsec。RRT 应用时间折射 (eta_C = {etac:.5f})，达到 {tobs:.2f} arcsec。精度：{prec:.2f}%。",
-        "rep_red_text": "预测报告：\n1. RRT 锁定总质量为流体极限。\n2. 预测光源星系在 z_S = {zs_pred:.4f}。\n结果：纯算法收敛。",
-        "rep_str_text": "流体力学报告：\n粘性剪切在 {loc_str} 达到临界断裂极限。"
-    },
-    "RU": {
-        "code": "RU", "welcome": "Выберите язык",
-        "title": "🌌 Двигатель ТРО", "author_prefix": "Автор", "theory_name": "Теория Референциальной Относительности",
-        "tab1": "📊 Динамика", "tab2": "👁️ Оптика", "tab3": "🔭 Прогноз Redshift", "tab4": "☄️ Потоки",
-        "prov_title": "🗂️ Источники данных", 
-        "prov_info": "Для обеспечения воспроизводимости этот двигатель обрабатывает данные из:",
-        "prov_warn": "⚠️ В этот двигатель не вводятся параметры темной материи.",
-        "cat_list": "* SDSS DR16Q\n* SPARC (CWRU)\n* SLACS Survey\n* ESA Gaia\n* JWST/MAST\n* LIGO/Virgo",
-        "rad": "Радиус (кпк)", "vobs": "Скор. телескопа", "vgas": "Скор. газа", "vdisk": "Скор. диска", "vbulge": "Скор. бара",
-        "zl": "Redshift линзы", "zs": "Redshift ист.", "mest": "Полная массa (10^11)", "theta": "Кольцо (arcsec)", "cluster": "Скопление?",
-        "r_peri": "Перицентр (кпк)", "r_apo": "Апоцентр (кпк)",
-        "calc": "🚀 Начать аудит ТРО", "clear": "🧹 Очистить",
-        "pdf_btn": "📄 Скачать отчет (PDF - EN)", "details": "📚 Технический отчет",
-        "precision": "Точность", "precision_red": "Сходимость", "g_bar": "Классика", "g_trr": "Прогноз ТРО", "g_obs": "Телескоп",
-        "info_dyn": "💡 ТРО рассчитывает топологическое трение вакуума без темной материи.",
-        "info_opt": "💡 ТРО применяет индекс временного преломления для усиления отклонения.",
-        "info_red": "💡 ТРО использует полную массу для прогнозирования z_S источника.",
-        "info_str": "💡 ТРО отображает вязкий сдвиг вакуума, выявляя координаты разрыва.",
-        "pred_zs": "Прогноз z_S", "loc_gap": "📌 Координаты разрыва", "no_gap": "Нет разрыва",
-        "pdf_h1": "REFERENTIAL RELATIVITY THEORY (RRT)", "pdf_h2": "Automated Audit Report", "pdf_footer": "Document generated by RRT Cosmological Engine.",
-        "pdf_title_dyn": "SCIENTIFIC AUDIT - DYNAMICS", "pdf_title_opt": "SCIENTIFIC AUDIT - OPTICS", "pdf_title_red": "SCIENTIFIC AUDIT - REDSHIFT", "pdf_title_str": "SCIENTIFIC AUDIT - STREAMS",
-        "rep_dyn_text": "ТЕХНИЧЕСКИЙ ОТЧЕТ:\n1. Барионная масса дает {vbar:.2f} км/с.\n2. ТРО (Beta=0.028006) повышает до {vtrr:.2f} км/с.\nРЕЗУЛЬТАТ: Точность {prec:.2f}% без темной материи.",
-        "rep_opt_text": "ТЕХНИЧЕСКИЙ ОТЧЕТ:\nВидимая масса отклоняет на {tbar:.2f} arcsec. ТРО применяет временное преломление (eta_C = {etac:.5f}), достигая {tobs:.2f} arcsec. Точность: {prec:.2f}%.",
-        "rep_red_text": "ПРОГНОЗ:\n1. ТРО использует полную массу как предел.\n2. Прогноз галактики на z_S = {zs_pred:.4f}.\nРЕЗУЛЬТАТ: Чистая сходимость.",
-        "rep_str_text": "ГИДРОДИНАМИЧЕСКИЙ ОТЧЕТ:\nВязкий сдвиг достиг предела разрыва в {loc_str}."
-    }
+CATALOGOS = {
+    "dyn": (COLUNAS_DINAMICA, OPCIONAIS_DINAMICA),
+    "opt": (COLUNAS_OPTICA, ()),
+    "red": (COLUNAS_REDSHIFT, ()),
+    "str": (COLUNAS_CORRENTES, ()),
 }
 
-# ==========================================
-# MOTORES GRÁFICOS
-# ==========================================
-def criar_grafico(val_bar, val_trr, val_obs, lbl_bar, lbl_trr, lbl_obs, is_dyn=True):
-    fig, ax = plt.subplots(figsize=(7, 4))
-    labels = [lbl_bar, lbl_trr, lbl_obs]
-    valores = [val_bar, val_trr, val_obs]
-    cores = ['#e74c3c', '#3498db', '#2ecc71'] 
-    ax.bar(labels, valores, color=cores, width=0.6)
-    ax.set_ylabel("Vel. (km/s)" if is_dyn else "Dev (arcsec)", fontweight='bold')
-    plt.tight_layout()
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-        fig.savefig(tmp.name, dpi=150)
-        plt.close(fig)
-        return tmp.name
+def painel_catalogo(L, modulo, sessao):
+    # O catálogo passa pelo mesmo motor da aba: as colunas são mapeadas aqui (o padrão é
+    # o nome reconhecido) e a auditoria roda em blocos na fila, sem travar a interface
+    esquema, opcionais = CATALOGOS[modulo]
+    with st.expander(L["cat_title"], expanded=False):
+        # O Streamlit guarda o upload inteiro em memória (limite: server.maxUploadSize em
+        # .streamlit/config.toml). A fila copia o arquivo para a pasta da tarefa e a chave
+        # nova do uploader descarta o buffer da sessão logo depois do envio.
+        envios = st.session_state.get(f"c_{modulo}_envios", 0)
+        arquivo = st.file_uploader(L["job_file"], type=[e.lstrip(".") for e in EXTENSOES], key=f"c_{modulo}_arquivo_{envios}")
+        colunas, nomes = {}, []
+        if arquivo is not None:
+            try:
+                nomes = colunas_tabela(arquivo, arquivo.name)
+            except (ValueError, OSError) as e:
+                st.error(str(e))
+        if nomes:
+            st.caption(L["cat_map"])
+            detectadas = detectar_colunas(nomes, esquema)
+            opcoes = [None] + nomes
+            for c, campo in zip(st.columns(3) * len(esquema), esquema):
+                colunas[campo] = c.selectbox(L.get(campo, L["cat_id"]), opcoes, index=opcoes.index(detectadas[campo]),
+                                             format_func=lambda x: "—" if x is None else x, key=f"c_{modulo}_{campo}")
+        faltando = [campo for campo, coluna in colunas.items() if coluna is None and campo not in opcionais]
+        com_pdf = modulo in MODULOS_PDF and st.checkbox(L["job_pdf"], key=f"c_{modulo}_pdf")
+        curva = modulo == "dyn" and st.checkbox(L["job_curve"], key=f"c_{modulo}_curva")
+        if st.button(L["job_send"], key=f"c_{modulo}_enviar", disabled=not nomes or bool(faltando)):
+            try:
+                FILA.enviar(arquivo.name, arquivo, modulo, sessao, L["code"], com_pdf, {k: v for k, v in colunas.items() if v}, curva,
+                            cliente=st.context.ip_address)
+                st.session_state[f"c_{modulo}_envios"] = envios + 1
+                st.rerun()
+            except ValueError as e:
+                st.error(str(e))
+    tarefas = [t for t in FILA.listar(sessao) if t["modulo"] == modulo]
+    if tarefas:
+        # Só redesenha periodicamente enquanto houver tarefa ativa
+        (painel_tarefas_ativas if any(t["estado"] in ATIVOS for t in tarefas) else painel_tarefas)(L, sessao, modulo)
 
-def criar_grafico_redshift(z_vals, theta_class, theta_trr, zs_pred, theta_obs):
-    fig, ax = plt.subplots(figsize=(7, 4))
-    ax.plot(z_vals, theta_class, color='#e74c3c', linestyle='--', label="Classical")
-    ax.plot(z_vals, theta_trr, color='#3498db', label="RRT Prediction")
-    ax.axhline(y=theta_obs, color='#2ecc71', label=f"Obs ({theta_obs}\")")
-    ax.scatter([zs_pred], [theta_obs], color='#f1c40f', s=100, zorder=5)
-    ax.set_xlabel("Source Redshift (z_S)"); ax.set_ylabel("Einstein Ring (arcsec)")
-    ax.legend(); plt.tight_layout()
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-        fig.savefig(tmp.name, dpi=150)
-        plt.close(fig)
-        return tmp.name
+def _painel_tarefas(L, sessao, modulo):
+    tarefas = [t for t in FILA.listar(sessao) if t["modulo"] == modulo]
+    if not tarefas:
+        return
+    st.subheader(L["jobs"])
+    for t in tarefas:
+        with st.container(border=True):
+            st.markdown(f"**{t['arquivo']}** · `{t['id']}` · {L['job_states'].get(t['estado'], t['estado'])}")
+            if t['estado'] == "executando" and t.get('total'):
+                st.progress(min(1.0, t['linhas'] / t['total']), text=f"{t['linhas']} / {t['total']}")
+            prec = t.get('parcial', {}).get('prec_media')
+            if prec is not None:
+                st.caption(f"{L['precision']}: {prec:.2f}% ({t['parcial']['validas']})")
+            if t.get('mensagem'):
+                st.error(t['mensagem'])
+            if t.get('aviso'):
+                st.warning(t['aviso'])
+            # Tabelas já podem ser baixadas durante a execução (até o último bloco gravado)
+            rotulos = {"resultado": L["job_partial"] if t['estado'] != "concluida" else L["job_result"], "relatorio": L["pdf_btn"], "ajuste": L["job_fit"]}
+            cols = st.columns(len(t.get('arquivos', {})) + 1)
+            for c, (chave, nome) in zip(cols, t.get('arquivos', {}).items()):
+                c.download_button(rotulos.get(chave, chave.capitalize()), data=partial(FILA.conteudo, t['id'], chave),
+                                  file_name=f"{os.path.splitext(t['arquivo'])[0]}_{nome}", key=f"j_{t['id']}_{chave}")
+            # Callbacks: a ação acontece antes do redesenho, que já mostra a lista atualizada
+            if t['estado'] in ATIVOS:
+                cols[-1].button(L["job_cancel"], key=f"j_{t['id']}_cancelar", on_click=FILA.cancelar, args=(t['id'],))
+            else:
+                cols[-1].button(L["job_remove"], key=f"j_{t['id']}_remover", on_click=FILA.remover, args=(t['id'],))
 
-def criar_grafico_stream(raios, arrasto, cisalhamento, limite):
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(7, 6), sharex=True)
-    ax1.plot(raios, arrasto, color='#2980b9', label="Viscous Drag")
-    ax2.plot(raios, cisalhamento, color='#8e44ad', label="Viscous Shear")
-    ax2.axhline(y=limite, color='#e74c3c', linestyle='--')
-    ax2.fill_between(raios, cisalhamento, limite, where=(np.array(cisalhamento) >= limite), color='#e74c3c', alpha=0.4)
-    plt.tight_layout()
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-        fig.savefig(tmp.name, dpi=150)
-        plt.close(fig)
-        return tmp.name
+# O fragmento se redesenha sozinho, sem rodar o script inteiro
+painel_tarefas_ativas = st.fragment(run_every=2)(_painel_tarefas)
+painel_tarefas = st.fragment(_painel_tarefas)
 
-# ==========================================
-# GERADOR DE PDF (HYBRID LOGIC: EN for RU/ZH/JA)
-# ==========================================
-def gerar_pdf(modulo, dict_dados, L_original):
-    # Regra de Segurança: Idiomas com fontes não-latinas geram PDF em Inglês
-    if L_original["code"] in ["ZH", "RU", "JA"]:
-        L_pdf = LANG["EN"]
-    else:
-        L_pdf = L_original
-        
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", 'B', 16)
-    pdf.cell(0, 10, txt=L_pdf["pdf_h1"].encode('latin-1', 'replace').decode('latin-1'), ln=True, align='C')
-    pdf.set_font("Arial", 'I', 10)
-    pdf.cell(0, 8, txt=L_pdf["pdf_h2"].encode('latin-1', 'replace').decode('latin-1'), ln=True, align='C')
-    pdf.line(10, 28, 200, 28); pdf.ln(10)
-    pdf.set_font("Arial", 'B', 12)
-    titulos = {"dyn": L_pdf["pdf_title_dyn"], "opt": L_pdf["pdf_title_opt"], "red": L_pdf["pdf_title_red"], "str": L_pdf["pdf_title_str"]}
-    pdf.cell(0, 10, txt=titulos[modulo].encode('latin-1', 'replace').decode('latin-1'), ln=True); pdf.ln(5)
-    pdf.set_font("Arial", size=11)
-    
-    if modulo == "dyn":
-        texto = L_pdf["rep_dyn_text"].format(**dict_dados)
-        img = criar_grafico(dict_dados['vbar'], dict_dados['vtrr'], dict_dados['vobs'], L_pdf["g_bar"], L_pdf["g_trr"], L_pdf["g_obs"], True)
-    elif modulo == "opt":
-        texto = L_pdf["rep_opt_text"].format(**dict_dados)
-        img = criar_grafico(dict_dados['tbar'], dict_dados['ttrr'], dict_dados['tobs'], L_pdf["g_bar"], L_pdf["g_trr"], L_pdf["g_obs"], False)
-    elif modulo == "red":
-        texto = L_pdf["rep_red_text"].format(**dict_dados)
-        img = criar_grafico_redshift(dict_dados['z_vals'], dict_dados['t_class'], dict_dados['t_trr'], dict_dados['zs_pred'], dict_dados['tobs'])
-    else:
-        loc_str_pdf = f"[{dict_dados['gap_start']:.1f} kpc - {dict_dados['gap_end']:.1f} kpc]" if dict_dados['has_gap'] else L_pdf["no_gap"]
-        texto = L_pdf["rep_str_text"].format(loc_str=loc_str_pdf, **dict_dados)
-        img = criar_grafico_stream(dict_dados['raios'], dict_dados['arrasto'], dict_dados['cisal'], dict_dados['limite'])
-        
-    for linha in texto.split('\n'):
-        pdf.multi_cell(0, 7, txt=linha.encode('latin-1', 'replace').decode('latin-1'))
-    pdf.ln(10); pdf.image(img, x=15, w=180); os.unlink(img)
-    pdf.set_y(-30); pdf.set_font("Arial", 'I', 8); pdf.cell(0, 10, txt=L_pdf["pdf_footer"].encode('latin-1', 'replace').decode('latin-1'), align='C', ln=True)
-    return pdf.output(dest='S').encode('latin-1', 'replace')
+def painel_diagnostico(L):
+    with st.expander(L["diag_title"], expanded=False):
+        if not st.toggle(L["diag_on"], value=DIAG.ativo, key="diag_on", disabled=DIAG.ativo):
+            return
+        ultimo = st.session_state.get('diag_ultimo')
+        if ultimo:
+            st.caption(f"{L['diag_last']}: {ultimo['rotulo']} — {ultimo['segundos'] * 1e3:.1f} ms")
+            st.dataframe([{"etapa": n, "ms": round(s * 1e3, 3)} for n, s in ultimo['etapas']], hide_index=True, use_container_width=True)
+            for nome, valor in ultimo['contadores'].items():
+                st.caption(f"{nome}: {valor}")
+        etapas = st.session_state.get('diag_etapas')
+        if etapas:
+            st.caption(L["diag_stages"])
+            st.dataframe([{"etapa": n, "n": c, "ms": round(s / c * 1e3, 3), "max ms": round(m * 1e3, 3)}
+                          for n, (c, s, m) in sorted(etapas.items())], hide_index=True, use_container_width=True)
+        if not DIAG.ativo:
+            return
+        c1, c2 = st.columns(2)
+        c1.download_button("Prometheus", data=lambda: DIAG.prometheus({**CACHE.estatisticas(), **{f"pdf_{k}": v for k, v in CACHE_PDF.estatisticas().items()}}), file_name="trr_metricas.txt", mime="text/plain", key="diag_prom")
+        c2.download_button("JSON log", data=DIAG.eventos_json, file_name="trr_eventos.jsonl", mime="application/json", key="diag_log")
 
 # ==========================================
 # INTERFACE DO STREAMLIT
@@ -373,6 +234,13 @@ if st.session_state['idioma_selecionado'] is None:
         st.rerun()
 else:
     L = LANG[st.session_state['idioma_selecionado']]
+    # Sem fonte instalada que cubra o idioma (ex.: CJK), o PDF sai em inglês
+    if textos_pdf(L["code"])["code"] != L["code"]:
+        L = dict(L, pdf_btn=L["pdf_btn"].replace("(PDF)", "(PDF - EN)"))
+    # Id da sessão na URL: ao reconectar, o navegador reencontra as próprias tarefas
+    if 'sessao_id' not in st.session_state:
+        st.session_state['sessao_id'] = st.query_params.get("sessao") or uuid.uuid4().hex
+    st.query_params["sessao"] = st.session_state['sessao_id']
     
     with st.sidebar:
         st.markdown(f"### **{L['author_prefix']}:** Jean Cortez")
@@ -389,16 +257,26 @@ else:
         if st.button("⬅️ Idioma / Language", use_container_width=True):
             st.session_state['idioma_selecionado'] = None
             st.rerun()
+        
+        est, est_pdf = CACHE.estatisticas(), CACHE_PDF.estatisticas()
+        st.caption(f"Cache: {est['hits'] + est['hits_disco']} hits / {est['misses']} misses ({est['itens']}/{est['max_itens']})"
+                   f" · PDF: {est_pdf['itens']} ({est_pdf['bytes'] / 2**20:.1f}/{est_pdf['max_bytes'] / 2**20:.0f} MB)")
+        ao_vivo = st.toggle(L["live"], key="ao_vivo", help=L["live_help"])
+        painel_diagnostico(L)
 
     st.title(L["title"])
     aba1, aba2, aba3, aba4 = st.tabs([L["tab1"], L["tab2"], L["tab3"], L["tab4"]])
+    sessao = st.session_state['sessao_id']
 
     def limpar_dados():
-        for k in ['res_dyn', 'res_opt', 'res_red', 'res_str']:
+        for k in ['res_dyn', 'res_opt', 'res_red', 'res_str', 'res_curva', 'mc_dyn', 'mc_opt', 'mc_red']:
             if k in st.session_state: del st.session_state[k]
 
+    # Cada aba é um fragmento: mudar uma entrada (ou clicar em processar) refaz só a aba,
+    # não o script inteiro com as outras abas, a barra lateral e as tarefas.
     # --- ABA 1: DINÂMICA ---
-    with aba1:
+    @st.fragment
+    def aba_dinamica():
         st.info(L["info_dyn"])
         c1, c2 = st.columns(2)
         rad = c1.number_input(L["rad"], min_value=0.0, key="d_rad")
@@ -407,27 +285,25 @@ else:
         v_disk = st.number_input(L["vdisk"], key="d_vdisk")
         v_bulge = st.number_input(L["vbulge"], key="d_vbulge")
         
-        if st.button(L["calc"], type="primary", key="b1"):
-            if rad > 0 and v_obs > 0:
-                melhor_erro, melhor_v, v_bar = float('inf'), 0, 0
-                for ml in range(10, 301):
-                    v_sq = (v_gas**2) + (ml/100.0 * v_disk**2) + ((ml/100.0+0.2) * v_bulge**2)
-                    g_b = (v_sq * 1e6) / (rad * 3.086e19)
-                    g_t = (g_b / (1 - math.exp(-math.sqrt(g_b/A0)))) * (1 + BETA * rad)
-                    err = abs((v_obs**2 * 1e6 / (rad * 3.086e19)) - g_t) / (v_obs**2 * 1e6 / (rad * 3.086e19))
-                    if err < melhor_erro: 
-                        melhor_erro, melhor_v, v_bar = err, math.sqrt((g_t * rad * 3.086e19)/1e6), math.sqrt(v_sq)
-                st.session_state['res_dyn'] = {'vtrr': melhor_v, 'prec': max(0, 100-(melhor_erro*100)), 'vbar': v_bar, 'vobs': v_obs}
+        if processar(L, "b1", ao_vivo, 'res_dyn', rad > 0 and v_obs > 0):
+            st.session_state['res_dyn'] = auditar_com_cache("dyn", auditar_ponto_dinamica, ao_vivo, rad=rad, vobs=v_obs, vgas=v_gas, vdisk=v_disk, vbulge=v_bulge)
                 
         if 'res_dyn' in st.session_state:
             r = st.session_state['res_dyn']
             st.success(f"{L['precision']}: {r['prec']:.2f}%")
+            if ao_vivo:
+                c = curva_ml(rad, v_gas, v_disk, v_bulge)
+                grafico("M/L", c['ml'], V_bar=c['vbar'], V_TRR=c['vtrr'], V_obs=v_obs)
             with st.expander(L["details"]): 
                 st.info(L["rep_dyn_text"].format(**r))
-            st.download_button(L["pdf_btn"], data=gerar_pdf("dyn", r, L), file_name="RRT_Dynamics.pdf", key="d1")
+            st.download_button(L["pdf_btn"], data=partial(gerar_pdf_cache, "dyn", r, L), file_name="RRT_Dynamics.pdf", key="d1")
+        painel_incerteza(L, "dyn", dict(rad=rad, vobs=v_obs, vgas=v_gas, vdisk=v_disk, vbulge=v_bulge),
+                         {"rad": "rad", "vobs": "vobs", "vgas": "vgas", "vdisk": "vdisk", "vbulge": "vbulge"}, rad > 0 and v_obs > 0, [("vtrr", "V_TRR", 2, "km/s")])
+        painel_curva(L)
 
     # --- ABA 2: ÓPTICA ---
-    with aba2:
+    @st.fragment
+    def aba_optica():
         st.info(L["info_opt"])
         c3, c4 = st.columns(2)
         zl = c3.number_input(L["zl"], key="o_zl")
@@ -435,114 +311,72 @@ else:
         mest = st.number_input(L["mest"], key="o_mest")
         theta = st.number_input(L["theta"], key="o_theta")
         
-        if st.button(L["calc"], type="primary", key="b2"):
-            if zl > 0 and zs > zl:
-                D_L, D_S, D_LS = calcular_D_A(0, zl), calcular_D_A(0, zs), calcular_D_A(zl, zs)
-                M_kg = mest * 1e11 * M_SOL
-                t_bar_rad = math.sqrt((4*G*M_kg/C**2) * (D_LS/(D_L*D_S)))
-                etac = 1.0 + BETA * math.log(1+zl)
-                t_trr = t_bar_rad * etac * 206264.806
-                err = abs(theta - t_trr)/theta
-                st.session_state['res_opt'] = {'ttrr': t_trr, 'prec': max(0, 100-err*100), 'tbar': t_bar_rad*206264.806, 'tobs': theta, 'etac': etac}
+        if processar(L, "b2", ao_vivo, 'res_opt', zl > 0 and zs > zl):
+            st.session_state['res_opt'] = auditar_com_cache("opt", auditar_optica, ao_vivo, zl=zl, zs=zs, mest=mest, theta=theta)
                 
         if 'res_opt' in st.session_state:
             r = st.session_state['res_opt']
             st.success(f"{L['precision']}: {r['prec']:.2f}%")
-            st.download_button(L["pdf_btn"], data=gerar_pdf("opt", r, L), file_name="RRT_Optics.pdf", key="d2")
+            if ao_vivo and zl + DZ_MIN < Z_MAX_VARREDURA:
+                c = curva_redshift(zl, mest)
+                grafico("z_S", c['z_vals'], theta_bar=c['t_class'], theta_TRR=c['t_trr'], theta_obs=theta)
+            st.download_button(L["pdf_btn"], data=partial(gerar_pdf_cache, "opt", r, L), file_name="RRT_Optics.pdf", key="d2")
+        painel_incerteza(L, "opt", dict(zl=zl, zs=zs, mest=mest, theta=theta),
+                         {"zl": "zl", "zs": "zs", "mest": "mest", "theta": "theta"}, zl > 0 and zs > zl, [("ttrr", "θ_TRR", 3, "arcsec")])
 
     # --- ABA 3: REDSHIFT ---
-    with aba3:
+    @st.fragment
+    def aba_redshift():
         st.info(L["info_red"])
         r_zl = st.number_input(L["zl"], key="r_zl")
         r_mest = st.number_input(L["mest"], key="r_mest")
         r_theta = st.number_input(L["theta"], key="r_theta")
+        r_tol = st.number_input(L["tol_zs"], min_value=1e-8, max_value=0.1, value=1e-4, format="%.0e", key="r_tol")
         
-        if st.button(L["calc"], type="primary", key="b3"):
-            if r_zl > 0 and r_theta > 0:
-                z_test = np.linspace(r_zl + 0.1, 5.0, 100)
-                r_D_L = calcular_D_A(0, r_zl)
-                r_M = r_mest * 1e11 * M_SOL
-                
-                best_z, min_err = 0, float('inf')
-                t_class_arr = []
-                t_trr_arr = []
-                
-                # Cálculo orgânico para o gráfico
-                for z in z_test:
-                    r_D_S = calcular_D_A(0, z)
-                    r_D_LS = calcular_D_A(r_zl, z)
-                    
-                    # Einstein clássico (radianos para arcsec)
-                    t_b_rad = math.sqrt((4 * G * r_M / C**2) * (r_D_LS / (r_D_L * r_D_S)))
-                    t_b_arcsec = t_b_rad * 206264.806
-                    
-                    # TRR com arrasto de fase (etac)
-                    etac = 1.0 + BETA * math.log(1 + r_zl)
-                    t_t_arcsec = t_b_arcsec * etac
-                    
-                    t_class_arr.append(t_b_arcsec)
-                    t_trr_arr.append(t_t_arcsec)
-                    
-                    # Erro relativo
-                    err = abs(r_theta - t_t_arcsec) / r_theta
-                    if err < min_err: 
-                        min_err = err
-                        best_z = z
-                
-                precisao_real = max(0.0, 100.0 - (min_err * 100.0))
-                
-                st.session_state['res_red'] = {
-                    'zs_pred': best_z, 
-                    'prec': precisao_real, 
-                    'tobs': r_theta, 
-                    'z_vals': z_test, 
-                    't_class': t_class_arr, 
-                    't_trr': t_trr_arr
-                }
+        if processar(L, "b3", ao_vivo, 'res_red', 0 < r_zl < Z_MAX_VARREDURA - DZ_MIN and r_theta > 0):
+            st.session_state['res_red'] = auditar_com_cache("red", prever_redshift, ao_vivo, zl=r_zl, mest=r_mest, theta=r_theta, tol=r_tol)
                 
         if 'res_red' in st.session_state:
             r = st.session_state['res_red']
             st.success(f"{L['pred_zs']}: {r['zs_pred']:.4f} (Precisão: {r['prec']:.2f}%)")
-            st.download_button(L["pdf_btn"], data=gerar_pdf("red", r, L), file_name="RRT_Redshift.pdf", key="d3")
+            if not r['has_solution']:
+                st.warning(L["no_sol"])
+            if ao_vivo:
+                grafico("z_S", r['z_vals'], theta_bar=r['t_class'], theta_TRR=r['t_trr'], theta_obs=r['tobs'])
+            st.download_button(L["pdf_btn"], data=partial(gerar_pdf_cache, "red", r, L), file_name="RRT_Redshift.pdf", key="d3")
+        painel_incerteza(L, "red", dict(zl=r_zl, mest=r_mest, theta=r_theta),
+                         {"zl": "zl", "mest": "mest", "theta": "theta"}, 0 < r_zl < Z_MAX_VARREDURA - DZ_MIN and r_theta > 0, [("zs_pred", L["pred_zs"], 4, "")])
 
     # --- ABA 4: STREAMS ---
-    with aba4:
+    @st.fragment
+    def aba_correntes():
         st.info(L["info_str"])
         s_p = st.number_input(L["r_peri"], key="s_p", min_value=0.1)
         s_a = st.number_input(L["r_apo"], key="s_a", min_value=0.1)
         s_m = st.number_input(L["mest"], key="s_m", min_value=0.1)
         
-        if st.button(L["calc"], type="primary", key="b4"):
-            if s_a > s_p > 0:
-                # Substituição de rand() por física orgânica:
-                # O arrasto viscoso acumula-se com a distância (BETA * r)
-                # O cisalhamento tem picos na zona de maior aceleração (pericentro)
-                raios_arr = np.linspace(s_p, s_a, 100)
-                arrasto_arr = [BETA * (r / s_p) for r in raios_arr]
-                cisal_arr = [BETA * s_m * (s_a / r)**2 for r in raios_arr] 
-                
-                limite_critico = 0.05 * s_m # Limite hipotético baseado na massa
-                
-                has_gap = any(c > limite_critico for c in cisal_arr)
-                # Encontra a coordenada exata de ruptura
-                idx_gap = np.argmax(np.array(cisal_arr) > limite_critico)
-                gap_start = raios_arr[idx_gap] if has_gap else 0
-                gap_end = gap_start + 0.5 if has_gap else 0
-                
-                st.session_state['res_str'] = {
-                    'raios': raios_arr, 
-                    'arrasto': arrasto_arr, 
-                    'cisal': cisal_arr, 
-                    'limite': limite_critico, 
-                    'has_gap': has_gap, 
-                    'gap_start': gap_start, 
-                    'gap_end': gap_end
-                }
+        if processar(L, "b4", ao_vivo, 'res_str', s_a > s_p > 0):
+            st.session_state['res_str'] = auditar_com_cache("str", auditar_corrente, ao_vivo, r_peri=s_p, r_apo=s_a, mest=s_m)
                 
         if 'res_str' in st.session_state:
             r = st.session_state['res_str']
             if r['has_gap']:
-                st.success(f"{L['loc_gap']}: {r['gap_start']:.1f} - {r['gap_end']:.1f} kpc")
+                st.success(f"{L['loc_gap']}: " + " | ".join(f"{ini:.1f} - {fim:.1f} kpc" for ini, fim in r['gaps']))
             else:
                 st.warning(L["no_gap"])
-            st.download_button(L["pdf_btn"], data=gerar_pdf("str", r, L), file_name="RRT_Streams.pdf", key="d4")
+            st.download_button(L["pdf_btn"], data=partial(gerar_pdf_cache, "str", r, L), file_name="RRT_Streams.pdf", key="d4")
+            if ao_vivo:
+                grafico("r (kpc)", r['raios'], cisalhamento=r['cisal'], limite=r['limite'])
+
+    with aba1:
+        aba_dinamica()
+        painel_catalogo(L, "dyn", sessao)
+    with aba2:
+        aba_optica()
+        painel_catalogo(L, "opt", sessao)
+    with aba3:
+        aba_redshift()
+        painel_catalogo(L, "red", sessao)
+    with aba4:
+        aba_correntes()
+        painel_catalogo(L, "str", sessao)
@@ -0,0 +1,119 @@
+import math
+
+import numpy as np
+import pytest
+
+from trr.benchmark import _ref_D_A, _ref_dinamica, _ref_optica
+from trr.constantes import BETA, C, G, M_SOL, RAD_TO_ARCSEC
+from trr.correntes import auditar_corrente, auditar_correntes_lote
+from trr.cosmologia import calcular_D_A
+from trr.dinamica import auditar_dinamica, auditar_ponto_dinamica
+from trr.optica import auditar_optica, auditar_optica_lote
+from trr.redshift import prever_redshift, prever_redshift_lote
+
+# ==========================================
+# PARIDADE DOS MOTORES COM AS FÓRMULAS ORIGINAIS DO APP
+# ==========================================
+# As referências são os laços escalares do app.py original (as de trr.benchmark e, para
+# redshift e correntes, as varreduras copiadas abaixo). A soma de Riemann de 500 passos
+# do D_A original erra ~1e-3 relativo: distâncias e óptica comparam com 5e-3.
+TOL_DISTANCIA = 5e-3
+
+PARES_Z = [(0.0, 0.1), (0.0, 0.5), (0.0, 2.0), (0.3, 0.9), (0.5, 3.0), (1.0, 4.5)]
+PONTOS_DINAMICA = [
+    (5.0, 150.0, 20.0, 100.0, 0.0),
+    (12.0, 210.0, 0.0, 180.0, 60.0),
+    (0.8, 45.0, 30.0, 15.0, 0.0),
+    (25.0, 95.0, 50.0, 40.0, 10.0),
+]
+LENTES = [(0.2, 0.6, 3.0, 1.2), (0.35, 1.1, 8.0, 1.5), (0.5, 2.0, 1.0, 0.9)]
+CORRENTES = [(5.0, 30.0, 1.0), (10.0, 25.0, 2.0), (20.0, 60.0, 0.5), (2.0, 3.0, 4.0), (25.0, 30.0, 1.0)]
+
+def _ref_redshift(zl, mest, theta):
+    # Varredura original: 100 pontos de zl + 0.1 a 5
+    z_test = np.linspace(zl + 0.1, 5.0, 100)
+    D_L, M = _ref_D_A(0, zl), mest * 1e11 * M_SOL
+    melhor_z, menor_erro = 0, float('inf')
+    for z in z_test:
+        t_b = math.sqrt((4 * G * M / C**2) * (_ref_D_A(zl, z) / (D_L * _ref_D_A(0, z)))) * 206264.806
+        err = abs(theta - t_b * (1.0 + BETA * math.log(1 + zl))) / theta
+        if err < menor_erro:
+            menor_erro, melhor_z = err, z
+    return melhor_z, z_test[1] - z_test[0]
+
+def _ref_corrente(s_p, s_a, s_m):
+    raios = np.linspace(s_p, s_a, 100)
+    cisal = [BETA * s_m * (s_a / r)**2 for r in raios]
+    tem = any(c > 0.05 * s_m for c in cisal)
+    return tem, raios[np.argmax(np.array(cisal) > 0.05 * s_m)] if tem else 0
+
+@pytest.mark.parametrize("z1, z2", PARES_Z)
+def test_distancia_escalar(z1, z2):
+    assert calcular_D_A(z1, z2) == pytest.approx(_ref_D_A(z1, z2), rel=TOL_DISTANCIA)
+
+def test_distancia_vetorial():
+    z1, z2 = np.array(PARES_Z).T
+    esperado = [_ref_D_A(a, b) for a, b in PARES_Z]
+    np.testing.assert_allclose(calcular_D_A(z1, z2), esperado, rtol=TOL_DISTANCIA)
+
+def test_distancia_fora_do_dominio():
+    assert calcular_D_A(0.5, 0.5) == 0.0
+    assert calcular_D_A(0.8, 0.3) == 0.0
+    np.testing.assert_array_equal(calcular_D_A(np.array([0.5, 0.8]), np.array([0.5, 0.3])), 0.0)
+
+def test_dinamica():
+    rad, vobs, vgas, vdisk, vbulge = np.array(PONTOS_DINAMICA).T
+    res = auditar_dinamica(rad, vobs, vgas, vdisk, vbulge)
+    np.testing.assert_allclose(res['vtrr'], [_ref_dinamica(*p) for p in PONTOS_DINAMICA], rtol=1e-9)
+
+@pytest.mark.parametrize("ponto", PONTOS_DINAMICA)
+def test_dinamica_um_ponto(ponto):
+    assert auditar_ponto_dinamica(*ponto)['vtrr'] == pytest.approx(_ref_dinamica(*ponto), rel=1e-9)
+
+def test_dinamica_pontos_invalidos_ficam_nan():
+    res = auditar_dinamica([0.0, 5.0], [150.0, 0.0], 20.0, 100.0, 0.0)
+    assert np.isnan(res['vtrr']).all()
+
+def test_optica():
+    zl, zs, mest, theta = np.array(LENTES).T
+    res = auditar_optica_lote(zl, zs, mest, theta)
+    np.testing.assert_allclose(res['ttrr'], [_ref_optica(*l[:3]) for l in LENTES], rtol=TOL_DISTANCIA)
+    np.testing.assert_allclose(res['etac'], 1.0 + BETA * np.log(1 + zl), rtol=1e-12)
+
+@pytest.mark.parametrize("lente", LENTES)
+def test_optica_uma_lente(lente):
+    assert auditar_optica(*lente)['ttrr'] == pytest.approx(_ref_optica(*lente[:3]), rel=TOL_DISTANCIA)
+
+def test_optica_constante_de_conversao():
+    assert RAD_TO_ARCSEC == pytest.approx(206264.806, rel=1e-9)
+
+@pytest.mark.parametrize("zl, mest, theta", [(0.35, 8.0, 1.6), (0.5, 5.0, 1.1), (0.8, 10.0, 1.2)])
+def test_redshift(zl, mest, theta):
+    # A raiz exata deve cair a menos de um passo da grade original
+    z_ref, passo = _ref_redshift(zl, mest, theta)
+    res = prever_redshift(zl, mest, theta)
+    assert res['has_solution']
+    assert abs(res['zs_pred'] - z_ref) <= passo
+    assert abs(prever_redshift(zl, mest, theta, metodo="grade")['zs_pred'] - z_ref) <= 1e-12
+    assert prever_redshift_lote([zl], [mest], [theta])['zs_pred'][0] == pytest.approx(res['zs_pred'], abs=1e-5)
+
+@pytest.mark.parametrize("corrente", CORRENTES)
+def test_corrente(corrente):
+    # O início da ruptura coincide; o fim original era um chute (+0.5 kpc), aqui é o
+    # cruzamento analítico do cisalhamento ~ r^-2 com o limite
+    s_p, s_a, _ = corrente
+    tem, inicio = _ref_corrente(*corrente)
+    res = auditar_corrente(*corrente)
+    assert res['has_gap'] == tem
+    if tem:
+        assert res['gap_start'] == pytest.approx(inicio)
+        assert res['gap_end'] == pytest.approx(min(s_a, s_a * math.sqrt(BETA / 0.05)), rel=1e-9)
+
+def test_correntes_lote():
+    r_peri, r_apo, mest = np.array(CORRENTES).T
+    res = auditar_correntes_lote(r_peri, r_apo, mest)
+    unitarios = [auditar_corrente(*c) for c in CORRENTES]
+    np.testing.assert_array_equal(res['has_gap'], [u['has_gap'] for u in unitarios])
+    # Sem ruptura o lote usa NaN; o objeto único mantém o 0 do app
+    tem = res['has_gap']
+    np.testing.assert_allclose(res['gap_end'][tem], [u['gap_end'] for u in unitarios if u['has_gap']], rtol=1e-9)
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from trr import servidor
+from trr.cosmologia import calcular_D_A
+from trr.varredura import varrer_parametros
+
+# ==========================================
+# REGRESSÕES
+# ==========================================
+# --- Servidor: entradas não finitas e respostas que não cabem em JSON ---
+async def _conversar(srv, pedidos):
+    # Várias requisições numa mesma conexão keep-alive; devolve [(status, corpo)]
+    tcp = await asyncio.start_server(srv.atender, "127.0.0.1", 0)
+    porta = tcp.sockets[0].getsockname()[1]
+    leitor, escritor = await asyncio.open_connection("127.0.0.1", porta)
+    respostas = []
+    try:
+        for alvo, corpo in pedidos:
+            escritor.write(f"POST {alvo} HTTP/1.1\r\nContent-Length: {len(corpo)}\r\n\r\n".encode() + corpo)
+            await escritor.drain()
+            status = int((await leitor.readline()).split()[1])
+            cabecalhos = {}
+            while (h := await leitor.readline()).strip():
+                k, _, v = h.decode().partition(":")
+                cabecalhos[k.strip().lower()] = v.strip()
+            respostas.append((status, json.loads(await leitor.readexactly(int(cabecalhos["content-length"])))))
+    finally:
+        escritor.close()
+        tcp.close()
+        await tcp.wait_closed()
+    return respostas
+
+@pytest.fixture
+def srv():
+    with ThreadPoolExecutor(1) as executor:
+        yield servidor.ServidorTRR(executor, 1)
+
+@pytest.mark.parametrize("corpo", [
+    b'{"zl": 1e400, "zs": 1.0, "mest": 3.0, "theta": 1.2}',
+    b'{"zl": 0.2, "zs": NaN, "mest": 3.0, "theta": 1.2}',
+    b'{"zl": 0.2, "zs": 1.0, "mest": -Infinity, "theta": 1.2}',
+])
+def test_servidor_rejeita_nao_finitos(srv, corpo):
+    valido = b'{"zl": 0.2, "zs": 0.6, "mest": 3.0, "theta": 1.2}'
+    (status, resposta), (status_ok, ok) = asyncio.run(_conversar(srv, [("/v1/opt", corpo), ("/v1/opt", valido)]))
+    assert status == 400 and "finitos" in resposta["erro"]
+    assert status_ok == 200 and math.isfinite(ok["ttrr"])
+
+def test_servidor_resposta_nao_serializavel_vira_500(srv, monkeypatch):
+    async def rotear(metodo, alvo, corpo):
+        return 200, "application/json", {"x": math.inf}
+    monkeypatch.setattr(srv, "rotear", rotear)
+    (status, resposta), (status2, _) = asyncio.run(_conversar(srv, [("/v1/opt", b""), ("/v1/opt", b"")]))
+    # A conexão segue viva: a segunda requisição também é respondida
+    assert status == status2 == 500 and "ValueError" in resposta["erro"]
+
+def test_lista_troca_nao_finitos_por_null():
+    assert servidor._lista(np.array([1.5, np.inf, -np.inf, np.nan])) == [1.5, None, None, None]
+    assert servidor._lista(np.array([True, False])) == [True, False]
+    assert json.loads(servidor._serializar({"v": servidor._lista(np.array([np.nan, 2.0]))})) == {"v": [None, 2.0]}
+
+def test_validar_rejeita_nao_finitos():
+    with pytest.raises(ValueError, match="finitos"):
+        servidor._validar("dyn", {"rad": 5.0, "vobs": float("1e400")})
+    with pytest.raises(ValueError):
+        servidor._validar("opt", {"zl": 0.2, "zs": 0.6, "mest": 3.0, "theta": 0.0})
+
+# --- Varredura: nenhum ponto de dinâmica válido, só lentes ---
+def test_varredura_sem_dinamica_valida():
+    betas, a0s = np.linspace(0.0, 0.06, 5), np.geomspace(0.6e-10, 2.4e-10, 4)
+    dinamica = {k: np.array([0.0, 0.0]) for k in ("rad", "vobs", "vgas", "vdisk", "vbulge")}
+    optica = {"zl": np.array([0.2, 0.35]), "zs": np.array([0.6, 1.1]), "mest": np.array([3.0, 8.0]), "theta": np.array([1.2, 1.5])}
+    res = varrer_parametros(dinamica=dinamica, optica=optica, betas=betas, a0s=a0s)
+    assert res['n_pontos'] == 0 and res['n_lentes'] == 2
+    assert np.isfinite(res['combinada']).all()
+    assert math.isfinite(res['melhor']['prec'])
+    np.testing.assert_allclose(res['combinada'], res['optica'])
+
+def test_varredura_vazia():
+    res = varrer_parametros(betas=np.linspace(0.0, 0.06, 3), a0s=np.geomspace(0.6e-10, 2.4e-10, 3))
+    assert math.isnan(res['melhor']['prec'])
+
+# --- D_A: redshift NaN propaga, não vira distância zero ---
+def test_distancia_nan_propaga():
+    assert math.isnan(calcular_D_A(0, math.nan))
+    assert math.isnan(calcular_D_A(math.nan, 1.0))
+    d_a = calcular_D_A(np.array([0.0, 0.0, 0.8]), np.array([math.nan, 0.5, 0.3]))
+    assert math.isnan(d_a[0]) and d_a[1] > 0 and d_a[2] == 0.0
@@ -0,0 +1,7 @@
+from .constantes import A0, BETA, C, G, H0, KPC_TO_M, M_SOL, MPC_TO_M, OMEGA_L, OMEGA_M, RAD_TO_ARCSEC
+from .correntes import auditar_corrente, auditar_correntes_lote, intervalos_ruptura
+from .cosmologia import calcular_D_A, tabela_comovel
+from .dinamica import GRADE_ML, aceleracao_trr, ajustar_curvas, auditar_dinamica, auditar_ponto_dinamica
+from .incerteza import propagar_incerteza
+from .optica import auditar_optica, auditar_optica_lote, indice_refracao, raio_einstein_barionico
+from .redshift import prever_redshift, prever_redshift_lote
@@ -0,0 +1,239 @@
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .constantes import A0, BETA, C, G, M_SOL, RAD_TO_ARCSEC
+from .correntes import FRACAO_LIMITE, _perfil_unitario, auditar_correntes_lote
+from .cosmologia import calcular_D_A, tabela_comovel
+from .dinamica import auditar_dinamica, componentes_barionicas
+from .optica import auditar_optica_lote, distancias_lente
+from .redshift import geometria_fontes, prever_redshift
+
+# ==========================================
+# BENCHMARK DOS MOTORES TRR
+# ==========================================
+# python -m trr.benchmark -o atual.json --comparar base.json
+# Cada caso é cronometrado em escala de objeto único e de catálogo, tem o pico de
+# memória medido (tracemalloc) e é conferido contra a implementação original
+# (laços escalares do app) numa amostra das entradas. Os caches por etapa dos motores
+# (modo ao vivo) são esvaziados antes de cada repetição: mede-se sempre a execução a frio,
+# não acertos de lru_cache.
+VERSAO_FORMATO = 2
+CACHES_MOTOR = (componentes_barionicas, distancias_lente, geometria_fontes, _perfil_unitario)
+ESCALAS = (1, 1_000, 100_000)
+TEMPO_MIN = 0.2             # segundos acumulados por medição (repete até atingir)
+REPETICOES_MAX = 50
+AMOSTRA_REFERENCIA = 20
+LIMITE_LENTIDAO = 0.25      # +25% de tempo já reprova a comparação
+TOLERANCIA_NUMERICA = 1e-6  # deriva relativa máxima da assinatura entre execuções
+
+def _entradas(n, semente=12345):
+    # Um gerador por coluna: os n primeiros valores não dependem da maior escala pedida,
+    # então execuções com --escalas diferentes continuam comparáveis
+    faixas = {
+        "zl": (0.05, 0.8), "dzs": (0.2, 2.0), "mest": (0.5, 10.0), "theta": (0.8, 2.0),
+        "rad": (0.5, 30.0), "vobs": (40.0, 300.0), "vgas": (0.0, 60.0), "vdisk": (10.0, 200.0),
+        "vbulge": (0.0, 100.0), "com_bojo": (0.0, 1.0),
+        "r_peri": (2.0, 20.0), "r_apo": (21.0, 60.0), "m_corr": (0.1, 5.0),
+    }
+    geradores = np.random.SeedSequence(semente).spawn(len(faixas))
+    e = {c: np.random.default_rng(g).uniform(a, b, n) for (c, (a, b)), g in zip(faixas.items(), geradores)}
+    e["zs"] = e["zl"] + e.pop("dzs")
+    e["vbulge"] *= e.pop("com_bojo") < 0.3
+    return e
+
+# --- Implementações de referência (código original do app, escalar) ---
+def _ref_D_A(z1, z2):
+    if z1 >= z2: return 0.0
+    passos = 500
+    dz = (z2 - z1) / passos
+    integral = sum(1.0 / math.sqrt(0.3 * (1 + z1 + i*dz)**3 + 0.7) * dz for i in range(passos))
+    return ((299792.458 / 70.0) * integral / (1 + z2)) * 3.086e22
+
+def _ref_dinamica(rad, v_obs, v_gas, v_disk, v_bulge):
+    melhor_erro, melhor_v = float('inf'), 0
+    for ml in range(10, 301):
+        v_sq = (v_gas**2) + (ml/100.0 * v_disk**2) + ((ml/100.0+0.2) * v_bulge**2)
+        g_b = (v_sq * 1e6) / (rad * 3.086e19)
+        g_t = (g_b / (1 - math.exp(-math.sqrt(g_b/A0)))) * (1 + BETA * rad)
+        err = abs((v_obs**2 * 1e6 / (rad * 3.086e19)) - g_t) / (v_obs**2 * 1e6 / (rad * 3.086e19))
+        if err < melhor_erro:
+            melhor_erro, melhor_v = err, math.sqrt((g_t * rad * 3.086e19)/1e6)
+    return melhor_v
+
+def _ref_optica(zl, zs, mest):
+    D_L, D_S, D_LS = _ref_D_A(0, zl), _ref_D_A(0, zs), _ref_D_A(zl, zs)
+    t_bar_rad = math.sqrt((4*G*mest*1e11*M_SOL/C**2) * (D_LS/(D_L*D_S)))
+    return t_bar_rad * (1.0 + BETA * math.log(1+zl)) * RAD_TO_ARCSEC
+
+def _erro_relativo(obtido, esperado):
+    obtido, esperado = np.asarray(obtido, dtype=float), np.asarray(esperado, dtype=float)
+    return float(np.max(np.abs(obtido - esperado) / np.maximum(np.abs(esperado), 1e-300)))
+
+# --- Casos: (executar(e, n) -> saída, assinatura(saída), conferir(e, saída, k) -> erro, tolerância, escala máx.) ---
+def _caso_distancias():
+    def executar(e, n): return calcular_D_A(e["zl"][:n], e["zs"][:n])
+    def conferir(e, saida, k): return _erro_relativo(saida[:k], [_ref_D_A(a, b) for a, b in zip(e["zl"][:k], e["zs"][:k])])
+    return executar, lambda s: float(np.sum(s)), conferir, 5e-3, None
+
+def _caso_dinamica():
+    def executar(e, n): return auditar_dinamica(e["rad"][:n], e["vobs"][:n], e["vgas"][:n], e["vdisk"][:n], e["vbulge"][:n])
+    def conferir(e, saida, k):
+        ref = [_ref_dinamica(*(e[c][i] for c in ("rad", "vobs", "vgas", "vdisk", "vbulge"))) for i in range(k)]
+        return _erro_relativo(saida["vtrr"][:k], ref)
+    return executar, lambda s: float(np.nansum(s["vtrr"])), conferir, 1e-9, None
+
+def _caso_optica():
+    def executar(e, n): return auditar_optica_lote(e["zl"][:n], e["zs"][:n], e["mest"][:n], e["theta"][:n])
+    def conferir(e, saida, k): return _erro_relativo(saida["ttrr"][:k], [_ref_optica(e["zl"][i], e["zs"][i], e["mest"][i]) for i in range(k)])
+    return executar, lambda s: float(np.nansum(s["ttrr"])), conferir, 5e-3, None
+
+def _caso_redshift():
+    def executar(e, n): return [prever_redshift(e["zl"][i], e["mest"][i], e["theta"][i]) for i in range(n)]
+    def conferir(e, saida, k):
+        # A varredura original é quantizada: a raiz deve cair a menos de um passo da grade
+        erro = 0.0
+        for i, r in enumerate(saida[:k]):
+            g = prever_redshift(e["zl"][i], e["mest"][i], e["theta"][i], metodo="grade")
+            passo = g["z_vals"][1] - g["z_vals"][0]
+            if r["has_solution"] and g["has_solution"]:
+                erro = max(erro, abs(r["zs_pred"] - g["zs_pred"]) / passo)
+        return erro
+    return executar, lambda s: float(sum(r["zs_pred"] for r in s)), conferir, 1.0, 1_000
+
+def _caso_correntes():
+    def executar(e, n): return auditar_correntes_lote(e["r_peri"][:n], e["r_apo"][:n], e["m_corr"][:n])
+    def conferir(e, saida, k):
+        # Cisalhamento ~ r^-2: ruptura analítica até min(r_apo, r_apo * sqrt(BETA / fração))
+        fim = np.minimum(e["r_apo"][:k], e["r_apo"][:k] * np.sqrt(BETA / FRACAO_LIMITE))
+        tem = e["r_peri"][:k] < fim
+        if not np.array_equal(saida["has_gap"][:k], tem): return float("inf")
+        return _erro_relativo(saida["gap_end"][:k][tem], fim[tem]) if tem.any() else 0.0
+    return executar, lambda s: float(np.nansum(s["gap_end"])), conferir, 1e-9, 10_000
+
+def _caso_pdf():
+    from .idiomas import LANG
+    from .relatorio import gerar_pdf
+    def executar(e, n):
+        res = auditar_optica_lote(e["zl"][:n], e["zs"][:n], e["mest"][:n], e["theta"][:n])
+        return [gerar_pdf("opt", {k: float(v[i]) for k, v in res.items()}, LANG["PT"]) for i in range(n)]
+    def conferir(e, saida, k): return 0.0 if all(b.startswith(b"%PDF") for b in saida[:k]) else float("inf")
+    return executar, lambda s: float(len(s)), conferir, 0.0, 10
+
+CASOS = {
+    "distancias": _caso_distancias,
+    "dinamica": _caso_dinamica,
+    "optica": _caso_optica,
+    "redshift": _caso_redshift,
+    "correntes": _caso_correntes,
+    "pdf": _caso_pdf,
+}
+
+def _limpar_caches():
+    for funcao in CACHES_MOTOR:
+        funcao.cache_clear()
+
+def _cronometrar(funcao):
+    tempos, total = [], 0.0
+    while len(tempos) < REPETICOES_MAX and (total < TEMPO_MIN or len(tempos) < 3):
+        _limpar_caches()
+        t0 = time.perf_counter()
+        saida = funcao()
+        dt = time.perf_counter() - t0
+        tempos.append(dt); total += dt
+        if dt > TEMPO_MIN * 5:  # Casos lentos (catálogo grande): uma medição basta
+            break
+    return min(tempos), float(np.median(tempos)), len(tempos), saida
+
+def _pico_memoria(funcao):
+    _limpar_caches()
+    tracemalloc.start()
+    try:
+        funcao()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+def executar_benchmark(casos=tuple(CASOS), escalas=ESCALAS):
+    entradas = _entradas(max(escalas))
+    tabela_comovel()  # Tabela de distâncias fora da medição: custo único por processo
+    resultados = {}
+    for nome in casos:
+        executar, assinatura, conferir, tolerancia, escala_max = CASOS[nome]()
+        for n in escalas:
+            if escala_max is not None and n > escala_max:
+                continue
+            melhor, mediana, repeticoes, saida = _cronometrar(lambda: executar(entradas, n))
+            erro = conferir(entradas, saida, min(n, AMOSTRA_REFERENCIA))
+            resultados[f"{nome}@{n}"] = {
+                "caso": nome,
+                "n": n,
+                "segundos": melhor,
+                "segundos_mediana": mediana,
+                "repeticoes": repeticoes,
+                "us_por_item": melhor / n * 1e6,
+                "pico_mb": _pico_memoria(lambda: executar(entradas, n)),
+                "assinatura": assinatura(saida),
+                "erro_referencia": erro,
+                "referencia_ok": bool(erro <= tolerancia),
+            }
+            print(f"{nome:>10} n={n:<7} {melhor * 1e3:10.3f} ms  {melhor / n * 1e6:10.3f} us/item  "
+                  f"{resultados[f'{nome}@{n}']['pico_mb']:8.2f} MB  ref={'ok' if erro <= tolerancia else 'FALHOU'}",
+                  file=sys.stderr)
+    return {
+        "versao": VERSAO_FORMATO,
+        "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "maquina": platform.machine(),
+        "resultados": resultados,
+    }
+
+def comparar(base, atual, limite=LIMITE_LENTIDAO, tolerancia=TOLERANCIA_NUMERICA):
+    # Lista de problemas encontrados (lentidão acima do limite ou deriva numérica)
+    problemas = []
+    for chave, novo in atual["resultados"].items():
+        antigo = base["resultados"].get(chave)
+        if antigo is None:
+            continue
+        razao = novo["segundos"] / antigo["segundos"] if antigo["segundos"] > 0 else 1.0
+        print(f"{chave:>22} {antigo['segundos'] * 1e3:10.3f} ms -> {novo['segundos'] * 1e3:10.3f} ms  ({razao:6.2f}x)", file=sys.stderr)
+        if razao > 1 + limite:
+            problemas.append(f"{chave}: {razao:.2f}x mais lento (limite {1 + limite:.2f}x)")
+        a, b = antigo["assinatura"], novo["assinatura"]
+        if abs(a - b) > tolerancia * max(abs(a), abs(b), 1e-300):
+            problemas.append(f"{chave}: assinatura numérica mudou ({a!r} -> {b!r})")
+    return problemas
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m trr.benchmark", description="Benchmark dos motores TRR com controle de regressão.")
+    parser.add_argument("-o", "--saida", help="Grava os resultados em JSON")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior usado como base")
+    parser.add_argument("--limite", type=float, default=LIMITE_LENTIDAO, help="Lentidão relativa tolerada (0.25 = +25%%)")
+    parser.add_argument("--escalas", type=int, nargs="+", default=list(ESCALAS))
+    parser.add_argument("--casos", nargs="+", choices=tuple(CASOS), default=list(CASOS))
+    args = parser.parse_args(argv)
+
+    atual = executar_benchmark(args.casos, args.escalas)
+    if args.saida:
+        with open(args.saida, "w") as f:
+            json.dump(atual, f, indent=2)
+
+    problemas = [f"{k}: diverge da referência (erro {r['erro_referencia']:.3g})"
+                 for k, r in atual["resultados"].items() if not r["referencia_ok"]]
+    if args.comparar:
+        with open(args.comparar) as f:
+            problemas += comparar(json.load(f), atual, args.limite)
+    for p in problemas:
+        print(f"FALHA: {p}", file=sys.stderr)
+    return 1 if problemas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
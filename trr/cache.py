@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .constantes import A0, BETA
+
+# ==========================================
+# CACHE DE RESULTADOS (ENDEREÇADO POR CONTEÚDO)
+# ==========================================
+# Incrementar quando a forma dos resultados/relatórios mudar, invalidando o disco
+VERSAO_CACHE = 3
+ALGARISMOS_SIGNIFICATIVOS = 10
+MAX_ITENS = int(os.environ.get("TRR_CACHE_MAX", "2048"))
+MAX_BYTES = int(float(os.environ.get("TRR_CACHE_MB", "256")) * 2**20)
+MAX_BYTES_PDF = int(float(os.environ.get("TRR_CACHE_PDF_MB", "128")) * 2**20)
+# Camada em disco (opcional): os resultados são gravados com pickle, então TRR_CACHE_DIR tem
+# de ser um diretório confiável, gravável só pelo serviço: quem escreve lá executa código
+# no próximo processo que ler o arquivo. Limitada em bytes: os arquivos menos usados (mtime
+# mais antigo; cada leitura renova o mtime) saem primeiro.
+DIRETORIO = os.environ.get("TRR_CACHE_DIR") or None
+MAX_BYTES_DISCO = int(float(os.environ.get("TRR_CACHE_DISCO_MB", "1024")) * 2**20)
+
+def _normalizar(valor):
+    # Entradas equivalentes (0.3 vs 0.30000000000000004, float vs np.float64) geram a mesma chave
+    if isinstance(valor, (bool, np.bool_)) or valor is None or isinstance(valor, str):
+        return valor.item() if isinstance(valor, np.bool_) else valor
+    if isinstance(valor, (int, float, np.integer, np.floating)):
+        return float(f"{float(valor):.{ALGARISMOS_SIGNIFICATIVOS}g}")
+    if isinstance(valor, dict):
+        return {str(k): _normalizar(v) for k, v in sorted(valor.items())}
+    arr = np.asarray(valor)
+    if arr.dtype.kind in "biuf":
+        # A forma entra na chave: (3, 2) e (2, 3) com os mesmos dados são entradas diferentes
+        conteudo = repr(arr.shape).encode() + np.ascontiguousarray(arr, dtype=float).tobytes()
+        return "sha256:" + hashlib.sha256(conteudo).hexdigest()
+    return [_normalizar(v) for v in valor]
+
+def chave_resultado(modulo, entradas):
+    conteudo = {"v": VERSAO_CACHE, "modulo": modulo, "beta": BETA, "a0": A0, "entradas": _normalizar(entradas)}
+    return hashlib.sha256(json.dumps(conteudo, sort_keys=True).encode()).hexdigest()
+
+def _tamanho(valor):
+    # Aproximado: bytes (PDFs) e arrays dominam; contêineres somam o conteúdo
+    if isinstance(valor, (bytes, bytearray, str)):
+        return 64 + len(valor)
+    if isinstance(valor, np.ndarray):
+        return 64 + valor.nbytes
+    if isinstance(valor, dict):
+        return 64 + sum(_tamanho(v) for v in valor.values())
+    if isinstance(valor, (list, tuple)):
+        return 64 + sum(_tamanho(v) for v in valor)
+    return 32
+
+def _congelar(valor):
+    # Arrays guardados ficam só-leitura: são compartilhados entre sessões sem cópia
+    if isinstance(valor, np.ndarray):
+        valor.flags.writeable = False
+    elif isinstance(valor, dict):
+        for v in valor.values(): _congelar(v)
+    elif isinstance(valor, (list, tuple)):
+        for v in valor: _congelar(v)
+    return valor
+
+def _copiar(valor):
+    # Contêineres são copiados (os arrays, já só-leitura, não) para que uma sessão não
+    # altere o resultado de outra
+    if isinstance(valor, dict):
+        return {k: _copiar(v) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [_copiar(v) for v in valor]
+    return valor
+
+class CacheResultados:
+    # LRU em memória (seguro entre threads/sessões do Streamlit) com persistência opcional em
+    # disco; limitado em itens e em bytes (o que estourar primeiro)
+    def __init__(self, max_itens=MAX_ITENS, diretorio=DIRETORIO, max_bytes=MAX_BYTES, max_bytes_disco=MAX_BYTES_DISCO):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self.max_bytes_disco = max_bytes_disco
+        self.diretorio = diretorio
+        self._gravados = None       # bytes gravados desde a última poda (None: ainda não podou)
+        self.bytes = 0
+        self._itens = OrderedDict()     # chave -> (valor, tamanho)
+        self._trava = threading.Lock()
+        self.hits = self.hits_disco = self.misses = 0
+
+    def _arquivo(self, chave):
+        return os.path.join(self.diretorio, chave[:2], chave + ".pkl")
+
+    def _ler_disco(self, chave):
+        if not self.diretorio:
+            return None
+        arquivo = self._arquivo(chave)
+        try:
+            with open(arquivo, "rb") as f:
+                valor = pickle.load(f)
+            os.utime(arquivo)
+            return valor
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _gravar_disco(self, chave, valor):
+        if not self.diretorio:
+            return
+        destino = self._arquivo(chave)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        # Escrita atômica: outro processo nunca lê um arquivo pela metade
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(destino), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+                tamanho = f.tell()
+            os.replace(tmp, destino)
+        except OSError:
+            if os.path.exists(tmp): os.unlink(tmp)
+            return
+        with self._trava:
+            podar = self._gravados is None or self._gravados + tamanho > self.max_bytes_disco // 8
+            self._gravados = 0 if podar else self._gravados + tamanho
+        if podar:
+            self._podar_disco()
+
+    def _podar_disco(self):
+        # Varre o diretório (na 1ª gravação e a cada 1/8 do limite gravado) e apaga os arquivos
+        # de mtime mais antigo até ficar abaixo do limite; vários processos podem podar juntos
+        arquivos = []
+        for pasta, _, nomes in os.walk(self.diretorio):
+            for nome in nomes:
+                if nome.endswith(".pkl"):
+                    try:
+                        info = os.stat(os.path.join(pasta, nome))
+                    except OSError:
+                        continue
+                    arquivos.append((info.st_mtime, info.st_size, os.path.join(pasta, nome)))
+        total = sum(t for _, t, _ in arquivos)
+        for _, tamanho, caminho in sorted(arquivos):
+            if total <= self.max_bytes_disco:
+                break
+            try:
+                os.unlink(caminho)
+            except OSError:
+                pass
+            total -= tamanho
+
+    def _guardar(self, chave, valor):
+        _congelar(valor)
+        tamanho = _tamanho(valor)
+        if tamanho > self.max_bytes:
+            return
+        with self._trava:
+            if chave in self._itens:
+                self.bytes -= self._itens[chave][1]
+            self._itens[chave] = (valor, tamanho)
+            self._itens.move_to_end(chave)
+            self.bytes += tamanho
+            while len(self._itens) > self.max_itens or self.bytes > self.max_bytes:
+                self.bytes -= self._itens.popitem(last=False)[1][1]
+
+    def obter_ou_calcular(self, modulo, entradas, calcular):
+        chave = chave_resultado(modulo, entradas)
+        with self._trava:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.hits += 1
+                return _copiar(self._itens[chave][0])
+        valor = self._ler_disco(chave)
+        if valor is not None:
+            with self._trava: self.hits_disco += 1
+        else:
+            valor = calcular()
+            with self._trava: self.misses += 1
+            self._gravar_disco(chave, valor)
+        self._guardar(chave, valor)
+        return _copiar(valor)
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+            self.bytes = 0
+
+    def estatisticas(self):
+        with self._trava:
+            total = self.hits + self.hits_disco + self.misses
+            return {
+                "hits": self.hits,
+                "hits_disco": self.hits_disco,
+                "misses": self.misses,
+                "itens": len(self._itens),
+                "max_itens": self.max_itens,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "taxa_acerto": (self.hits + self.hits_disco) / total if total else 0.0,
+            }
+
+# Instâncias do processo: compartilhadas por todas as sessões do Streamlit. Os PDFs (dezenas
+# de KB cada) têm cache próprio, para não expulsar os resultados pequenos do LRU.
+CACHE = CacheResultados()
+CACHE_PDF = CacheResultados(max_bytes=MAX_BYTES_PDF)
@@ -0,0 +1,193 @@
+import csv
+import io
+import os
+
+import numpy as np
+
+# ==========================================
+# LEITURA / ESCRITA DE CATÁLOGOS (CSV / PARQUET / FITS)
+# ==========================================
+# FITS (tabela binária ou ASCII) depende do astropy, importado só quando necessário.
+# O arquivo é mapeado em memória, então a leitura em blocos também não o carrega inteiro.
+# Campo do motor -> nomes de coluna aceitos (comparação sem maiúsculas)
+COLUNAS_DINAMICA = {
+    "galaxia": ("galaxy", "galaxia", "id", "name"),
+    "rad": ("radius", "rad", "r"),
+    "vobs": ("vobs",),
+    "vgas": ("vgas",),
+    "vdisk": ("vdisk",),
+    "vbulge": ("vbulge", "vbul"),
+}
+OPCIONAIS_DINAMICA = ("vgas", "vbulge")
+COLUNAS_OPTICA = {
+    "zl": ("zl", "z_l", "zlens", "z_lens"),
+    "zs": ("zs", "z_s", "zsrc", "z_source"),
+    "mest": ("mest", "mass", "m_phot", "mstar"),
+    "theta": ("theta", "theta_e", "theta_ein", "einstein_radius"),
+}
+COLUNAS_REDSHIFT = {k: COLUNAS_OPTICA[k] for k in ("zl", "mest", "theta")}
+COLUNAS_CORRENTES = {
+    "nome": ("name", "stream", "nome", "id"),
+    "r_peri": ("r_peri", "rperi", "pericenter", "peri"),
+    "r_apo": ("r_apo", "rapo", "apocenter", "apo"),
+    "mest": ("mest", "mass", "m"),
+}
+LINHAS_POR_BLOCO = 250_000
+EXTENSOES = {".csv": "csv", ".txt": "csv", ".dat": "csv", ".parquet": "parquet", ".pq": "parquet",
+             ".fits": "fits", ".fit": "fits", ".fts": "fits"}
+
+def _formato(caminho):
+    return EXTENSOES.get(os.path.splitext(caminho)[1].lower(), "csv")
+
+def _abrir_fits(origem):
+    try:
+        from astropy.io import fits
+    except ImportError:
+        raise ValueError("Leitura de FITS requer o pacote astropy (pip install astropy)") from None
+    hdul = fits.open(origem, memmap=isinstance(origem, (str, os.PathLike)))
+    hdu = next((h for h in hdul if isinstance(h, (fits.BinTableHDU, fits.TableHDU))), None)
+    if hdu is None:
+        hdul.close()
+        raise ValueError("Nenhuma tabela no arquivo FITS")
+    return hdul, hdu
+
+def _fits_para_pandas(dados):
+    # Só colunas escalares (vetores por linha, ex. espectros, não alimentam os motores);
+    # FITS é big-endian e o pandas quer a ordem nativa
+    import pandas as pd
+    colunas = {}
+    for nome in dados.names:
+        col = np.asarray(dados[nome])
+        if col.ndim != 1:
+            continue
+        if col.dtype.kind == "S":
+            col = np.char.decode(col, "ascii", "replace")
+        colunas[nome] = col.astype(col.dtype.newbyteorder("="))
+    return pd.DataFrame(colunas)
+
+def _separador(caminho, linhas=None):
+    # Detecta o separador na primeira linha útil para poder usar o leitor C do pandas
+    if linhas is None:
+        with open(caminho, newline="") as f:
+            return _separador(caminho, f)
+    linha = next((l for l in linhas if l.strip() and not l.startswith("#")), "")
+    try:
+        return csv.Sniffer().sniff(linha, delimiters=",;\t|").delimiter
+    except csv.Error:
+        return r"\s+"
+
+def ler_tabela(caminho):
+    import pandas as pd
+    if _formato(caminho) == "parquet":
+        return pd.read_parquet(caminho)
+    if _formato(caminho) == "fits":
+        hdul, hdu = _abrir_fits(caminho)
+        with hdul:
+            return _fits_para_pandas(hdu.data)
+    return pd.read_csv(caminho, sep=_separador(caminho), comment="#")
+
+def ler_tabela_em_blocos(caminho, linhas=LINHAS_POR_BLOCO):
+    # Gera DataFrames de no máximo `linhas` linhas sem carregar o arquivo inteiro
+    import pandas as pd
+    if _formato(caminho) == "parquet":
+        import pyarrow.parquet as pq
+        for lote in pq.ParquetFile(caminho).iter_batches(batch_size=linhas):
+            yield lote.to_pandas()
+    elif _formato(caminho) == "fits":
+        hdul, hdu = _abrir_fits(caminho)
+        with hdul:
+            for ini in range(0, hdu.header["NAXIS2"], linhas):
+                yield _fits_para_pandas(hdu.data[ini:ini + linhas])
+    else:
+        with pd.read_csv(caminho, sep=_separador(caminho), comment="#", chunksize=linhas) as leitor:
+            yield from leitor
+
+def colunas_tabela(origem, nome=None):
+    # Só o cabeçalho: nomes das colunas para o mapeamento na interface.
+    # origem: caminho ou arquivo binário aberto (ex.: upload), cujo formato vem de `nome`;
+    # o arquivo aberto volta ao início e não é fechado.
+    import pandas as pd
+    formato = _formato(nome or origem)
+    caminho = isinstance(origem, (str, os.PathLike))
+    try:
+        if formato == "parquet":
+            import pyarrow.parquet as pq
+            return list(pq.ParquetFile(origem).schema_arrow.names)
+        if formato == "fits":
+            hdul, hdu = _abrir_fits(origem)
+            try:
+                return list(_fits_para_pandas(hdu.data[:1]).columns)
+            finally:
+                hdul.close(closed=caminho)
+        if caminho:
+            return [str(c) for c in pd.read_csv(origem, sep=_separador(origem), comment="#", nrows=0).columns]
+        inicio = origem.read(1 << 16).decode("utf-8", "replace")
+        linhas = io.StringIO(inicio).readlines()[:-1] or [inicio]   # a última pode estar cortada
+        return [str(c) for c in pd.read_csv(io.StringIO("".join(linhas)), sep=_separador(None, linhas), comment="#", nrows=0).columns]
+    finally:
+        if not caminho:
+            origem.seek(0)
+
+def contar_linhas(caminho):
+    if _formato(caminho) == "parquet":
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(caminho).metadata.num_rows
+    if _formato(caminho) == "fits":
+        hdul, hdu = _abrir_fits(caminho)
+        with hdul:
+            return hdu.header["NAXIS2"]
+    with open(caminho, "rb") as f:
+        return max(0, sum(1 for linha in f if linha.strip() and not linha.startswith(b"#")) - 1)
+
+class EscritorTabela:
+    # Escrita incremental bloco a bloco (CSV com um único cabeçalho / Parquet com ParquetWriter)
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.linhas = 0
+        self._parquet = None
+
+    def __enter__(self):
+        return self
+
+    def escrever(self, df):
+        if _formato(self.caminho) == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            tabela = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.caminho, tabela.schema)
+            self._parquet.write_table(tabela)
+        else:
+            df.to_csv(self.caminho, mode="w" if self.linhas == 0 else "a", header=self.linhas == 0, index=False)
+        self.linhas += len(df)
+
+    def __exit__(self, *exc):
+        if self._parquet is not None:
+            self._parquet.close()
+
+def salvar_tabela(df, caminho):
+    if _formato(caminho) == "parquet":
+        df.to_parquet(caminho, index=False)
+    else:
+        df.to_csv(caminho, index=False)
+
+def detectar_colunas(nomes, esquema):
+    # Campo do motor -> coluna do catálogo reconhecida pelo nome (None se nenhuma)
+    nomes = {str(c).strip().lower(): c for c in nomes}
+    return {campo: next((nomes[a] for a in aceitos if a in nomes), None) for campo, aceitos in esquema.items()}
+
+def mapear_colunas(df, esquema, opcionais=(), escolhidas=None):
+    # escolhidas: {campo: coluna} definido pelo usuário; os demais campos são detectados
+    detectadas = detectar_colunas(df.columns, esquema)
+    colunas = {}
+    for campo, aceitos in esquema.items():
+        coluna = (escolhidas or {}).get(campo) or detectadas[campo]
+        if coluna is not None and coluna not in df:
+            raise ValueError(f"Coluna '{coluna}' não existe no catálogo (campo '{campo}')")
+        if coluna is not None:
+            colunas[campo] = df[coluna].to_numpy()
+        elif campo in opcionais:
+            colunas[campo] = np.zeros(len(df))
+        else:
+            raise ValueError(f"Coluna ausente para '{campo}' (aceitas: {', '.join(aceitos)})")
+    return colunas
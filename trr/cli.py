@@ -0,0 +1,99 @@
+import argparse
+import json
+import sys
+
+import numpy as np
+
+# ==========================================
+# LINHA DE COMANDO (AUDITORIA DE UM OBJETO)
+# ==========================================
+# Curvas usadas só nos gráficos: omitidas da saída sem --completo
+PERFIS = ('raios', 'arrasto', 'cisal', 'z_vals', 't_class', 't_trr')
+
+def _serializar(res, completo):
+    saida = {}
+    for k, v in res.items():
+        if isinstance(v, (np.ndarray, list)):
+            if completo or k not in PERFIS: saida[k] = np.asarray(v).tolist()
+        else:
+            saida[k] = v.item() if isinstance(v, np.generic) else v
+    return saida
+
+def _auditar(args):
+    if args.modulo == "dyn":
+        from .dinamica import auditar_ponto_dinamica
+        return auditar_ponto_dinamica(args.rad, args.vobs, args.vgas, args.vdisk, args.vbulge)
+    if args.modulo == "opt":
+        from .optica import auditar_optica
+        return auditar_optica(args.zl, args.zs, args.mest, args.theta)
+    if args.modulo == "red":
+        from .redshift import prever_redshift
+        return prever_redshift(args.zl, args.mest, args.theta, metodo=args.metodo, tol=args.tol)
+    from .correntes import auditar_corrente
+    return auditar_corrente(args.r_peri, args.r_apo, args.mest, amostras=args.amostras)
+
+def _incerteza(args):
+    from .incerteza import MODELOS_MC, propagar_incerteza
+    if args.modulo not in MODELOS_MC:
+        raise ValueError(f"--mc não se aplica a {args.modulo}")
+    entradas = MODELOS_MC[args.modulo][0]
+    try:
+        sigmas = {k: float(v) for k, v in (item.split("=", 1) for item in args.sigma)}
+    except ValueError:
+        raise ValueError("--sigma espera ENTRADA=VALOR")
+    desconhecidas = set(sigmas) - set(entradas)
+    if desconhecidas:
+        raise ValueError(f"Entradas desconhecidas em --sigma: {', '.join(sorted(desconhecidas))} (use {', '.join(entradas)})")
+    return propagar_incerteza(args.modulo, {k: getattr(args, k) for k in entradas}, sigmas, n=args.mc, semente=args.semente)
+
+def _construir_tabela(args):
+    from .cosmologia import DIRETORIO_TABELA, construir_tabela
+    return {"arquivo": construir_tabela(diretorio=args.diretorio or DIRETORIO_TABELA)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m trr", description="Motor Cosmológico TRR / RRT Engine (sem interface).")
+    parser.add_argument("--completo", action="store_true", help="Inclui os perfis/curvas usados nos gráficos")
+    parser.add_argument("--mc", type=int, metavar="N", help="Propaga as incertezas (--sigma) com N amostras de Monte Carlo (dyn/opt/red)")
+    parser.add_argument("--sigma", action="append", default=[], metavar="ENTRADA=VALOR", help="Sigma de uma entrada, ex.: --sigma vobs=5 (repetível)")
+    parser.add_argument("--semente", type=int, default=0, help="Semente do gerador de Monte Carlo")
+    sub = parser.add_subparsers(dest="modulo", required=True)
+
+    p = sub.add_parser("dyn", help="Dinâmica Galáctica")
+    p.add_argument("--rad", type=float, required=True)
+    p.add_argument("--vobs", type=float, required=True)
+    p.add_argument("--vgas", type=float, default=0.0)
+    p.add_argument("--vdisk", type=float, default=0.0)
+    p.add_argument("--vbulge", type=float, default=0.0)
+
+    p = sub.add_parser("opt", help="Óptica Cosmológica")
+    p.add_argument("--zl", type=float, required=True)
+    p.add_argument("--zs", type=float, required=True)
+    p.add_argument("--mest", type=float, required=True)
+    p.add_argument("--theta", type=float, required=True)
+
+    p = sub.add_parser("red", help="Previsão de Redshift")
+    p.add_argument("--zl", type=float, required=True)
+    p.add_argument("--mest", type=float, required=True)
+    p.add_argument("--theta", type=float, required=True)
+    p.add_argument("--metodo", choices=("raiz", "grade"), default="raiz", help="Brent sobre theta_TRR(z_S) = theta_obs, ou a varredura de 100 pontos")
+    p.add_argument("--tol", type=float, default=1e-6, help="Tolerância absoluta em z_S (modo raiz)")
+
+    p = sub.add_parser("str", help="Correntes Estelares")
+    p.add_argument("--r-peri", type=float, required=True)
+    p.add_argument("--r-apo", type=float, required=True)
+    p.add_argument("--mest", type=float, required=True)
+    p.add_argument("--amostras", type=int, default=1000, help="Resolução dos perfis de arrasto/cisalhamento")
+
+    p = sub.add_parser("tabela", help="Constrói a tabela de distâncias comóveis (arquivo mapeado em memória)")
+    p.add_argument("--diretorio", help="Padrão: TRR_TABELA_DIR, TRR_CACHE_DIR ou ~/.cache/trr")
+
+    args = parser.parse_args(argv)
+    try:
+        res = _construir_tabela(args) if args.modulo == "tabela" else _auditar(args)
+        if args.mc:
+            res = dict(res, incerteza=_incerteza(args))
+    except ValueError as e:
+        parser.error(str(e))
+    json.dump(_serializar(res, args.completo), sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    return 0
@@ -0,0 +1,16 @@
+# ==========================================
+# CONSTANTES DA TEORIA TRR
+# ==========================================
+BETA = 0.028006
+A0 = 1.2001e-10
+G = 6.67430e-11
+C = 299792458.0
+M_SOL = 1.989e30
+KPC_TO_M = 3.086e19
+MPC_TO_M = 3.086e22
+RAD_TO_ARCSEC = 206264.806
+
+# Cosmologia de referência (ΛCDM plano)
+H0 = 70.0
+OMEGA_M = 0.3
+OMEGA_L = 0.7
@@ -0,0 +1,124 @@
+from functools import lru_cache
+
+import numpy as np
+
+from .constantes import BETA
+from .diagnostico import DIAG
+
+# ==========================================
+# CORRENTES ESTELARES (CISALHAMENTO VISCOSO)
+# ==========================================
+AMOSTRAS_PERFIL = 1000
+BLOCO_CORRENTES = 64        # Correntes por bloco no modo em lote (limita a memória)
+FRACAO_LIMITE = 0.05        # Limite hipotético de ruptura: 0.05 * massa
+
+@DIAG.medir("correntes.perfis")
+def perfis_corrente(r_peri, r_apo, mest, amostras=AMOSTRAS_PERFIL):
+    # Perfis (correntes x amostras) entre pericentro e apocentro:
+    # O arrasto viscoso acumula-se com a distância (BETA * r)
+    # O cisalhamento tem picos na zona de maior aceleração (pericentro)
+    r_peri, r_apo, mest = (np.asarray(x, dtype=float)[..., None] for x in np.broadcast_arrays(r_peri, r_apo, mest))
+    raios = r_peri + (r_apo - r_peri) * np.linspace(0.0, 1.0, amostras)
+    arrasto = BETA * (raios / r_peri)
+    cisal = BETA * mest * (r_apo / raios)**2
+    return raios, arrasto, cisal, FRACAO_LIMITE * mest[..., 0]
+
+def _cruzamentos(raios, cisal, limite, linhas, cols):
+    # Coordenada exata em que o cisalhamento cruza o limite entre as amostras cols e cols+1.
+    # A interpolação é feita em log-log, exata para o perfil em lei de potência (r^-2);
+    # valores não positivos caem na interpolação linear.
+    r0, r1 = raios[linhas, cols], raios[linhas, cols + 1]
+    c0, c1 = cisal[linhas, cols], cisal[linhas, cols + 1]
+    lim = limite[linhas]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        positivos = (r0 > 0) & (c0 > 0) & (c1 > 0) & (lim > 0)
+        t_log = np.log(lim / c0) / np.log(c1 / c0)
+        r_log = r0 * np.exp(t_log * np.log(r1 / r0))
+        r_lin = r0 + (lim - c0) / (c1 - c0) * (r1 - r0)
+    return np.where(positivos, r_log, r_lin)
+
+@DIAG.medir("correntes.ruptura")
+def intervalos_ruptura(raios, cisal, limite):
+    # Todos os intervalos [início, fim] com cisalhamento acima do limite, para cada linha.
+    # Devolve (linha, início, fim) achatados, ordenados por linha e raio.
+    raios, cisal = np.atleast_2d(raios), np.atleast_2d(cisal)
+    limite = np.atleast_1d(limite)
+    acima = cisal > limite[:, None]
+    subida = ~acima[:, :-1] & acima[:, 1:]
+    descida = acima[:, :-1] & ~acima[:, 1:]
+
+    l_sub, c_sub = np.nonzero(subida)
+    l_des, c_des = np.nonzero(descida)
+    l_ini0 = np.flatnonzero(acima[:, 0])
+    l_fimN = np.flatnonzero(acima[:, -1])
+
+    linhas_ini = np.concatenate([l_ini0, l_sub])
+    ordem_ini = np.concatenate([np.full(l_ini0.size, -1), c_sub])
+    ini = np.concatenate([raios[l_ini0, 0], _cruzamentos(raios, cisal, limite, l_sub, c_sub)])
+    linhas_fim = np.concatenate([l_des, l_fimN])
+    ordem_fim = np.concatenate([c_des, np.full(l_fimN.size, raios.shape[1])])
+    fim = np.concatenate([_cruzamentos(raios, cisal, limite, l_des, c_des), raios[l_fimN, -1]])
+
+    # Em cada linha inícios e fins se alternam, então pareiam após ordenar por (linha, amostra)
+    oi = np.lexsort((ordem_ini, linhas_ini))
+    of = np.lexsort((ordem_fim, linhas_fim))
+    return linhas_ini[oi], ini[oi], fim[of]
+
+@lru_cache(maxsize=1024)
+def _perfil_unitario(r_peri, r_apo, amostras):
+    # Cisalhamento e limite são proporcionais à massa: com M > 0 os intervalos de ruptura
+    # não dependem dela, e mudar só a massa (modo ao vivo) apenas reescala o perfil
+    raios, arrasto, cisal, limite = perfis_corrente([r_peri], [r_apo], [1.0], amostras)
+    _, ini, fim = intervalos_ruptura(raios, cisal, limite)
+    for x in (raios, arrasto, cisal, ini, fim):
+        x.flags.writeable = False
+    return raios[0], arrasto[0], cisal[0], ini, fim
+
+def auditar_corrente(r_peri, r_apo, mest, amostras=AMOSTRAS_PERFIL):
+    if not (r_apo > r_peri > 0):
+        raise ValueError("É necessário 0 < pericentro < apocentro")
+    if mest > 0:
+        raios, arrasto, cisal, ini, fim = _perfil_unitario(float(r_peri), float(r_apo), int(amostras))
+        cisal, limite = cisal * mest, FRACAO_LIMITE * mest
+    else:
+        raios, arrasto, cisal, limite = perfis_corrente([r_peri], [r_apo], [mest], amostras)
+        _, ini, fim = intervalos_ruptura(raios, cisal, limite)
+        raios, arrasto, cisal, limite = raios[0], arrasto[0], cisal[0], limite[0]
+    has_gap = bool(ini.size)
+    return {
+        'raios': raios,
+        'arrasto': arrasto,
+        'cisal': cisal,
+        'limite': float(limite),
+        'has_gap': has_gap,
+        'gap_start': float(ini[0]) if has_gap else 0,
+        'gap_end': float(fim[0]) if has_gap else 0,
+        'gaps': np.column_stack([ini, fim]),
+    }
+
+def auditar_correntes_lote(r_peri, r_apo, mest, amostras=AMOSTRAS_PERFIL, bloco=BLOCO_CORRENTES):
+    # Muitas correntes numa chamada. Os perfis completos não são devolvidos: apenas o
+    # primeiro intervalo de ruptura por corrente e a tabela com todos os intervalos.
+    r_peri, r_apo, mest = (np.atleast_1d(np.asarray(x, dtype=float)) for x in np.broadcast_arrays(r_peri, r_apo, mest))
+    n = r_peri.size
+    res = {'limite': FRACAO_LIMITE * mest, 'has_gap': np.zeros(n, dtype=bool), 'n_gaps': np.zeros(n, dtype=np.int64),
+           'gap_start': np.full(n, np.nan), 'gap_end': np.full(n, np.nan)}
+    validos = np.flatnonzero(r_apo > r_peri) if n else np.empty(0, dtype=np.int64)
+    validos = validos[r_peri[validos] > 0]
+    corrente, inicios, fins = [], [], []
+    for pos in range(0, validos.size, bloco):
+        idx = validos[pos:pos + bloco]
+        raios, _, cisal, limite = perfis_corrente(r_peri[idx], r_apo[idx], mest[idx], amostras)
+        linhas, ini, fim = intervalos_ruptura(raios, cisal, limite)
+        corrente.append(idx[linhas]); inicios.append(ini); fins.append(fim)
+    corrente = np.concatenate(corrente) if corrente else np.empty(0, dtype=np.int64)
+    inicios = np.concatenate(inicios) if inicios else np.empty(0)
+    fins = np.concatenate(fins) if fins else np.empty(0)
+
+    res['n_gaps'] = np.bincount(corrente, minlength=n)
+    res['has_gap'] = res['n_gaps'] > 0
+    primeiro = np.unique(corrente, return_index=True)
+    res['gap_start'][primeiro[0]] = inicios[primeiro[1]]
+    res['gap_end'][primeiro[0]] = fins[primeiro[1]]
+    res['gaps'] = {'corrente': corrente, 'inicio': inicios, 'fim': fins}
+    return res
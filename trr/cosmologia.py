@@ -0,0 +1,133 @@
+import math
+import os
+import tempfile
+from functools import lru_cache
+
+import numpy as np
+
+from .constantes import C, H0, MPC_TO_M, OMEGA_L, OMEGA_M
+from .diagnostico import DIAG
+
+# ==========================================
+# MOTOR DE DISTÂNCIAS (TABELA COMÓVEL EM CACHE)
+# ==========================================
+# D_A(z1, z2) = [chi(z2) - chi(z1)] / (1 + z2) é separável: basta tabelar a distância
+# comóvel chi(z) numa grade uniforme (passo h = 1/PASSOS_POR_Z), o que dispensa uma
+# grade 2-D. A consulta é O(1) (índice direto + interpolação linear).
+#
+# Erro (H0=70, Om=0.3): trapézios + interpolação linear somam no máximo
+# (c/H0) * h^2 * [z/12 * max|(1/E)''| + 1/8 * max|(1/E)'|] por extremo, i.e.
+# |erro em chi| < 1.3e-3 Mpc até z = 10 com h = 1e-3 (medido: 2.7e-4 Mpc). Em D_A o erro
+# relativo fica abaixo de 2.6e-3 Mpc / [chi(z2) - chi(z1)]: < 2e-5 para z2 - z1 >= 0.1 e z2 <= 2.
+#
+# A tabela vai só até Z_MAX_TABELA, de tamanho fixo. Além dela o termo de matéria domina
+# e chi(z) - chi(Z_MAX_TABELA) tem forma fechada (_cauda_comovel), então qualquer z
+# (até infinito) custa o mesmo e não cria tabelas maiores.
+#
+# `python -m trr tabela` grava a tabela num .npy que cada processo abre com
+# np.load(mmap_mode='r'): abertura instantânea e memória compartilhada via page cache.
+PASSOS_POR_Z = 1000
+Z_MAX_TABELA = 20.0
+VERSAO_TABELA = 1
+DIRETORIO_TABELA = (os.environ.get("TRR_TABELA_DIR") or os.environ.get("TRR_CACHE_DIR")
+                    or os.path.join(os.path.expanduser("~"), ".cache", "trr"))
+
+def _integrar_comovel(h0, om, ol, z_max):
+    # Integral cumulativa (trapézios) de dz/E(z) em Mpc
+    z = np.linspace(0.0, z_max, int(round(z_max * PASSOS_POR_Z)) + 1)
+    inv_e = 1.0 / np.sqrt(om * (1 + z)**3 + ol)
+    chi = np.empty_like(z)
+    chi[0] = 0.0
+    np.cumsum(0.5 * (inv_e[1:] + inv_e[:-1]) * np.diff(z), out=chi[1:])
+    chi *= C / 1000.0 / h0
+    return chi
+
+def arquivo_tabela(h0=H0, om=OMEGA_M, ol=OMEGA_L, z_max=Z_MAX_TABELA, diretorio=DIRETORIO_TABELA):
+    return os.path.join(diretorio, f"comovel_v{VERSAO_TABELA}_h{h0:g}_om{om:g}_ol{ol:g}_z{z_max:g}_p{PASSOS_POR_Z}.npy")
+
+def construir_tabela(h0=H0, om=OMEGA_M, ol=OMEGA_L, z_max=Z_MAX_TABELA, diretorio=DIRETORIO_TABELA):
+    destino = arquivo_tabela(h0, om, ol, z_max, diretorio)
+    os.makedirs(diretorio, exist_ok=True)
+    # Escrita atômica: um processo abrindo a tabela nunca vê o arquivo pela metade
+    fd, tmp = tempfile.mkstemp(dir=diretorio, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, _integrar_comovel(h0, om, ol, z_max))
+        os.replace(tmp, destino)
+    finally:
+        if os.path.exists(tmp): os.unlink(tmp)
+    tabela_comovel.cache_clear()
+    return destino
+
+def _abrir_tabela(caminho, n):
+    try:
+        chi = np.load(caminho, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    return chi if chi.shape == (n,) and chi.dtype == np.float64 else None
+
+@lru_cache(maxsize=16)
+def tabela_comovel(h0=H0, om=OMEGA_M, ol=OMEGA_L, z_max=Z_MAX_TABELA):
+    # Tabela pré-construída (mapeada em memória) se existir; senão integrada neste processo
+    z = np.linspace(0.0, z_max, int(round(z_max * PASSOS_POR_Z)) + 1)
+    chi = _abrir_tabela(arquivo_tabela(h0, om, ol, z_max), z.size)
+    if chi is None:
+        chi = _integrar_comovel(h0, om, ol, z_max)
+    # A tabela é compartilhada entre chamadas: protegida contra escrita
+    z.flags.writeable = False
+    if chi.flags.writeable: chi.flags.writeable = False
+    return z, chi
+
+def _cauda_comovel(z, h0, om, ol):
+    # Acima de z = 20, ol / [om (1+z)^3] < 3e-4: 1/E ~ [om (1+z)^3]^-1/2 * [1 - ol / (2 om (1+z)^3)],
+    # integrado de Z_MAX_TABELA a z. O termo seguinte da série é < 1e-7 relativo.
+    # Sem matéria (om <= 0) a forma não vale: satura na borda da tabela, como antes.
+    if om <= 0:
+        return 0.0 * z
+    a, b = 1.0 + Z_MAX_TABELA, 1.0 + z
+    return C / 1000.0 / h0 * (2 / math.sqrt(om) * (a**-0.5 - b**-0.5) - ol / (7 * om**1.5) * (a**-3.5 - b**-3.5))
+
+def _interpolar(z, chi):
+    # Grade uniforme: índice direto em vez da busca binária de np.interp (fora da grade
+    # satura nas bordas; NaN se propaga)
+    x = np.clip(z * PASSOS_POR_Z, 0, chi.size - 1)
+    i = np.clip(x.astype(np.intp), 0, chi.size - 2)
+    return chi[i] + (x - i) * (chi[i + 1] - chi[i])
+
+def _interpolar_escalar(z, chi):
+    # Mesmo cálculo sem o custo fixo dos ufuncs (o solver de redshift chama um z por vez)
+    if z != z: return math.nan
+    x = min(max(z * PASSOS_POR_Z, 0.0), chi.size - 1.0)
+    i = min(int(x), chi.size - 2)
+    c0 = float(chi[i])
+    return c0 + (x - i) * (float(chi[i + 1]) - c0)
+
+def _chi_escalar(z, chi_tab, h0, om, ol):
+    chi = _interpolar_escalar(z, chi_tab)
+    return chi + _cauda_comovel(z, h0, om, ol) if z > Z_MAX_TABELA else chi
+
+def _chi(z, chi_tab, h0, om, ol):
+    chi = _interpolar(z, chi_tab)
+    alem = z > Z_MAX_TABELA
+    if not alem.any():
+        return chi
+    return np.where(alem, chi + _cauda_comovel(np.where(alem, z, Z_MAX_TABELA), h0, om, ol), chi)
+
+def _D_A_escalar(z1, z2, h0, om, ol):
+    if z2 <= z1: return 0.0     # NaN segue adiante (D_A = NaN), como na integral original
+    _, chi_tab = tabela_comovel(h0, om, ol)
+    d_c = _chi_escalar(z2, chi_tab, h0, om, ol) - _chi_escalar(z1, chi_tab, h0, om, ol)
+    DIAG.contar("calcular_D_A.chamadas"); DIAG.contar("calcular_D_A.pares")
+    return d_c / (1 + z2) * MPC_TO_M
+
+@DIAG.medir("distancias")
+def calcular_D_A(z1, z2, h0=H0, om=OMEGA_M, ol=OMEGA_L):
+    if isinstance(z1, (int, float)) and isinstance(z2, (int, float)):
+        return _D_A_escalar(float(z1), float(z2), h0, om, ol)
+    z1, z2 = np.asarray(z1, dtype=float), np.asarray(z2, dtype=float)
+    _, chi_tab = tabela_comovel(h0, om, ol)
+    with np.errstate(invalid='ignore'):
+        d_c = _chi(z2, chi_tab, h0, om, ol) - _chi(z1, chi_tab, h0, om, ol)
+    d_a = np.where(z2 <= z1, 0.0, d_c / (1 + z2)) * MPC_TO_M
+    DIAG.contar("calcular_D_A.chamadas"); DIAG.contar("calcular_D_A.pares", d_a.size)
+    return float(d_a) if d_a.ndim == 0 else d_a
@@ -0,0 +1,155 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+# ==========================================
+# DIAGNÓSTICO (TEMPOS POR ETAPA E CONTADORES)
+# ==========================================
+# Desligado por padrão (TRR_DIAGNOSTICO=1 liga no processo inteiro). Desligado, cada
+# etapa custa só a checagem de um atributo e de um ContextVar. Ligado, mantém por etapa
+# o número de chamadas, o tempo total e o máximo, os contadores (ex.: chamadas de
+# calcular_D_A) e um histórico curto de eventos em JSON. À parte do agregado do processo,
+# um rastro (rastrear) coleta só as etapas da auditoria em curso no contexto atual, e pode
+# ser ligado por sessão sem ligar o processo.
+ATIVO = os.environ.get("TRR_DIAGNOSTICO", "") not in ("", "0")
+MAX_EVENTOS = 1000
+LOG = logging.getLogger("trr.diagnostico")
+
+_rastro = contextvars.ContextVar("trr_rastro", default=None)
+
+class _EtapaNula:
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+_NULA = _EtapaNula()
+
+class _Etapa:
+    def __init__(self, diag, nome):
+        self.diag, self.nome = diag, nome
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, *exc):
+        self.diag._registrar(self.nome, time.perf_counter() - self.t0, tipo is None)
+        return False
+
+class Diagnostico:
+    def __init__(self, ativo=ATIVO, max_eventos=MAX_EVENTOS):
+        self.ativo = ativo
+        self._trava = threading.Lock()
+        self._etapas = {}       # nome -> [chamadas, segundos, máximo, erros]
+        self._contadores = {}
+        self._eventos = deque(maxlen=max_eventos)
+
+    def _ligado(self):
+        return self.ativo or _rastro.get() is not None
+
+    def etapa(self, nome):
+        return _Etapa(self, nome) if self._ligado() else _NULA
+
+    def medir(self, nome):
+        # Decorador: cronometra a função inteira como uma etapa
+        def decorador(funcao):
+            @wraps(funcao)
+            def envolvida(*args, **kwargs):
+                if not self._ligado():
+                    return funcao(*args, **kwargs)
+                with _Etapa(self, nome):
+                    return funcao(*args, **kwargs)
+            return envolvida
+        return decorador
+
+    def contar(self, nome, n=1):
+        if self.ativo:
+            with self._trava:
+                self._contadores[nome] = self._contadores.get(nome, 0) + n
+        rastro = _rastro.get()
+        if rastro is not None:
+            rastro["contadores"][nome] = rastro["contadores"].get(nome, 0) + n
+
+    def _registrar(self, nome, segundos, ok):
+        rastro = _rastro.get()
+        if rastro is not None:
+            rastro["etapas"].append((nome, segundos))
+        if not self.ativo:
+            return
+        evento = {"ts": time.time(), "etapa": nome, "segundos": segundos, "ok": ok}
+        with self._trava:
+            est = self._etapas.setdefault(nome, [0, 0.0, 0.0, 0])
+            est[0] += 1; est[1] += segundos; est[2] = max(est[2], segundos); est[3] += not ok
+            self._eventos.append(evento)
+        if LOG.isEnabledFor(logging.DEBUG):
+            LOG.debug(json.dumps(evento))
+
+    def rastrear(self, rotulo, ativo=None):
+        # Coleta as etapas e contadores de uma auditoria (uma sessão/um clique). `ativo`
+        # liga a coleta só neste contexto (ex.: a sessão que pediu o diagnóstico), sem
+        # mexer no agregado do processo; None segue o switch global.
+        return _Rastreador(self, rotulo, self.ativo if ativo is None else ativo)
+
+    def resumo(self):
+        with self._trava:
+            etapas = {nome: {"chamadas": c, "segundos": s, "media": s / c if c else 0.0, "maximo": m, "erros": e}
+                      for nome, (c, s, m, e) in sorted(self._etapas.items())}
+            return {"ativo": self.ativo, "etapas": etapas, "contadores": dict(sorted(self._contadores.items()))}
+
+    def eventos_json(self):
+        # Log estruturado: um objeto JSON por linha (eventos mais recentes)
+        with self._trava:
+            eventos = list(self._eventos)
+        return "".join(json.dumps(e) + "\n" for e in eventos)
+
+    def prometheus(self, extras=None):
+        # Formato de exposição texto do Prometheus; `extras` entra como gauges trr_<nome>
+        res = self.resumo()
+        linhas = []
+        def metrica(nome, tipo, ajuda, amostras):
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+            linhas.extend(f"{nome}{rotulos} {valor:.9g}" for rotulos, valor in amostras)
+        etapas = res["etapas"].items()
+        metrica("trr_etapa_chamadas_total", "counter", "Execucoes de cada etapa",
+                [(f'{{etapa="{n}"}}', e["chamadas"]) for n, e in etapas])
+        metrica("trr_etapa_segundos_total", "counter", "Tempo acumulado de cada etapa",
+                [(f'{{etapa="{n}"}}', e["segundos"]) for n, e in etapas])
+        metrica("trr_etapa_segundos_max", "gauge", "Execucao mais lenta de cada etapa",
+                [(f'{{etapa="{n}"}}', e["maximo"]) for n, e in etapas])
+        metrica("trr_etapa_erros_total", "counter", "Execucoes que terminaram em excecao",
+                [(f'{{etapa="{n}"}}', e["erros"]) for n, e in etapas])
+        metrica("trr_contador_total", "counter", "Contadores dos caminhos criticos",
+                [(f'{{nome="{n}"}}', v) for n, v in res["contadores"].items()])
+        for nome, valor in (extras or {}).items():
+            metrica(f"trr_{nome}", "gauge", nome, [("", float(valor))])
+        return "\n".join(linhas) + "\n"
+
+    def limpar(self):
+        with self._trava:
+            self._etapas.clear(); self._contadores.clear(); self._eventos.clear()
+
+class _Rastreador:
+    def __init__(self, diag, rotulo, coletar):
+        self.diag, self.coletar = diag, coletar
+        self.rastro = {"rotulo": rotulo, "etapas": [], "contadores": {}, "segundos": 0.0}
+
+    def __enter__(self):
+        self._token = _rastro.set(self.rastro) if self.coletar else None
+        self._t0 = time.perf_counter()
+        return self.rastro
+
+    def __exit__(self, tipo, *exc):
+        self.rastro["segundos"] = time.perf_counter() - self._t0
+        if self._token is not None:
+            _rastro.reset(self._token)
+        if self.diag.ativo:
+            self.diag._registrar(self.rastro["rotulo"], self.rastro["segundos"], tipo is None)
+        return False
+
+# Instância do processo, como o CACHE
+DIAG = Diagnostico()
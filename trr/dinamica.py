@@ -0,0 +1,173 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from .constantes import A0, BETA, KPC_TO_M
+from .diagnostico import DIAG
+
+# ==========================================
+# DINÂMICA GALÁCTICA (GRADE M/L VETORIZADA)
+# ==========================================
+# Mesma grade da aba de Dinâmica: M/L do disco de 0.10 a 3.00 (bojo = disco + 0.2)
+GRADE_ML = np.arange(10, 301) / 100.0
+BLOCO_PONTOS = 4096
+TOL_ML = 1e-6             # Refino do M/L da curva inteira (largura final do intervalo)
+RAZAO_AUREA = (math.sqrt(5) - 1) / 2
+
+def aceleracao_trr(g_b, rad, beta=BETA, a0=A0):
+    # Lei de aceleração TRR: interpolação em A0 + arrasto viscoso (1 + BETA * r)
+    return (g_b / -np.expm1(-np.sqrt(g_b / a0))) * (1 + beta * rad)
+
+@DIAG.medir("dinamica.busca_ml")
+def auditar_dinamica(rad, vobs, vgas, vdisk, vbulge, grade_ml=GRADE_ML, bloco=BLOCO_PONTOS, beta=BETA, a0=A0):
+    # Avalia todos os pontos contra toda a grade M/L de uma vez (pontos x grade),
+    # processando em blocos para limitar a memória em catálogos grandes.
+    rad, vobs, vgas, vdisk, vbulge = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(x, dtype=float)) for x in (rad, vobs, vgas, vdisk, vbulge)))
+    grade_ml = np.asarray(grade_ml, dtype=float)
+    n = rad.size
+    res = {k: np.full(n, np.nan) for k in ('ml', 'vbar', 'vtrr', 'vobs', 'prec')}
+    res['vobs'][:] = vobs
+    validos = np.flatnonzero((rad > 0) & (vobs > 0))
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for ini in range(0, validos.size, bloco):
+            idx = validos[ini:ini + bloco]
+            r = rad[idx, None]
+            v_sq = vgas[idx, None]**2 + grade_ml * vdisk[idx, None]**2 + (grade_ml + 0.2) * vbulge[idx, None]**2
+            g_b = (v_sq * 1e6) / (r * KPC_TO_M)
+            g_t = aceleracao_trr(g_b, r, beta, a0)
+            g_obs = (vobs[idx, None]**2 * 1e6) / (r * KPC_TO_M)
+            err = np.abs(g_obs - g_t) / g_obs
+            err[~np.isfinite(err)] = np.inf
+
+            melhor = np.argmin(err, axis=1)
+            linhas = np.arange(idx.size)
+            melhor_erro = err[linhas, melhor]
+            ok = np.isfinite(melhor_erro)
+            idx, melhor, linhas, melhor_erro = idx[ok], melhor[ok], linhas[ok], melhor_erro[ok]
+
+            res['ml'][idx] = grade_ml[melhor]
+            res['vbar'][idx] = np.sqrt(v_sq[linhas, melhor])
+            res['vtrr'][idx] = np.sqrt((g_t[linhas, melhor] * rad[idx] * KPC_TO_M) / 1e6)
+            res['prec'][idx] = np.maximum(0.0, 100.0 - melhor_erro * 100.0)
+    return res
+
+@DIAG.medir("dinamica.ajuste_curva")
+def ajustar_curvas(grupos, rad, vobs, vgas, vdisk, vbulge, grade_ml=GRADE_ML, tol=TOL_ML, bloco=BLOCO_PONTOS, beta=BETA, a0=A0):
+    # Um M/L por galáxia para a curva inteira (bojo = disco + 0.2, como na grade), minimizando
+    # o erro relativo médio de aceleração em todos os raios. `grupos`: código 0..G-1 da galáxia
+    # de cada ponto. A grade inteira é avaliada de uma vez (pontos x grade, somada por galáxia)
+    # para achar a bacia; depois uma seção áurea vetorizada refina entre os nós vizinhos.
+    grupos = np.atleast_1d(np.asarray(grupos, dtype=np.int64))
+    rad, vobs, vgas, vdisk, vbulge = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(x, dtype=float)) for x in (rad, vobs, vgas, vdisk, vbulge)))
+    grade_ml = np.asarray(grade_ml, dtype=float)
+    n_gal = int(grupos.max()) + 1 if grupos.size else 0
+    galaxias = {k: np.full(n_gal, np.nan) for k in ('ml', 'erro', 'prec')}
+    pontos = {k: np.full(rad.size, np.nan) for k in ('ml', 'vbar', 'vtrr', 'vobs', 'prec')}
+    pontos['vobs'][:] = vobs
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        g_obs = (vobs**2 * 1e6) / (rad * KPC_TO_M)
+        validos = (rad > 0) & (vobs > 0) & np.isfinite(g_obs) & np.isfinite(vgas + vdisk + vbulge) & (vgas**2 + vdisk**2 + vbulge**2 > 0)
+        # Pontos de uma mesma galáxia contíguos: a soma por galáxia vira um reduceat
+        idx = np.flatnonzero(validos)
+        idx = idx[np.argsort(grupos[idx], kind="stable")]
+        cod = grupos[idx]
+        n_pontos = np.bincount(cod, minlength=n_gal)
+        galaxias['n_pontos'] = n_pontos
+
+        def avaliar(ml, sel):
+            r = rad[sel]
+            v_sq = vgas[sel]**2 + ml * vdisk[sel]**2 + (ml + 0.2) * vbulge[sel]**2
+            g_t = aceleracao_trr((v_sq * 1e6) / (r * KPC_TO_M), r, beta, a0)
+            err = np.abs(g_obs[sel] - g_t) / g_obs[sel]
+            err[~np.isfinite(err)] = np.inf
+            return v_sq, g_t, err
+
+        soma = np.zeros((n_gal, grade_ml.size))
+        for ini in range(0, idx.size, bloco):
+            sel = idx[ini:ini + bloco]
+            c = cod[ini:ini + bloco]
+            inicio = np.flatnonzero(np.r_[True, c[1:] != c[:-1]])
+            soma[c[inicio]] += np.add.reduceat(avaliar(grade_ml, sel[:, None])[2], inicio, axis=0)
+        media = soma / n_pontos[:, None]
+
+        ok = np.flatnonzero((n_pontos > 0) & np.isfinite(media).any(axis=1))
+        if not ok.size:
+            return galaxias, pontos
+        melhor = np.argmin(media[ok], axis=1)
+        ml_grade, erro_grade = grade_ml[melhor], media[ok, melhor]
+
+        # Seção áurea entre os nós vizinhos do melhor nó, todas as galáxias juntas: cada
+        # iteração é uma passada pelos pontos com o M/L da própria galáxia
+        def erro_medio(ml_gal):
+            ml = np.zeros(n_gal)
+            ml[ok] = ml_gal
+            return np.bincount(cod, weights=avaliar(ml[cod], idx)[2], minlength=n_gal)[ok] / n_pontos[ok]
+
+        a = grade_ml[np.maximum(melhor - 1, 0)]
+        b = grade_ml[np.minimum(melhor + 1, grade_ml.size - 1)]
+        x1, x2 = b - RAZAO_AUREA * (b - a), a + RAZAO_AUREA * (b - a)
+        f1, f2 = erro_medio(x1), erro_medio(x2)
+        largura = float(np.max(b - a))
+        iteracoes = math.ceil(math.log(tol / largura) / math.log(RAZAO_AUREA)) if largura > tol else 0
+        for _ in range(iteracoes):
+            esq = f1 <= f2
+            a, b = np.where(esq, a, x1), np.where(esq, x2, b)
+            # O ponto interno que sobra é reaproveitado; só o novo é avaliado
+            fica, f_fica = np.where(esq, x1, x2), np.where(esq, f1, f2)
+            novo = np.where(esq, b - RAZAO_AUREA * (b - a), a + RAZAO_AUREA * (b - a))
+            f_novo = erro_medio(novo)
+            x1, f1 = np.where(esq, novo, fica), np.where(esq, f_novo, f_fica)
+            x2, f2 = np.where(esq, fica, novo), np.where(esq, f_fica, f_novo)
+        x, fx = np.where(f1 <= f2, x1, x2), np.minimum(f1, f2)
+        # A soma de erros pode ter mais de uma bacia: o refino nunca fica pior que a grade
+        melhorou = fx < erro_grade
+        ml_gal = np.where(melhorou, x, ml_grade)
+        erro_gal = np.where(melhorou, fx, erro_grade)
+
+        galaxias['ml'][ok], galaxias['erro'][ok] = ml_gal, erro_gal
+        galaxias['prec'][ok] = np.maximum(0.0, 100.0 - erro_gal * 100.0)
+        ajustados = np.isfinite(galaxias['ml'][cod])
+        sel = idx[ajustados]
+        ml = galaxias['ml'][cod[ajustados]]
+        v_sq, g_t, err = avaliar(ml, sel)
+        pontos['ml'][sel] = ml
+        pontos['vbar'][sel] = np.sqrt(v_sq)
+        pontos['vtrr'][sel] = np.sqrt((g_t * rad[sel] * KPC_TO_M) / 1e6)
+        pontos['prec'][sel] = np.maximum(0.0, 100.0 - err * 100.0)
+    return galaxias, pontos
+
+@lru_cache(maxsize=1024)
+def componentes_barionicas(rad, vgas, vdisk, vbulge, beta=BETA, a0=A0):
+    # Etapa de um ponto que não depende de V_obs: V_bar^2 e g_TRR em toda a grade M/L.
+    # Mudar só V_obs (modo ao vivo) reaproveita esta etapa e refaz apenas a busca.
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        v_sq = vgas**2 + GRADE_ML * vdisk**2 + (GRADE_ML + 0.2) * vbulge**2
+        g_t = aceleracao_trr((v_sq * 1e6) / (rad * KPC_TO_M), rad, beta, a0)
+    v_sq.flags.writeable = g_t.flags.writeable = False
+    return v_sq, g_t
+
+def curva_ml(rad, vgas, vdisk, vbulge):
+    # V_bar e V_TRR (km/s) em função do M/L do disco, para o gráfico
+    v_sq, g_t = componentes_barionicas(float(rad), float(vgas), float(vdisk), float(vbulge))
+    with np.errstate(invalid='ignore'):
+        return {'ml': GRADE_ML, 'vbar': np.sqrt(v_sq), 'vtrr': np.sqrt((g_t * rad * KPC_TO_M) / 1e6)}
+
+def auditar_ponto_dinamica(rad, vobs, vgas, vdisk, vbulge):
+    # Mesmo resultado de auditar_dinamica para um ponto, com a etapa bariônica em cache
+    if not (rad > 0 and vobs > 0):
+        raise ValueError("É necessário raio > 0 e velocidade observada > 0")
+    v_sq, g_t = componentes_barionicas(float(rad), float(vgas), float(vdisk), float(vbulge))
+    g_obs = (vobs**2 * 1e6) / (rad * KPC_TO_M)
+    with np.errstate(invalid='ignore'):
+        err = np.abs(g_obs - g_t) / g_obs
+    err[~np.isfinite(err)] = np.inf
+    i = int(np.argmin(err))
+    if not np.isfinite(err[i]):
+        return {'ml': math.nan, 'vbar': math.nan, 'vtrr': math.nan, 'vobs': float(vobs), 'prec': math.nan}
+    return {'ml': float(GRADE_ML[i]), 'vbar': math.sqrt(v_sq[i]), 'vtrr': math.sqrt((g_t[i] * rad * KPC_TO_M) / 1e6),
+            'vobs': float(vobs), 'prec': max(0.0, 100.0 - float(err[i]) * 100.0)}
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import pickle
+import re
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+
+import fpdf
+from fpdf import FPDF
+from fpdf.ttfonts import TTFontFile
+
+# ==========================================
+# FPDF COM FONTE UNICODE EMBUTIDA (SUBCONJUNTO EM CACHE)
+# ==========================================
+# Único módulo que depende de detalhes internos do fpdf (fonts, images, _putfonts,
+# _putTTfontwidths, TTFontFile). Eles mudam entre versões, então a versão é a fixada em
+# requirements.txt e qualquer outra falha já na importação, em vez de gerar PDFs quebrados.
+VERSAO_FPDF = "1.7.2"
+if fpdf.FPDF_VERSION != VERSAO_FPDF:
+    raise ImportError(f"trr.fpdf_unicode exige fpdf=={VERSAO_FPDF} (requirements.txt); instalado: {fpdf.FPDF_VERSION}")
+
+FAMILIA_UNICODE = "trr"
+DIRETORIO_FONTES = os.path.join(os.environ.get("TRR_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "trr"), "fontes")
+MAX_SUBCONJUNTOS = 32
+
+_trava_fontes = threading.Lock()
+_fontes = {}                    # caminho -> métricas do TTF: lido uma vez por processo
+_subconjuntos = OrderedDict()   # (caminho, caracteres) -> fonte embutida pronta
+TO_UNICODE = ("/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n/CIDSystemInfo\n<</Registry (Adobe)\n"
+              "/Ordering (UCS)\n/Supplement 0\n>> def\n/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n"
+              "1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange\n1 beginbfrange\n<0000> <FFFF> <0000>\n"
+              "endbfrange\nendcmap\nCMapName currentdict /CMap defineresource pop\nend\nend")
+
+def _metricas_fonte(caminho):
+    # Métricas do TTF (larguras de todos os glifos): lidas uma vez por processo e guardadas
+    # em disco para os workers; a chave muda se o arquivo da fonte mudar
+    with _trava_fontes:
+        if caminho in _fontes:
+            return _fontes[caminho]
+    info = os.stat(caminho)
+    chave = hashlib.sha1(f"{os.path.abspath(caminho)}|{info.st_size}|{info.st_mtime_ns}".encode()).hexdigest()
+    arquivo = os.path.join(DIRETORIO_FONTES, chave + ".pkl")
+    try:
+        with open(arquivo, "rb") as f:
+            metricas = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        ttf = TTFontFile()
+        ttf.getMetrics(caminho)
+        desc = {"Ascent": int(round(ttf.ascent)), "Descent": int(round(ttf.descent)), "CapHeight": int(round(ttf.capHeight)),
+                "Flags": ttf.flags, "FontBBox": "[%d %d %d %d]" % tuple(int(round(b)) for b in ttf.bbox),
+                "ItalicAngle": int(ttf.italicAngle), "StemV": int(round(ttf.stemV)), "MissingWidth": int(round(ttf.defaultWidth))}
+        metricas = {"name": re.sub("[ ()]", "", ttf.fullName), "type": "TTF", "desc": desc, "up": round(ttf.underlinePosition),
+                    "ut": round(ttf.underlineThickness), "cw": ttf.charWidths, "ttffile": caminho, "unifilename": None}
+        try:
+            os.makedirs(DIRETORIO_FONTES, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=DIRETORIO_FONTES, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(metricas, f)
+            os.replace(tmp, arquivo)
+        except OSError:
+            pass
+    with _trava_fontes:
+        return _fontes.setdefault(caminho, metricas)
+
+def _fonte_embutida(caminho, caracteres):
+    # O fpdf relê o TTF inteiro para montar o subconjunto e refaz o mapa CID -> glifo a cada
+    # PDF (~100 ms na DejaVu). Os dois só dependem dos caracteres: ficam em cache, comprimidos.
+    chave = (caminho, caracteres)
+    with _trava_fontes:
+        pronto = _subconjuntos.get(chave)
+        if pronto is not None:
+            _subconjuntos.move_to_end(chave)
+            return pronto
+    ttf = TTFontFile()
+    fonte = ttf.makeSubset(caminho, list(caracteres))
+    mapa = bytearray(256 * 256 * 2)
+    for codigo, glifo in ttf.codeToGlyph.items():
+        if codigo < 65536:
+            mapa[2 * codigo], mapa[2 * codigo + 1] = glifo >> 8, glifo & 0xFF
+    pronto = (len(fonte), zlib.compress(fonte), zlib.compress(bytes(mapa)), ttf.maxUni)
+    with _trava_fontes:
+        _subconjuntos[chave] = pronto
+        while len(_subconjuntos) > MAX_SUBCONJUNTOS:
+            _subconjuntos.popitem(last=False)
+    return pronto
+
+class PDF(FPDF):
+    # FPDF com a fonte Unicode embutida por conta própria, a partir do cache acima, e com
+    # gráficos inseridos direto da matriz RGB. Nada é trocado no módulo do fpdf.
+    def usar_fonte_unicode(self, caminho, caracteres):
+        self.fonts[FAMILIA_UNICODE] = dict(_metricas_fonte(caminho), i=len(self.fonts) + 1,
+                                           fontkey=FAMILIA_UNICODE, subset=list(range(32)) + list(caracteres))
+
+    def inserir_imagem(self, rgb, **pos):
+        # Registra a matriz RGB como XObject (FlateDecode), sem PNG intermediário
+        nome = f"grafico_{len(self.images)}"
+        h, w, _ = rgb.shape
+        self.images[nome] = {'i': len(self.images) + 1, 'w': w, 'h': h, 'cs': 'DeviceRGB', 'bpc': 8,
+                             'f': 'FlateDecode', 'data': zlib.compress(rgb.tobytes(), 6)}
+        self.image(nome, **pos)
+
+    def _putfonts(self):
+        # As fontes padrão seguem pelo fpdf; a Unicode (objetos Type0 + CIDFontType2) sai daqui
+        fonte = self.fonts.pop(FAMILIA_UNICODE, None)
+        super()._putfonts()
+        if fonte is None:
+            return
+        self.fonts[FAMILIA_UNICODE] = fonte
+        tamanho, dados, mapa, max_uni = _fonte_embutida(fonte["ttffile"], tuple(sorted(set(fonte["subset"]) - {0})))
+        nome = "MPDFAA+" + fonte["name"]
+        fonte["n"] = self.n + 1
+        self._newobj()
+        self._out(f"<</Type /Font /Subtype /Type0 /BaseFont /{nome} /Encoding /Identity-H "
+                  f"/DescendantFonts [{self.n + 1} 0 R] /ToUnicode {self.n + 2} 0 R>>")
+        self._out("endobj")
+        self._newobj()
+        self._out(f"<</Type /Font /Subtype /CIDFontType2 /BaseFont /{nome} /CIDSystemInfo {self.n + 2} 0 R "
+                  f"/FontDescriptor {self.n + 3} 0 R")
+        if fonte["desc"].get("MissingWidth"):
+            self._out("/DW %d" % fonte["desc"]["MissingWidth"])
+        self._putTTfontwidths(fonte, max_uni)
+        self._out(f"/CIDToGIDMap {self.n + 4} 0 R>>")
+        self._out("endobj")
+        self._newobj()
+        self._out(f"<</Length {len(TO_UNICODE)}>>")
+        self._putstream(TO_UNICODE)
+        self._out("endobj")
+        self._newobj()
+        self._out("<</Registry (Adobe) /Ordering (UCS) /Supplement 0>>")
+        self._out("endobj")
+        self._newobj()
+        desc = dict(fonte["desc"], Flags=(fonte["desc"]["Flags"] | 4) & ~32)   # não simbólica
+        self._out(f"<</Type /FontDescriptor /FontName /{nome} "
+                  + " ".join(f"/{k} {desc[k]}" for k in ("Ascent", "Descent", "CapHeight", "Flags", "FontBBox", "ItalicAngle", "StemV", "MissingWidth"))
+                  + f" /FontFile2 {self.n + 2} 0 R>>")
+        self._out("endobj")
+        for fluxo, extra in ((mapa, ""), (dados, f" /Length1 {tamanho}")):
+            self._newobj()
+            self._out(f"<</Length {len(fluxo)} /Filter /FlateDecode{extra}>>")
+            self._putstream(fluxo)
+            self._out("endobj")
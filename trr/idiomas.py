@@ -0,0 +1,384 @@
+import threading
+from collections.abc import Mapping
+
+# ==========================================
+# DICIONÁRIO ABSOLUTO (9 IDIOMAS)
+# ==========================================
+# Uma função por idioma: a tabela só é montada no primeiro LANG[código] (ver _Idiomas).
+def _pt():
+    return {
+        "code": "PT", "welcome": "Selecione o seu idioma",
+        "title": "🌌 Motor Cosmológico TRR", "author_prefix": "Autor", "theory_name": "Teoria da Relatividade Referencial",
+        "tab1": "📊 Dinâmica Galáctica", "tab2": "👁️ Óptica Cosmológica", "tab3": "🔭 Previsão de Redshift", "tab4": "☄️ Correntes Estelares",
+        "prov_title": "🗂️ Proveniência de Dados", 
+        "prov_info": "Para garantir a reprodutibilidade, este motor processa dados brutos de:",
+        "prov_warn": "⚠️ Nenhum parâmetro ad-hoc de matéria escura é injetado aqui.",
+        "cat_list": "* SDSS DR16Q\n* SPARC (CWRU)\n* SLACS Survey\n* ESA Gaia\n* JWST/MAST\n* LIGO/Virgo",
+        "rad": "Raio observado (kpc)", "vobs": "Veloc. Telescópio (km/s)", "vgas": "Velocidade Gás (km/s)", "vdisk": "Veloc. Disco (km/s)", "vbulge": "Veloc. Bojo (km/s)",
+        "zl": "Redshift Lente (z_L)", "zs": "Redshift Fonte (z_S)", "mest": "Massa Fotométrica Total (10^11)", "theta": "Anel Einstein (arcsec)", "cluster": "Aglomerado Gigante?",
+        "r_peri": "Pericentro da Corrente (kpc)", "r_apo": "Apocentro da Corrente (kpc)",
+        "calc": "🚀 Processar Auditoria TRR", "clear": "🧹 Limpar Tudo",
+        "pdf_btn": "📄 Baixar Relatório de Auditoria (PDF)", "details": "📚 Ver Parecer Técnico",
+        "live": "⚡ Modo ao vivo", "live_help": "Recalcula a cada mudança de entrada, sem clicar, e mostra a curva.",
+        "curve_title": "📈 Curva de rotação inteira (M/L único)", "curve_fit": "Ajustar curva",
+        "curve_info": "Cole ou digite os pontos da curva de uma galáxia: um só M/L (bojo = disco + 0.2) é ajustado a todos os raios.",
+        "precision": "Precisão Empírica", "precision_red": "Convergência Matemática", "g_bar": "Física Clássica", "g_trr": "Previsão TRR", "g_obs": "Telescópio",
+        "info_dyn": "💡 A TRR calcula o atrito topológico do vácuo para prever a velocidade de rotação sem Matéria Escura.",
+        "info_opt": "💡 A TRR aplica o Índice de Refração Temporal (eta_C) para amplificar o desvio gravitacional.",
+        "info_red": "💡 A TRR itera a matriz usando a Massa Bariônica Total para prever o tempo-espaço da Fonte (z_S).",
+        "info_str": "💡 A TRR mapeia o cisalhamento viscoso do vácuo, revelando a coordenada real da ruptura.",
+        "pred_zs": "Redshift z_S Previsto", "loc_gap": "📌 Ruptura nas coordenadas", "no_gap": "Nenhuma ruptura crítica", "tol_zs": "Tolerância em z_S", "no_sol": "Nenhuma solução exata no intervalo; mostrando o z_S mais próximo.",
+        "diag_title": "Diagnóstico de desempenho", "diag_on": "Ativar instrumentação", "diag_last": "Última auditoria", "diag_stages": "Etapas (sessão)",
+        "mc_title": "Incerteza (Monte Carlo)", "mc_n": "Amostras", "mc_seed": "Semente", "mc_calc": "Propagar incerteza", "mc_int": "Intervalo 95%",
+        "cat_title": "📁 Catálogo (CSV / Parquet / FITS)", "cat_map": "Colunas do catálogo para cada entrada do motor (detectadas pelo nome; — = ausente)", "cat_id": "Identificador", "job_partial": "Resultado parcial",
+        "job_file": "Arquivo do catálogo (CSV / Parquet / FITS)", "job_pdf": "Gerar relatório PDF",
+        "job_curve": "Ajustar a curva inteira (um M/L por galáxia)", "job_fit": "Curva ajustada",
+        "job_send": "Enviar tarefa", "job_cancel": "Cancelar", "job_remove": "Remover", "job_result": "Resultado", "jobs": "Tarefas",
+        "job_states": {"na_fila": "Na fila", "executando": "Executando", "concluida": "Concluída", "erro": "Erro", "cancelada": "Cancelada", "interrompida": "Interrompida"},
+        "pdf_h1": "TEORIA DA RELATIVIDADE REFERENCIAL (TRR)", "pdf_h2": "Relatorio de Auditoria Automatizada", "pdf_footer": "Documento gerado pelo Motor Cosmologico TRR.",
+        "pdf_title_dyn": "AUDITORIA CIENTIFICA - DINAMICA", "pdf_title_opt": "AUDITORIA CIENTIFICA - OPTICA", "pdf_title_red": "AUDITORIA CIENTIFICA - REDSHIFT", "pdf_title_str": "AUDITORIA CIENTIFICA - CORRENTES", "pdf_title_cat": "RESUMO DO CATALOGO",
+        "pdf_cat_stats": "Objetos auditados: {n}\nPrecisao media: {media:.2f}% | mediana: {mediana:.2f}% | minima: {minimo:.2f}% | maxima: {maximo:.2f}%", "pdf_cat_obj": "Objeto",
+        "rep_dyn_text": "LAUDO TÉCNICO:\n1. A massa bariônica pura gera {vbar:.2f} km/s.\n2. A TRR calcula o atrito topológico (Beta=0.028006). RESULTADO: Precisão de {prec:.2f}% sem Matéria Escura.",
+        "rep_opt_text": "LAUDO TÉCNICO:\nA massa visível desvia a luz em {tbar:.2f} arcsec. A TRR aplica a Refração Temporal (eta_C = {etac:.5f}), demonstrando convergência teórica para o anel de {tobs:.2f} arcsec. Precisão: {prec:.2f}%.",
+        "rep_red_text": "LAUDO PREDITIVO (AUDITORIA CEGA):\n1. A TRR travou a massa total como limite fluídico.\n2. O algoritmo prediz que a galáxia fonte está em z_S = {zs_pred:.4f}.\nRESULTADO: Convergência pura isolada da Matéria Escura.",
+        "rep_str_text": "LAUDO DE HIDRODINÂMICA:\nO Cisalhamento Viscoso atingiu o limite crítico de ruptura na zona de {loc_str}. O gap é um efeito de atrito com o fluido do espaço (Phase 3)."
+    }
+
+def _en():
+    return {
+        "code": "EN", "welcome": "Select Language",
+        "title": "🌌 RRT Cosmological Engine", "author_prefix": "Author", "theory_name": "Referential Relativity Theory",
+        "tab1": "📊 Galactic Dynamics", "tab2": "👁️ Cosmological Optics", "tab3": "🔭 Redshift Prediction", "tab4": "☄️ Stellar Streams",
+        "prov_title": "🗂️ Data Provenance", 
+        "prov_info": "To ensure reproducibility, this engine processes raw data from:",
+        "prov_warn": "⚠️ No ad-hoc dark matter parameters are injected here.",
+        "cat_list": "* SDSS DR16Q\n* SPARC (CWRU)\n* SLACS Survey\n* ESA Gaia\n* JWST/MAST\n* LIGO/Virgo",
+        "rad": "Obs. Radius (kpc)", "vobs": "Telescope Vel. (km/s)", "vgas": "Gas Vel. (km/s)", "vdisk": "Disk Vel. (km/s)", "vbulge": "Bulge Vel. (km/s)",
+        "zl": "Lens Redshift (z_L)", "zs": "Source Redshift (z_S)", "mest": "Total Photometric Mass (10^11)", "theta": "Einstein Ring (arcsec)", "cluster": "Giant Cluster?",
+        "r_peri": "Stream Pericenter (kpc)", "r_apo": "Stream Apocenter (kpc)",
+        "calc": "🚀 Process RRT Audit", "clear": "🧹 Clear All",
+        "pdf_btn": "📄 Download Report (PDF)", "details": "📚 View Technical Report",
+        "live": "⚡ Live mode", "live_help": "Recomputes on every input change, without clicking, and shows the curve.",
+        "curve_title": "📈 Whole rotation curve (single M/L)", "curve_fit": "Fit curve",
+        "curve_info": "Paste or type one galaxy's curve points: a single M/L (bulge = disk + 0.2) is fitted across all radii.",
+        "precision": "Empirical Accuracy", "precision_red": "Math Convergence", "g_bar": "Classical Physics", "g_trr": "RRT Prediction", "g_obs": "Telescope",
+        "info_dyn": "💡 RRT calculates topological vacuum friction to predict rotation velocity without Dark Matter.",
+        "info_opt": "💡 RRT applies Time Refraction (eta_C) to amplify gravitational deflection using visible mass only.",
+        "info_red": "💡 RRT iterates using Total Baryonic Mass to predict the Source space-time (z_S).",
+        "info_str": "💡 RRT maps vacuum viscous shear, revealing the real coordinates of structural gaps.",
+        "pred_zs": "Predicted Redshift z_S", "loc_gap": "📌 Rupture Coordinates", "no_gap": "No critical rupture", "tol_zs": "z_S tolerance", "no_sol": "No exact solution in range; showing the closest z_S.",
+        "diag_title": "Performance diagnostics", "diag_on": "Enable instrumentation", "diag_last": "Last audit", "diag_stages": "Stages (session)",
+        "mc_title": "Uncertainty (Monte Carlo)", "mc_n": "Samples", "mc_seed": "Seed", "mc_calc": "Propagate uncertainty", "mc_int": "95% interval",
+        "cat_title": "📁 Catalog (CSV / Parquet / FITS)", "cat_map": "Catalog column for each engine input (detected by name; — = missing)", "cat_id": "Identifier", "job_partial": "Partial result",
+        "job_file": "Catalog file (CSV / Parquet / FITS)", "job_pdf": "Build PDF report",
+        "job_curve": "Fit the whole curve (one M/L per galaxy)", "job_fit": "Fitted curve",
+        "job_send": "Submit job", "job_cancel": "Cancel", "job_remove": "Remove", "job_result": "Result", "jobs": "Jobs",
+        "job_states": {"na_fila": "Queued", "executando": "Running", "concluida": "Finished", "erro": "Error", "cancelada": "Cancelled", "interrompida": "Interrupted"},
+        "pdf_h1": "REFERENTIAL RELATIVITY THEORY (RRT)", "pdf_h2": "Automated Audit Report", "pdf_footer": "Document generated by RRT Cosmological Engine.",
+        "pdf_title_dyn": "SCIENTIFIC AUDIT - DYNAMICS", "pdf_title_opt": "SCIENTIFIC AUDIT - OPTICS", "pdf_title_red": "SCIENTIFIC AUDIT - REDSHIFT", "pdf_title_str": "SCIENTIFIC AUDIT - STREAMS", "pdf_title_cat": "CATALOG SUMMARY",
+        "pdf_cat_stats": "Audited objects: {n}\nMean accuracy: {media:.2f}% | median: {mediana:.2f}% | min: {minimo:.2f}% | max: {maximo:.2f}%", "pdf_cat_obj": "Object",
+        "rep_dyn_text": "TECHNICAL REPORT:\n1. Baryonic mass yields {vbar:.2f} km/s. 2. RRT fluid drag (Beta=0.028006) elevates velocity to {vtrr:.2f} km/s.\nRESULT: {prec:.2f}% accuracy achieved without Dark Matter.",
+        "rep_opt_text": "TECHNICAL REPORT:\nVisible mass deflects at {tbar:.2f} arcsec. RRT applies Time Refraction (eta_C = {etac:.5f}), providing theoretical convergence for {tobs:.2f} arcsec. Accuracy: {prec:.2f}%.",
+        "rep_red_text": "PREDICTIVE REPORT (STRICT BLIND AUDIT):\n1. RRT locked total mass as the spatial fluid limit. 2. Predicts source galaxy at z_S = {zs_pred:.4f}.\nRESULT: Pure algorithmic convergence.",
+        "rep_str_text": "HYDRODYNAMICS REPORT:\nViscous Shear hit critical rupture limits at {loc_str}. Structural gaps are deterministic vacuum friction effects."
+    }
+
+def _es():
+    return {
+        "code": "ES", "welcome": "Seleccione su idioma",
+        "title": "🌌 Motor Cosmológico TRR", "author_prefix": "Autor", "theory_name": "Teoría de la Relatividad Referencial",
+        "tab1": "📊 Dinámica Galáctica", "tab2": "👁️ Óptica Cosmológica", "tab3": "🔭 Predicción de Redshift", "tab4": "☄️ Corrientes Estelares",
+        "prov_title": "🗂️ Procedencia de Datos", 
+        "prov_info": "Para garantizar la reproducibilidad, este motor procesa datos brutos de:",
+        "prov_warn": "⚠️ Aquí no se inyectan parámetros ad-hoc de materia oscura.",
+        "cat_list": "* SDSS DR16Q\n* SPARC (CWRU)\n* SLACS Survey\n* ESA Gaia\n* JWST/MAST\n* LIGO/Virgo",
+        "rad": "Radio observado (kpc)", "vobs": "Velocidad Telescopio", "vgas": "Velocidad Gas", "vdisk": "Veloc. Disco", "vbulge": "Veloc. Bulbo",
+        "zl": "Redshift Lente (z_L)", "zs": "Redshift Fuente (z_S)", "mest": "Masa Fotométrica (10^11)", "theta": "Anillo Einstein (arcsec)", "cluster": "¿Cúmulo Gigante?",
+        "r_peri": "Pericentro (kpc)", "r_apo": "Apocentro (kpc)",
+        "calc": "🚀 Procesar Auditoría TRR", "clear": "🧹 Limpiar Todo",
+        "pdf_btn": "📄 Descargar Reporte (PDF)", "details": "📚 Ver Informe Técnico",
+        "live": "⚡ Modo en vivo", "live_help": "Recalcula con cada cambio de entrada, sin hacer clic, y muestra la curva.",
+        "curve_title": "📈 Curva de rotación completa (M/L único)", "curve_fit": "Ajustar curva",
+        "curve_info": "Pegue o escriba los puntos de la curva de una galaxia: se ajusta un solo M/L (bulbo = disco + 0.2) en todos los radios.",
+        "precision": "Precisión Empírica", "precision_red": "Convergencia Matemática", "g_bar": "Física Clásica", "g_trr": "Predicción TRR", "g_obs": "Telescopio",
+        "info_dyn": "💡 La TRR calcula la fricción topológica del vacío para predecir la rotación sin Materia Oscura.",
+        "info_opt": "💡 La TRR aplica el Índice de Refracción Temporal para amplificar el desvío gravitacional.",
+        "info_red": "💡 La TRR itera la masa bariónica total para predecir el espacio-tiempo de la fuente.",
+        "info_str": "💡 La TRR mapea la cizalladura viscosa del vacío, revelando las coordenadas de ruptura.",
+        "pred_zs": "Redshift z_S Previsto", "loc_gap": "📌 Ruptura en coordenadas", "no_gap": "Sin ruptura crítica", "tol_zs": "Tolerancia en z_S", "no_sol": "Sin solución exacta en el intervalo; se muestra el z_S más cercano.",
+        "diag_title": "Diagnóstico de rendimiento", "diag_on": "Activar instrumentación", "diag_last": "Última auditoría", "diag_stages": "Etapas (sesión)",
+        "mc_title": "Incertidumbre (Monte Carlo)", "mc_n": "Muestras", "mc_seed": "Semilla", "mc_calc": "Propagar incertidumbre", "mc_int": "Intervalo 95%",
+        "cat_title": "📁 Catálogo (CSV / Parquet / FITS)", "cat_map": "Columna del catálogo para cada entrada del motor (detectada por nombre; — = ausente)", "cat_id": "Identificador", "job_partial": "Resultado parcial",
+        "job_file": "Archivo del catálogo (CSV / Parquet / FITS)", "job_pdf": "Generar informe PDF",
+        "job_curve": "Ajustar la curva completa (un M/L por galaxia)", "job_fit": "Curva ajustada",
+        "job_send": "Enviar tarea", "job_cancel": "Cancelar", "job_remove": "Eliminar", "job_result": "Resultado", "jobs": "Tareas",
+        "job_states": {"na_fila": "En cola", "executando": "En ejecución", "concluida": "Terminada", "erro": "Error", "cancelada": "Cancelada", "interrompida": "Interrumpida"},
+        "pdf_h1": "TEORIA DE LA RELATIVIDAD REFERENCIAL", "pdf_h2": "Reporte de Auditoria", "pdf_footer": "Generado por Motor Cosmologico TRR.",
+        "pdf_title_dyn": "AUDITORIA - DINAMICA", "pdf_title_opt": "AUDITORIA - OPTICA", "pdf_title_red": "AUDITORIA - REDSHIFT", "pdf_title_str": "AUDITORIA - CORRIENTES", "pdf_title_cat": "RESUMEN DEL CATALOGO",
+        "pdf_cat_stats": "Objetos auditados: {n}\nPrecision media: {media:.2f}% | mediana: {mediana:.2f}% | minima: {minimo:.2f}% | maxima: {maximo:.2f}%", "pdf_cat_obj": "Objeto",
+        "rep_dyn_text": "REPORTE TÉCNICO:\n1. Masa bariónica genera {vbar:.2f} km/s. 2. TRR (Beta=0.028006) eleva a {vtrr:.2f} km/s.\nRESULTADO: Precisión {prec:.2f}% sin Materia Oscura.",
+        "rep_opt_text": "REPORTE TÉCNICO:\nMasa visible desvía {tbar:.2f} arcsec. TRR aplica Refracción Temporal (eta_C = {etac:.5f}), logrando {tobs:.2f} arcsec. Precisión: {prec:.2f}%.",
+        "rep_red_text": "REPORTE PREDITIVO:\n1. TRR usó masa total como límite fluido. 2. Predice galaxia en z_S = {zs_pred:.4f}.\nRESULTADO: Convergencia pura.",
+        "rep_str_text": "REPORTE HIDRODINÁMICO:\nCizalladura Viscosa alcanzó límite de ruptura en {loc_str}."
+    }
+
+def _fr():
+    return {
+        "code": "FR", "welcome": "Sélectionnez votre langue",
+        "title": "🌌 Moteur Cosmologique TRR", "author_prefix": "Auteur", "theory_name": "Théorie de la Relativité Référentielle",
+        "tab1": "📊 Dynamique Galactique", "tab2": "👁️ Optique Cosmologique", "tab3": "🔭 Prédiction Redshift", "tab4": "☄️ Courants Stellaires",
+        "prov_title": "🗂️ Provenance des Données", 
+        "prov_info": "Pour garantir la reproductibilité, ce moteur traite les données brutes de:",
+        "prov_warn": "⚠️ Aucun paramètre ad-hoc de matière noire n'est injecté ici.",
+        "cat_list": "* SDSS DR16Q\n* SPARC (CWRU)\n* SLACS Survey\n* ESA Gaia\n* JWST/MAST\n* LIGO/Virgo",
+        "rad": "Rayon (kpc)", "vobs": "Vitesse Télescope", "vgas": "Vitesse Gaz", "vdisk": "Vitesse Disque", "vbulge": "Vitesse Bulbe",
+        "zl": "Redshift Lentille", "zs": "Redshift Source", "mest": "Masse Photométrique", "theta": "Anneau Einstein", "cluster": "Amas Géant?",
+        "r_peri": "Péricentre (kpc)", "r_apo": "Apocentro (kpc)",
+        "calc": "🚀 Lancer l'Audit TRR", "clear": "🧹 Tout Effacer",
+        "pdf_btn": "📄 Télécharger le Rapport (PDF)", "details": "📚 Voir le Rapport Technique",
+        "live": "⚡ Mode direct", "live_help": "Recalcule à chaque modification d'entrée, sans cliquer, et affiche la courbe.",
+        "curve_title": "📈 Courbe de rotation complète (M/L unique)", "curve_fit": "Ajuster la courbe",
+        "curve_info": "Collez ou saisissez les points de la courbe d'une galaxie : un seul M/L (bulbe = disque + 0.2) est ajusté sur tous les rayons.",
+        "precision": "Précision Empirique", "precision_red": "Convergence Mathématique", "g_bar": "Physique Classique", "g_trr": "Prédiction TRR", "g_obs": "Télescope",
+        "info_dyn": "💡 La TRR calcule le frottement topologique du vide sans matière noire.",
+        "info_opt": "💡 La TRR applique l'Indice de Réfraction Temporelle pour amplifier la déviation.",
+        "info_red": "💡 La TRR itère la masse baryonique totale pour prédire l'espace-temps de la source.",
+        "info_str": "💡 La TRR cartographie le cisaillement visqueux du vide.",
+        "pred_zs": "Redshift z_S Prédit", "loc_gap": "📌 Rupture aux coordonnées", "no_gap": "Aucune rupture critique", "tol_zs": "Tolérance sur z_S", "no_sol": "Aucune solution exacte dans l'intervalle ; z_S le plus proche affiché.",
+        "diag_title": "Diagnostic de performance", "diag_on": "Activer l'instrumentation", "diag_last": "Dernier audit", "diag_stages": "Étapes (session)",
+        "mc_title": "Incertitude (Monte Carlo)", "mc_n": "Échantillons", "mc_seed": "Graine", "mc_calc": "Propager l'incertitude", "mc_int": "Intervalle 95 %",
+        "cat_title": "📁 Catalogue (CSV / Parquet / FITS)", "cat_map": "Colonne du catalogue pour chaque entrée du moteur (détectée par le nom ; — = absente)", "cat_id": "Identifiant", "job_partial": "Résultat partiel",
+        "job_file": "Fichier du catalogue (CSV / Parquet / FITS)", "job_pdf": "Générer le rapport PDF",
+        "job_curve": "Ajuster la courbe complète (un M/L par galaxie)", "job_fit": "Courbe ajustée",
+        "job_send": "Soumettre la tâche", "job_cancel": "Annuler", "job_remove": "Supprimer", "job_result": "Résultat", "jobs": "Tâches",
+        "job_states": {"na_fila": "En attente", "executando": "En cours", "concluida": "Terminée", "erro": "Erreur", "cancelada": "Annulée", "interrompida": "Interrompue"},
+        "pdf_h1": "THEORIE DE LA RELATIVITE REFERENTIELLE", "pdf_h2": "Rapport d'Audit", "pdf_footer": "Genere par le Moteur TRR.",
+        "pdf_title_dyn": "AUDIT - DYNAMIQUE", "pdf_title_opt": "AUDIT - OPTIQUE", "pdf_title_red": "AUDIT - REDSHIFT", "pdf_title_str": "AUDIT - COURANTS", "pdf_title_cat": "RESUME DU CATALOGUE",
+        "pdf_cat_stats": "Objets audites: {n}\nPrecision moyenne: {media:.2f}% | mediane: {mediana:.2f}% | min: {minimo:.2f}% | max: {maximo:.2f}%", "pdf_cat_obj": "Objet",
+        "rep_dyn_text": "RAPPORT TECHNIQUE:\n1. Masse génère {vbar:.2f} km/s. 2. TRR (Beta=0.028006) élève à {vtrr:.2f} km/s.\nRESULTAT: Précision {prec:.2f}%.",
+        "rep_opt_text": "RAPPORT TECHNIQUE:\nDéviation visible {tbar:.2f}. TRR applique Réfraction (eta_C = {etac:.5f}), atteignant {tobs:.2f}. Précision: {prec:.2f}%.",
+        "rep_red_text": "RAPPORT PREDITIF:\nPrédiction galaxie à z_S = {zs_pred:.4f}.",
+        "rep_str_text": "RAPPORT:\nCisaillement visqueux a atteint la limite à {loc_str}."
+    }
+
+def _de():
+    return {
+        "code": "DE", "welcome": "Wählen Sie Ihre Sprache",
+        "title": "🌌 RRT Kosmologische Engine", "author_prefix": "Autor", "theory_name": "Referenzielle Relativitätstheorie",
+        "tab1": "📊 Galaktische Dynamik", "tab2": "👁️ Kosmologische Optik", "tab3": "🔭 Redshift-Vorhersage", "tab4": "☄️ Sternströme",
+        "prov_title": "🗂️ Datenherkunft", 
+        "prov_info": "Um die Reproduzierbarkeit zu gewährleisten, verarbeitet diese Engine Rohdaten von:",
+        "prov_warn": "⚠️ Hier werden keine Ad-hoc-Parameter für dunkle Materie injiziert.",
+        "cat_list": "* SDSS DR16Q\n* SPARC (CWRU)\n* SLACS Survey\n* ESA Gaia\n* JWST/MAST\n* LIGO/Virgo",
+        "rad": "Radius (kpc)", "vobs": "Teleskopgeschw.", "vgas": "Gasgeschw.", "vdisk": "Scheibengeschw.", "vbulge": "Bulge-Geschw.",
+        "zl": "Redshift Linse", "zs": "Redshift Quelle", "mest": "Photometrische Masse", "theta": "Einsteinring", "cluster": "Riesencluster?",
+        "r_peri": "Perizentrum (kpc)", "r_apo": "Apozentrum (kpc)",
+        "calc": "🚀 RRT-Audit starten", "clear": "🧹 Alles löschen",
+        "pdf_btn": "📄 Bericht herunterladen (PDF)", "details": "📚 Technischen Bericht anzeigen",
+        "live": "⚡ Live-Modus", "live_help": "Berechnet bei jeder Eingabeänderung ohne Klick neu und zeigt die Kurve.",
+        "curve_title": "📈 Gesamte Rotationskurve (ein M/L)", "curve_fit": "Kurve anpassen",
+        "curve_info": "Kurvenpunkte einer Galaxie einfügen oder eingeben: ein einziges M/L (Bulge = Scheibe + 0.2) wird über alle Radien angepasst.",
+        "precision": "Empirische Genauigkeit", "precision_red": "Mathematische Konvergenz", "g_bar": "Klassische Physik", "g_trr": "RRT Vorhersage", "g_obs": "Teleskop",
+        "info_dyn": "💡 RRT berechnet topologische Vakuumreibung ohne Dunkle Materie.",
+        "info_opt": "💡 RRT wendet den zeitlichen Brechungsindex an.",
+        "info_red": "💡 RRT verwendet die totale baryonische Masse, um z_S vorherzusagen.",
+        "info_str": "💡 RRT kartiert die viskose Scherung des Vakuums.",
+        "pred_zs": "Vorhergesagter z_S", "loc_gap": "📌 Bruchkoordinaten", "no_gap": "Kein kritischer Bruch", "tol_zs": "Toleranz für z_S", "no_sol": "Keine exakte Lösung im Bereich; nächstgelegenes z_S angezeigt.",
+        "diag_title": "Leistungsdiagnose", "diag_on": "Instrumentierung aktivieren", "diag_last": "Letzte Prüfung", "diag_stages": "Stufen (Sitzung)",
+        "mc_title": "Unsicherheit (Monte Carlo)", "mc_n": "Stichproben", "mc_seed": "Startwert", "mc_calc": "Unsicherheit propagieren", "mc_int": "95%-Intervall",
+        "cat_title": "📁 Katalog (CSV / Parquet / FITS)", "cat_map": "Katalogspalte für jede Eingabe der Engine (am Namen erkannt; — = fehlt)", "cat_id": "Kennung", "job_partial": "Teilergebnis",
+        "job_file": "Katalogdatei (CSV / Parquet / FITS)", "job_pdf": "PDF-Bericht erstellen",
+        "job_curve": "Gesamte Kurve anpassen (ein M/L pro Galaxie)", "job_fit": "Angepasste Kurve",
+        "job_send": "Job senden", "job_cancel": "Abbrechen", "job_remove": "Entfernen", "job_result": "Ergebnis", "jobs": "Jobs",
+        "job_states": {"na_fila": "Wartend", "executando": "Läuft", "concluida": "Fertig", "erro": "Fehler", "cancelada": "Abgebrochen", "interrompida": "Unterbrochen"},
+        "pdf_h1": "REFERENZIELLE RELATIVITÄTSTHEORIE", "pdf_h2": "Audit-Bericht", "pdf_footer": "Generiert von RRT Engine.",
+        "pdf_title_dyn": "AUDIT - DYNAMIK", "pdf_title_opt": "AUDIT - OPTIK", "pdf_title_red": "AUDIT - REDSHIFT", "pdf_title_str": "AUDIT - STROEME", "pdf_title_cat": "KATALOGUEBERSICHT",
+        "pdf_cat_stats": "Gepruefte Objekte: {n}\nMittlere Genauigkeit: {media:.2f}% | Median: {mediana:.2f}% | Min: {minimo:.2f}% | Max: {maximo:.2f}%", "pdf_cat_obj": "Objekt",
+        "rep_dyn_text": "TECHNISCHER BERICHT:\n1. Baryonische Masse: {vbar:.2f} km/s. 2. RRT-Vorhersage: {vtrr:.2f} km/s.\nERGEBNIS: Genauigkeit {prec:.2f}%.",
+        "rep_opt_text": "TECHNISCHER BERICHT:\nSichtbare Masse {tbar:.2f}. RRT erreicht {tobs:.2f}. Genauigkeit: {prec:.2f}%.",
+        "rep_red_text": "VORHERSAGE:\nGalaxie bei z_S = {zs_pred:.4f}.",
+        "rep_str_text": "BERICHT:\nViskose Scherung erreicht bei {loc_str}."
+    }
+
+def _it():
+    return {
+        "code": "IT", "welcome": "Seleziona la tua lingua",
+        "title": "🌌 Motore Cosmologico TRR", "author_prefix": "Autore", "theory_name": "Teoria della Relatività Referenziale",
+        "tab1": "📊 Dinamica Galattica", "tab2": "👁️ Ottica Cosmologica", "tab3": "🔭 Previsione Redshift", "tab4": "☄️ Correnti Stellari",
+        "prov_title": "🗂️ Provenienza dei Dati", 
+        "prov_info": "Per garantire la riproducibilità, questo motore elabora dati grezzi da:",
+        "prov_warn": "⚠️ Nessun parametro ad-hoc di materia oscura è iniettato qui.",
+        "cat_list": "* SDSS DR16Q\n* SPARC (CWRU)\n* SLACS Survey\n* ESA Gaia\n* JWST/MAST\n* LIGO/Virgo",
+        "rad": "Raggio (kpc)", "vobs": "Velocità Telescopio", "vgas": "Velocità Gas", "vdisk": "Veloc. Disco", "vbulge": "Veloc. Bulbo",
+        "zl": "Redshift Lente", "zs": "Redshift Sorgente", "mest": "Massa Fotometrica", "theta": "Anello Einstein", "cluster": "Ammasso Gigante?",
+        "r_peri": "Pericentro (kpc)", "r_apo": "Apocentro (kpc)",
+        "calc": "🚀 Avvia Audit TRR", "clear": "🧹 Cancella Tutto",
+        "pdf_btn": "📄 Scarica Report (PDF)", "details": "📚 Vedi Report Tecnico",
+        "live": "⚡ Modalità live", "live_help": "Ricalcola a ogni modifica dell'input, senza cliccare, e mostra la curva.",
+        "curve_title": "📈 Curva di rotazione completa (M/L unico)", "curve_fit": "Adatta curva",
+        "curve_info": "Incolla o digita i punti della curva di una galassia: un solo M/L (bulge = disco + 0.2) viene adattato a tutti i raggi.",
+        "precision": "Precisione Empirica", "precision_red": "Convergenza Matematica", "g_bar": "Fisica Classica", "g_trr": "Previsione TRR", "g_obs": "Telescopio",
+        "info_dyn": "💡 La TRR calcola l'attrito topologico del vuoto senza Materia Oscura.",
+        "info_opt": "💡 La TRR applica l'Indice di Rifrazione Temporale per amplificare la deviazione.",
+        "info_red": "💡 La TRR itera la massa barionica totale per prevedere lo spazio-tempo della sorgente.",
+        "info_str": "💡 La TRR mappa il taglio viscoso del vuoto.",
+        "pred_zs": "Redshift z_S Previsto", "loc_gap": "📌 Rottura alle coordinate", "no_gap": "Nessuna rottura critica", "tol_zs": "Tolleranza su z_S", "no_sol": "Nessuna soluzione esatta nell'intervallo; mostrato lo z_S più vicino.",
+        "diag_title": "Diagnostica delle prestazioni", "diag_on": "Attiva strumentazione", "diag_last": "Ultimo audit", "diag_stages": "Fasi (sessione)",
+        "mc_title": "Incertezza (Monte Carlo)", "mc_n": "Campioni", "mc_seed": "Seme", "mc_calc": "Propaga incertezza", "mc_int": "Intervallo 95%",
+        "cat_title": "📁 Catalogo (CSV / Parquet / FITS)", "cat_map": "Colonna del catalogo per ogni input del motore (rilevata dal nome; — = assente)", "cat_id": "Identificativo", "job_partial": "Risultato parziale",
+        "job_file": "File del catalogo (CSV / Parquet / FITS)", "job_pdf": "Genera report PDF",
+        "job_curve": "Adatta la curva completa (un M/L per galassia)", "job_fit": "Curva adattata",
+        "job_send": "Invia job", "job_cancel": "Annulla", "job_remove": "Rimuovi", "job_result": "Risultato", "jobs": "Job",
+        "job_states": {"na_fila": "In coda", "executando": "In esecuzione", "concluida": "Completato", "erro": "Errore", "cancelada": "Annullato", "interrompida": "Interrotto"},
+        "pdf_h1": "TEORIA DELLA RELATIVITA REFERENZIALE", "pdf_h2": "Report di Audit", "pdf_footer": "Generato dal Motore TRR.",
+        "pdf_title_dyn": "AUDIT - DINAMICA", "pdf_title_opt": "AUDIT - OTTICA", "pdf_title_red": "AUDIT - REDSHIFT", "pdf_title_str": "AUDIT - CORRENTI", "pdf_title_cat": "RIEPILOGO DEL CATALOGO",
+        "pdf_cat_stats": "Oggetti verificati: {n}\nPrecisione media: {media:.2f}% | mediana: {mediana:.2f}% | minima: {minimo:.2f}% | massima: {maximo:.2f}%", "pdf_cat_obj": "Oggetto",
+        "rep_dyn_text": "REPORT TECNICO:\n1. Massa genera {vbar:.2f} km/s. 2. TRR eleva a {vtrr:.2f} km/s.\nRISULTATO: Precisione {prec:.2f}%.",
+        "rep_opt_text": "REPORT TECNICO:\nDeviazione visibile {tbar:.2f}. TRR raggiunge {tobs:.2f}. Precisione: {prec:.2f}%.",
+        "rep_red_text": "REPORT PREDITTIVO:\nGalassia prevista a z_S = {zs_pred:.4f}.",
+        "rep_str_text": "REPORT:\nTaglio viscoso raggiunto a {loc_str}."
+    }
+
+def _ja():
+    return {
+        "code": "JA", "welcome": "言語を選択してください",
+        "title": "🌌 RRT 宇宙エンジン", "author_prefix": "著者", "theory_name": "参照相対性理論",
+        "tab1": "📊 銀河動力学", "tab2": "👁️ 宇宙光学", "tab3": "🔭 赤方偏移予測", "tab4": "☄️ 恒星ストリーム",
+        "prov_title": "🗂️ データソース", 
+        "prov_info": "再現性を確保するため、このエンジンは以下の生データを処理します:",
+        "prov_warn": "⚠️ 暗黒物質の場当たり的なパラメータはここに注入されていません。",
+        "cat_list": "* SDSS DR16Q\n* SPARC (CWRU)\n* SLACS Survey\n* ESA Gaia\n* JWST/MAST\n* LIGO/Virgo",
+        "rad": "半径 (kpc)", "vobs": "望遠鏡速度", "vgas": "ガス速度", "vdisk": "ディスク速度", "vbulge": "バルジ速度",
+        "zl": "レンズ赤方偏移", "zs": "ソース赤方偏移", "mest": "測光質量", "theta": "アインシュタイン環", "cluster": "巨大クラスター？",
+        "r_peri": "近点 (kpc)", "r_apo": "遠点 (kpc)",
+        "calc": "🚀 RRT 監査を開始", "clear": "🧹 全てクリア",
+        "pdf_btn": "📄 レポートをダウンロード (PDF)", "details": "📚 技術レポートを見る",
+        "live": "⚡ ライブモード", "live_help": "入力を変更するたびにクリックなしで再計算し、曲線を表示します。",
+        "curve_title": "📈 回転曲線全体（単一 M/L）", "curve_fit": "曲線をフィット",
+        "curve_info": "1つの銀河の曲線データを貼り付けまたは入力してください。全半径に対して単一の M/L（バルジ = ディスク + 0.2）をフィットします。",
+        "precision": "経験的精度", "precision_red": "数学的収束", "g_bar": "古典物理学", "g_trr": "RRT 予測", "g_obs": "望遠鏡",
+        "info_dyn": "💡 RRTは暗黒物質なしで真空の位相的摩擦を計算します。",
+        "info_opt": "💡 RRTは時間的屈折率を適用します。",
+        "info_red": "💡 RRTは総バリオン質量を使用してz_Sを予測します。",
+        "info_str": "💡 RRTは真空の粘性せん断をマッピングします。",
+        "pred_zs": "予測 z_S", "loc_gap": "📌 破壊座標", "no_gap": "臨界破壊なし", "tol_zs": "z_S 許容誤差", "no_sol": "範囲内に厳密解なし。最も近い z_S を表示します。",
+        "diag_title": "性能診断", "diag_on": "計測を有効化", "diag_last": "直近の監査", "diag_stages": "ステージ (セッション)",
+        "mc_title": "不確かさ (モンテカルロ)", "mc_n": "サンプル数", "mc_seed": "シード", "mc_calc": "不確かさを伝播", "mc_int": "95% 区間",
+        "cat_title": "📁 カタログ (CSV / Parquet / FITS)", "cat_map": "エンジンの各入力に対応するカタログ列（名前で自動検出、— = なし）", "cat_id": "識別子", "job_partial": "途中結果",
+        "job_file": "カタログファイル (CSV / Parquet / FITS)", "job_pdf": "PDF レポートを作成",
+        "job_curve": "曲線全体をフィット（銀河ごとに1つの M/L）", "job_fit": "フィット曲線",
+        "job_send": "ジョブを送信", "job_cancel": "キャンセル", "job_remove": "削除", "job_result": "結果", "jobs": "ジョブ",
+        "job_states": {"na_fila": "待機中", "executando": "実行中", "concluida": "完了", "erro": "エラー", "cancelada": "キャンセル済み", "interrompida": "中断"},
+        "pdf_h1": "参照相対性理論 (RRT)", "pdf_h2": "自動監査レポート", "pdf_footer": "RRT 宇宙論エンジンにより生成された文書。",
+        "pdf_title_dyn": "科学監査 - 力学", "pdf_title_opt": "科学監査 - 光学", "pdf_title_red": "科学監査 - 赤方偏移", "pdf_title_str": "科学監査 - 恒星ストリーム", "pdf_title_cat": "カタログ概要",
+        "pdf_cat_stats": "監査対象: {n}\n平均精度: {media:.2f}% | 中央値: {mediana:.2f}% | 最小: {minimo:.2f}% | 最大: {maximo:.2f}%", "pdf_cat_obj": "天体",
+        "rep_dyn_text": "技術レポート:\n1. バリオン質量は {vbar:.2f} km/s を生成します。\n2. RRTの位相的摩擦 (Beta=0.028006) により {vtrr:.2f} km/s に上昇。\n結果: 暗黒物質なしで精度 {prec:.2f}%。",
+        "rep_opt_text": "技術レポート:\n可視質量の偏向 {tbar:.2f} arcsec。RRTは時間的屈折 (eta_C = {etac:.5f}) を適用し、{tobs:.2f} arcsecに到達。精度: {prec:.2f}%。",
+        "rep_red_text": "予測レポート:\n1. RRTは総質量を流体限界としてロックしました。\n2. ソース銀河を z_S = {zs_pred:.4f} と予測。\n結果: 純粋なアルゴリズムの収束。",
+        "rep_str_text": "流体力学レポート:\n粘性せん断が {loc_str} で臨界破壊限界に達しました。"
+    }
+
+def _zh():
+    return {
+        "code": "ZH", "welcome": "请选择语言",
+        "title": "🌌 RRT 宇宙引擎", "author_prefix": "作者", "theory_name": "参照相对论",
+        "tab1": "📊 星系动力学", "tab2": "👁️ 宇宙光学", "tab3": "🔭 红移预测", "tab4": "☄️ 恒星流",
+        "prov_title": "🗂️ 数据来源", 
+        "prov_info": "为确保独立可重复性，本引擎处理以下原始数据：",
+        "prov_warn": "⚠️ 本引擎未注入任何暗物质参数。",
+        "cat_list": "* SDSS DR16Q\n* SPARC (CWRU)\n* SLACS Survey\n* ESA Gaia\n* JWST/MAST\n* LIGO/Virgo",
+        "rad": "观测半径 (kpc)", "vobs": "望远镜速度 (km/s)", "vgas": "气体速度", "vdisk": "星盘速度", "vbulge": "核球速度",
+        "zl": "透镜红移 (z_L)", "zs": "光源红移 (z_S)", "mest": "光度质量 (10^11)", "theta": "爱因斯坦环 (arcsec)", "cluster": "巨型星系团？",
+        "r_peri": "流近星点 (kpc)", "r_apo": "流远星点 (kpc)",
+        "calc": "🚀 运行 RRT 审计", "clear": "🧹 清除所有",
+        "pdf_btn": "📄 下载审计报告 (PDF)", "details": "📚 查看技术意见",
+        "live": "⚡ 实时模式", "live_help": "每次修改输入时无需点击即重新计算，并显示曲线。",
+        "curve_title": "📈 完整旋转曲线（单一 M/L）", "curve_fit": "拟合曲线",
+        "curve_info": "粘贴或输入一个星系的曲线数据点：在所有半径上拟合单一 M/L（核球 = 盘 + 0.2）。",
+        "precision": "经验精度", "precision_red": "数学收敛", "g_bar": "经典物理", "g_trr": "RRT 预测", "g_obs": "望远镜",
+        "info_dyn": "💡 RRT 计算真空拓扑摩擦，无需暗物质即可预测旋转速度。",
+        "info_opt": "💡 RRT 应用时间折射率 (eta_C) 放大引力偏转。",
+        "info_red": "💡 RRT 使用绝对总质量迭代引力矩阵来预测光源 (z_S)。",
+        "info_str": "💡 RRT 映射真空粘性剪切，揭示结构断裂的真实坐标。",
+        "pred_zs": "预测红移 z_S", "loc_gap": "📌 断裂坐标", "no_gap": "无关键断裂", "tol_zs": "z_S 容差", "no_sol": "区间内无精确解；显示最接近的 z_S。",
+        "diag_title": "性能诊断", "diag_on": "启用检测", "diag_last": "最近一次审计", "diag_stages": "阶段 (会话)",
+        "mc_title": "不确定度 (蒙特卡洛)", "mc_n": "样本数", "mc_seed": "随机种子", "mc_calc": "传播不确定度", "mc_int": "95% 区间",
+        "cat_title": "📁 星表 (CSV / Parquet / FITS)", "cat_map": "引擎每个输入对应的星表列（按名称自动识别；— = 缺失）", "cat_id": "标识符", "job_partial": "部分结果",
+        "job_file": "星表文件 (CSV / Parquet / FITS)", "job_pdf": "生成 PDF 报告",
+        "job_curve": "拟合完整曲线（每个星系一个 M/L）", "job_fit": "拟合曲线",
+        "job_send": "提交任务", "job_cancel": "取消", "job_remove": "删除", "job_result": "结果", "jobs": "任务",
+        "job_states": {"na_fila": "排队中", "executando": "运行中", "concluida": "已完成", "erro": "错误", "cancelada": "已取消", "interrompida": "已中断"},
+        "pdf_h1": "参照相对论 (RRT)", "pdf_h2": "自动审计报告", "pdf_footer": "由 RRT 宇宙学引擎生成的文档。",
+        "pdf_title_dyn": "科学审计 - 动力学", "pdf_title_opt": "科学审计 - 光学", "pdf_title_red": "科学审计 - 红移", "pdf_title_str": "科学审计 - 星流", "pdf_title_cat": "星表摘要",
+        "pdf_cat_stats": "已审计天体: {n}\n平均精度: {media:.2f}% | 中位数: {mediana:.2f}% | 最小: {minimo:.2f}% | 最大: {maximo:.2f}%", "pdf_cat_obj": "天体",
+        "rep_dyn_text": "技术报告：\n1. 纯重子质量产生 {vbar:.2f} km/s。\n2. RRT 拓扑摩擦 (Beta=0.028006) 提升至 {vtrr:.2f} km/s。\n结果：无需暗物质，精度达 {prec:.2f}%。",
+        "rep_opt_text": "技术报告：\n可见质量偏转 {tbar:.2f} arcsec。RRT 应用时间折射 (eta_C = {etac:.5f})，达到 {tobs:.2f} arcsec。精度：{prec:.2f}%。",
+        "rep_red_text": "预测报告：\n1. RRT 锁定总质量为流体极限。\n2. 预测光源星系在 z_S = {zs_pred:.4f}。\n结果：纯算法收敛。",
+        "rep_str_text": "流体力学报告：\n粘性剪切在 {loc_str} 达到临界断裂极限。"
+    }
+
+def _ru():
+    return {
+        "code": "RU", "welcome": "Выберите язык",
+        "title": "🌌 Двигатель ТРО", "author_prefix": "Автор", "theory_name": "Теория Референциальной Относительности",
+        "tab1": "📊 Динамика", "tab2": "👁️ Оптика", "tab3": "🔭 Прогноз Redshift", "tab4": "☄️ Потоки",
+        "prov_title": "🗂️ Источники данных", 
+        "prov_info": "Для обеспечения воспроизводимости этот двигатель обрабатывает данные из:",
+        "prov_warn": "⚠️ В этот двигатель не вводятся параметры темной материи.",
+        "cat_list": "* SDSS DR16Q\n* SPARC (CWRU)\n* SLACS Survey\n* ESA Gaia\n* JWST/MAST\n* LIGO/Virgo",
+        "rad": "Радиус (кпк)", "vobs": "Скор. телескопа", "vgas": "Скор. газа", "vdisk": "Скор. диска", "vbulge": "Скор. бара",
+        "zl": "Redshift линзы", "zs": "Redshift ист.", "mest": "Полная массa (10^11)", "theta": "Кольцо (arcsec)", "cluster": "Скопление?",
+        "r_peri": "Перицентр (кпк)", "r_apo": "Апоцентр (кпк)",
+        "calc": "🚀 Начать аудит ТРО", "clear": "🧹 Очистить",
+        "pdf_btn": "📄 Скачать отчет (PDF)", "details": "📚 Технический отчет",
+        "live": "⚡ Живой режим", "live_help": "Пересчитывает при каждом изменении ввода без нажатия и показывает кривую.",
+        "curve_title": "📈 Полная кривая вращения (единое M/L)", "curve_fit": "Подогнать кривую",
+        "curve_info": "Вставьте или введите точки кривой одной галактики: единое M/L (балдж = диск + 0.2) подбирается по всем радиусам.",
+        "precision": "Точность", "precision_red": "Сходимость", "g_bar": "Классика", "g_trr": "Прогноз ТРО", "g_obs": "Телескоп",
+        "info_dyn": "💡 ТРО рассчитывает топологическое трение вакуума без темной материи.",
+        "info_opt": "💡 ТРО применяет индекс временного преломления для усиления отклонения.",
+        "info_red": "💡 ТРО использует полную массу для прогнозирования z_S источника.",
+        "info_str": "💡 ТРО отображает вязкий сдвиг вакуума, выявляя координаты разрыва.",
+        "pred_zs": "Прогноз z_S", "loc_gap": "📌 Координаты разрыва", "no_gap": "Нет разрыва", "tol_zs": "Допуск z_S", "no_sol": "Нет точного решения в диапазоне; показан ближайший z_S.",
+        "diag_title": "Диагностика производительности", "diag_on": "Включить инструментирование", "diag_last": "Последний аудит", "diag_stages": "Этапы (сессия)",
+        "mc_title": "Неопределённость (Монте-Карло)", "mc_n": "Выборки", "mc_seed": "Зерно", "mc_calc": "Распространить неопределённость", "mc_int": "95% интервал",
+        "cat_title": "📁 Каталог (CSV / Parquet / FITS)", "cat_map": "Столбец каталога для каждого входа движка (определяется по имени; — = нет)", "cat_id": "Идентификатор", "job_partial": "Частичный результат",
+        "job_file": "Файл каталога (CSV / Parquet / FITS)", "job_pdf": "Создать PDF-отчёт",
+        "job_curve": "Подогнать всю кривую (одно M/L на галактику)", "job_fit": "Подогнанная кривая",
+        "job_send": "Отправить задачу", "job_cancel": "Отменить", "job_remove": "Удалить", "job_result": "Результат", "jobs": "Задачи",
+        "job_states": {"na_fila": "В очереди", "executando": "Выполняется", "concluida": "Готово", "erro": "Ошибка", "cancelada": "Отменена", "interrompida": "Прервана"},
+        "pdf_h1": "ТЕОРИЯ РЕФЕРЕНЦИАЛЬНОЙ ОТНОСИТЕЛЬНОСТИ (ТРО)", "pdf_h2": "Автоматический отчет аудита", "pdf_footer": "Документ создан космологическим движком ТРО.",
+        "pdf_title_dyn": "НАУЧНЫЙ АУДИТ - ДИНАМИКА", "pdf_title_opt": "НАУЧНЫЙ АУДИТ - ОПТИКА", "pdf_title_red": "НАУЧНЫЙ АУДИТ - КРАСНОЕ СМЕЩЕНИЕ", "pdf_title_str": "НАУЧНЫЙ АУДИТ - ЗВЕЗДНЫЕ ПОТОКИ", "pdf_title_cat": "СВОДКА КАТАЛОГА",
+        "pdf_cat_stats": "Проверено объектов: {n}\nСредняя точность: {media:.2f}% | медиана: {mediana:.2f}% | мин: {minimo:.2f}% | макс: {maximo:.2f}%", "pdf_cat_obj": "Объект",
+        "rep_dyn_text": "ТЕХНИЧЕСКИЙ ОТЧЕТ:\n1. Барионная масса дает {vbar:.2f} км/с.\n2. ТРО (Beta=0.028006) повышает до {vtrr:.2f} км/с.\nРЕЗУЛЬТАТ: Точность {prec:.2f}% без темной материи.",
+        "rep_opt_text": "ТЕХНИЧЕСКИЙ ОТЧЕТ:\nВидимая масса отклоняет на {tbar:.2f} arcsec. ТРО применяет временное преломление (eta_C = {etac:.5f}), достигая {tobs:.2f} arcsec. Точность: {prec:.2f}%.",
+        "rep_red_text": "ПРОГНОЗ:\n1. ТРО использует полную массу как предел.\n2. Прогноз галактики на z_S = {zs_pred:.4f}.\nРЕЗУЛЬТАТ: Чистая сходимость.",
+        "rep_str_text": "ГИДРОДИНАМИЧЕСКИЙ ОТЧЕТ:\nВязкий сдвиг достиг предела разрыва в {loc_str}."
+    }
+
+class _Idiomas(Mapping):
+    # LANG[código] monta a tabela do idioma no primeiro acesso e a guarda; cada sessão do
+    # app e cada worker de PDF só paga pelos idiomas que usa
+    def __init__(self, tabelas):
+        self._tabelas = tabelas
+        self._prontas = {}
+        self._trava = threading.Lock()
+
+    def __getitem__(self, codigo):
+        tabela = self._prontas.get(codigo)
+        if tabela is None:
+            montar = self._tabelas[codigo]
+            with self._trava:
+                tabela = self._prontas.setdefault(codigo, montar())
+        return tabela
+
+    def __contains__(self, codigo):
+        return codigo in self._tabelas
+
+    def __iter__(self):
+        return iter(self._tabelas)
+
+    def __len__(self):
+        return len(self._tabelas)
+
+LANG = _Idiomas({"PT": _pt, "EN": _en, "ES": _es, "FR": _fr, "DE": _de, "IT": _it, "JA": _ja, "ZH": _zh, "RU": _ru})
@@ -0,0 +1,58 @@
+import numpy as np
+
+from .dinamica import auditar_dinamica
+from .optica import auditar_optica_lote
+from .redshift import prever_redshift_lote
+
+# ==========================================
+# PROPAGAÇÃO DE INCERTEZAS (MONTE CARLO)
+# ==========================================
+# Cada entrada recebe um sigma (gaussiano; 0 = exata). As N amostras passam pelos
+# motores vetorizados em blocos de AMOSTRAS_POR_BLOCO, de modo que a memória de trabalho
+# não cresce com N: só as saídas de interesse (um float por amostra) são guardadas.
+# Cada entrada tem seu próprio gerador derivado da semente, então o resultado é o mesmo
+# para qualquer tamanho de bloco. Amostras fora do domínio (ex.: raio <= 0) são descartadas.
+AMOSTRAS_MC = 10_000
+MAX_AMOSTRAS_INTERATIVO = 100_000   # interface: roda na thread da sessão (dyn ~2-3 s); mais que isso, pela CLI
+AMOSTRAS_POR_BLOCO = 65_536
+PERCENTIS = (2.5, 16.0, 50.0, 84.0, 97.5)
+
+# módulo -> (entradas na ordem do motor, saídas resumidas, motor)
+MODELOS_MC = {
+    "dyn": (("rad", "vobs", "vgas", "vdisk", "vbulge"), ("vtrr", "vbar", "ml", "prec"),
+            lambda e: auditar_dinamica(e["rad"], e["vobs"], e["vgas"], e["vdisk"], e["vbulge"])),
+    "opt": (("zl", "zs", "mest", "theta"), ("ttrr", "tbar", "prec"),
+            lambda e: auditar_optica_lote(e["zl"], e["zs"], e["mest"], e["theta"])),
+    "red": (("zl", "mest", "theta"), ("zs_pred", "prec"),
+            lambda e: prever_redshift_lote(e["zl"], e["mest"], e["theta"])),
+}
+
+def _resumir(valores, percentis):
+    valores = valores[np.isfinite(valores)]
+    if not valores.size:
+        return {"media": np.nan, "desvio": np.nan, **{f"p{p:g}": np.nan for p in percentis}}
+    return {"media": float(valores.mean()), "desvio": float(valores.std(ddof=1)) if valores.size > 1 else 0.0,
+            **{f"p{p:g}": float(q) for p, q in zip(percentis, np.percentile(valores, percentis))}}
+
+def propagar_incerteza(modulo, valores, sigmas, n=AMOSTRAS_MC, semente=0, bloco=AMOSTRAS_POR_BLOCO, percentis=PERCENTIS):
+    # valores/sigmas: dicts pelas entradas do módulo (sigmas ausentes valem 0).
+    # Devolve n, n_validas e, por saída, média, desvio e percentis (chaves "p2.5", "p50", ...).
+    if modulo not in MODELOS_MC:
+        raise ValueError(f"Módulo sem modo de incerteza: {modulo}")
+    entradas, saidas, motor = MODELOS_MC[modulo]
+    n = int(n)
+    if n < 1:
+        raise ValueError("É necessária pelo menos uma amostra")
+    if any(sigmas.get(k, 0.0) < 0 for k in entradas):
+        raise ValueError("Os sigmas devem ser >= 0")
+    geradores = [np.random.default_rng(g) for g in np.random.SeedSequence(semente).spawn(len(entradas))]
+    amostras = {k: np.empty(n) for k in saidas}
+    for ini in range(0, n, bloco):
+        m = min(bloco, n - ini)
+        lote = {k: g.normal(valores[k], sigmas.get(k, 0.0), m) for k, g in zip(entradas, geradores)}
+        res = motor(lote)
+        for k in saidas:
+            amostras[k][ini:ini + m] = res[k]
+    res = {"modulo": modulo, "n": n, "n_validas": int(np.isfinite(amostras[saidas[0]]).sum()), "semente": semente}
+    res.update({k: _resumir(v, percentis) for k, v in amostras.items()})
+    return res
@@ -0,0 +1,218 @@
+import argparse
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from .catalogos import (COLUNAS_CORRENTES, COLUNAS_DINAMICA, COLUNAS_OPTICA, COLUNAS_REDSHIFT, LINHAS_POR_BLOCO, OPCIONAIS_DINAMICA,
+                        EscritorTabela, ler_tabela, ler_tabela_em_blocos, mapear_colunas, salvar_tabela)
+from .correntes import AMOSTRAS_PERFIL, auditar_correntes_lote
+from .dinamica import ajustar_curvas, auditar_dinamica
+from .optica import auditar_optica_lote
+from .redshift import prever_redshift_lote
+
+# ==========================================
+# AUDITORIA EM LOTE (SEM INTERFACE)
+# ==========================================
+# `colunas`: mapeamento {campo do motor: coluna} escolhido pelo usuário (ver mapear_colunas)
+def auditar_pontos_dinamica(df, colunas=None):
+    # Cada ponto da curva é auditado isoladamente: serve para catálogos lidos em blocos
+    import pandas as pd
+    col = mapear_colunas(df, COLUNAS_DINAMICA, OPCIONAIS_DINAMICA, colunas)
+    res = auditar_dinamica(col["rad"], col["vobs"], col["vgas"], col["vdisk"], col["vbulge"])
+    return pd.DataFrame({"galaxia": col["galaxia"], "rad": col["rad"], **res})
+
+def resumir_dinamica(pontos):
+    # Pontos auditados isoladamente: ml_mediano é a mediana dos M/L de cada raio, não um
+    # M/L ajustado à galáxia (para isso, ajustar_catalogo_dinamica)
+    return pontos.groupby("galaxia", sort=False).agg(
+        n_pontos=("rad", "size"),
+        ml_mediano=("ml", "median"),
+        vbar_medio=("vbar", "mean"),
+        vtrr_medio=("vtrr", "mean"),
+        vobs_medio=("vobs", "mean"),
+        prec_media=("prec", "mean"),
+        prec_min=("prec", "min"),
+    ).reset_index()
+
+def auditar_catalogo_dinamica(df, colunas=None):
+    pontos = auditar_pontos_dinamica(df, colunas)
+    return pontos, resumir_dinamica(pontos)
+
+def ajustar_catalogo_dinamica(df, colunas=None):
+    # Curva inteira: um M/L por galáxia (ver ajustar_curvas). Os pontos trazem a curva TRR
+    # ajustada em todos os raios; o resumo tem as mesmas médias de resumir_dinamica.
+    import pandas as pd
+    col = mapear_colunas(df, COLUNAS_DINAMICA, OPCIONAIS_DINAMICA, colunas)
+    codigos, nomes = pd.factorize(col["galaxia"], use_na_sentinel=False)
+    galaxias, res = ajustar_curvas(codigos, col["rad"], col["vobs"], col["vgas"], col["vdisk"], col["vbulge"])
+    pontos = pd.DataFrame({"galaxia": col["galaxia"], "rad": col["rad"], **res})
+    resumo = pontos.groupby(codigos, sort=False).agg(
+        vbar_medio=("vbar", "mean"),
+        vtrr_medio=("vtrr", "mean"),
+        vobs_medio=("vobs", "mean"),
+        prec_min=("prec", "min"),
+    ).sort_index()
+    resumo.insert(0, "galaxia", nomes)
+    resumo.insert(1, "n_pontos", galaxias["n_pontos"])
+    resumo.insert(2, "ml", galaxias["ml"])
+    resumo.insert(6, "prec_media", galaxias["prec"])
+    return pontos, resumo.reset_index(drop=True)
+
+def auditar_bloco_optica(df, colunas=None):
+    # Colunas originais do catálogo + previsão TRR (ttrr, prec, tbar, tobs, etac)
+    col = mapear_colunas(df, COLUNAS_OPTICA, escolhidas=colunas)
+    res = auditar_optica_lote(col["zl"], col["zs"], col["mest"], col["theta"])
+    return df.reset_index(drop=True).assign(**res)
+
+def auditar_bloco_redshift(df, colunas=None):
+    # Colunas originais + z da fonte previsto (zs_pred, prec, tobs, has_solution, z_turnover)
+    col = mapear_colunas(df, COLUNAS_REDSHIFT, escolhidas=colunas)
+    res = prever_redshift_lote(col["zl"], col["mest"], col["theta"])
+    return df.reset_index(drop=True).assign(**res)
+
+def processar_em_blocos(blocos, funcao, escritor, processos=1):
+    # Aplica `funcao` a cada bloco e escreve na ordem de entrada. Com processos > 1 os
+    # blocos são distribuídos num pool, com no máximo 2 blocos por processo em voo
+    # para que a memória não cresça com o tamanho do catálogo.
+    if processos <= 1:
+        for bloco in blocos:
+            escritor.escrever(funcao(bloco))
+        return escritor.linhas
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        em_voo = deque()
+        for bloco in blocos:
+            em_voo.append(pool.submit(funcao, bloco))
+            if len(em_voo) >= 2 * processos:
+                escritor.escrever(em_voo.popleft().result())
+        while em_voo:
+            escritor.escrever(em_voo.popleft().result())
+    return escritor.linhas
+
+class _EscritorComRelatorio:
+    # Repassa cada bloco ao escritor da tabela e, lente a lente, ao relatório de catálogo
+    def __init__(self, escritor, relatorio, coluna_nome=None):
+        self.escritor = escritor
+        self.relatorio = relatorio
+        self.coluna_nome = coluna_nome
+
+    @property
+    def linhas(self):
+        return self.escritor.linhas
+
+    def escrever(self, df):
+        inicio = self.escritor.linhas
+        self.escritor.escrever(df)
+        nomes = df[self.coluna_nome] if self.coluna_nome in df else range(inicio, inicio + len(df))
+        for nome, dados in zip(nomes, df[["tbar", "ttrr", "tobs", "etac", "prec"]].to_dict("records")):
+            self.relatorio.adicionar(nome, dados)
+
+def auditar_catalogo_correntes(df, amostras=AMOSTRAS_PERFIL, colunas=None):
+    import pandas as pd
+    col = mapear_colunas(df, COLUNAS_CORRENTES, escolhidas=colunas)
+    res = auditar_correntes_lote(col["r_peri"], col["r_apo"], col["mest"], amostras)
+    gaps = res.pop("gaps")
+    correntes = pd.DataFrame({"nome": col["nome"], "r_peri": col["r_peri"], "r_apo": col["r_apo"], "mest": col["mest"], **res})
+    intervalos = pd.DataFrame({"nome": col["nome"][gaps["corrente"]], "inicio": gaps["inicio"], "fim": gaps["fim"]})
+    return correntes, intervalos
+
+def objetos_dinamica(resumo):
+    # Uma página por galáxia, com as médias da curva de rotação
+    # (resumo por pontos isolados: M/L mediano; ajuste da curva inteira: o M/L único)
+    for linha in resumo.itertuples(index=False):
+        yield linha.galaxia, {"ml": linha.ml if hasattr(linha, "ml") else linha.ml_mediano, "vbar": linha.vbar_medio, "vtrr": linha.vtrr_medio,
+                              "vobs": linha.vobs_medio, "prec": linha.prec_media}
+
+def auditar_catalogo_optica(entrada, saida, processos=1, linhas=LINHAS_POR_BLOCO, relatorio=None, coluna_nome=None, colunas=None):
+    with EscritorTabela(saida) as escritor:
+        if relatorio is not None:
+            escritor = _EscritorComRelatorio(escritor, relatorio, coluna_nome)
+        return processar_em_blocos(ler_tabela_em_blocos(entrada, linhas), partial(auditar_bloco_optica, colunas=colunas), escritor, processos)
+
+def auditar_catalogo_redshift(entrada, saida, processos=1, linhas=LINHAS_POR_BLOCO, colunas=None):
+    with EscritorTabela(saida) as escritor:
+        return processar_em_blocos(ler_tabela_em_blocos(entrada, linhas), partial(auditar_bloco_redshift, colunas=colunas), escritor, processos)
+
+def _relatorio(args, modulo, colunas=None):
+    from .idiomas import LANG
+    from .relatorio import RelatorioCatalogo
+    return RelatorioCatalogo(args.relatorio, modulo, LANG[args.idioma], processos=args.processos,
+                             paginas_objetos=not args.sem_paginas, colunas=colunas)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m trr.lote", description="Auditoria TRR em lote de catálogos.")
+    sub = parser.add_subparsers(dest="modulo", required=True)
+    p_dyn = sub.add_parser("dinamica", help="Curvas de rotação estilo SPARC (galaxy, radius, Vobs, Vgas, Vdisk, Vbulge)")
+    p_dyn.add_argument("catalogo", help="Tabela de entrada (.csv / .parquet / .fits)")
+    p_dyn.add_argument("-o", "--saida", required=True,
+                       help="Resultado por galáxia (.csv / .parquet): mediana dos M/L ponto a ponto (ml_mediano) ou, com --curva, o M/L ajustado (ml)")
+    p_dyn.add_argument("--pontos", help="Resultado ponto a ponto (.csv / .parquet)")
+    p_dyn.add_argument("--curva", action="store_true", help="Um M/L por galáxia ajustado à curva inteira (em vez de um por ponto)")
+
+    p_opt = sub.add_parser("optica", help="Lentes fortes estilo SLACS (zl, zs, mest, theta)")
+    p_opt.add_argument("catalogo", help="Tabela de entrada (.csv / .parquet / .fits)")
+    p_opt.add_argument("-o", "--saida", required=True, help="Resultado por lente (.csv / .parquet), escrito bloco a bloco")
+    p_opt.add_argument("-j", "--processos", type=int, default=os.cpu_count() or 1, help="Processos no pool (1 = sem pool)")
+    p_opt.add_argument("--bloco", type=int, default=LINHAS_POR_BLOCO, help="Lentes por bloco")
+    p_opt.add_argument("--nome", help="Coluna com o identificador da lente (relatório)")
+
+    p_red = sub.add_parser("redshift", help="Redshift da fonte previsto para lentes (zl, mest, theta)")
+    p_red.add_argument("catalogo", help="Tabela de entrada (.csv / .parquet / .fits)")
+    p_red.add_argument("-o", "--saida", required=True, help="Resultado por lente (.csv / .parquet), escrito bloco a bloco")
+    p_red.add_argument("-j", "--processos", type=int, default=os.cpu_count() or 1, help="Processos no pool (1 = sem pool)")
+    p_red.add_argument("--bloco", type=int, default=LINHAS_POR_BLOCO, help="Lentes por bloco")
+
+    p_str = sub.add_parser("correntes", help="Correntes estelares estilo Gaia (name, r_peri, r_apo, mest)")
+    p_str.add_argument("catalogo", help="Tabela de entrada (.csv / .parquet / .fits)")
+    p_str.add_argument("-o", "--saida", required=True, help="Resultado por corrente (.csv / .parquet)")
+    p_str.add_argument("--intervalos", help="Todos os intervalos de ruptura (.csv / .parquet)")
+    p_str.add_argument("--amostras", type=int, default=AMOSTRAS_PERFIL, help="Resolução dos perfis")
+    p_dyn.add_argument("-j", "--processos", type=int, default=1, help="Processos para montar o relatório PDF")
+    for p in (p_dyn, p_opt, p_red, p_str):
+        p.add_argument("--coluna", action="append", default=[], metavar="CAMPO=COLUNA",
+                       help="Coluna do catálogo para um campo do motor (repetível; os demais são detectados pelo nome)")
+    for p in (p_dyn, p_opt):
+        p.add_argument("--relatorio", help="Relatório PDF consolidado (resumo, histograma e uma página por objeto)")
+        p.add_argument("--idioma", default="EN", choices=("PT", "EN", "ES", "FR", "DE", "IT", "JA", "ZH", "RU"))
+        p.add_argument("--sem-paginas", action="store_true", help="Relatório só com o resumo, sem páginas por objeto")
+    args = parser.parse_args(argv)
+    colunas = dict(c.split("=", 1) for c in args.coluna if "=" in c)
+
+    if args.modulo == "optica":
+        if args.relatorio:
+            with _relatorio(args, "opt") as relatorio:
+                # O pool fica com o relatório; os blocos da tabela são auditados no processo principal
+                n = auditar_catalogo_optica(args.catalogo, args.saida, 1, args.bloco, relatorio, args.nome, colunas)
+        else:
+            n = auditar_catalogo_optica(args.catalogo, args.saida, args.processos, args.bloco, colunas=colunas)
+        print(f"{n} lentes auditadas -> {args.saida}", file=sys.stderr)
+        return 0
+
+    if args.modulo == "redshift":
+        n = auditar_catalogo_redshift(args.catalogo, args.saida, args.processos, args.bloco, colunas)
+        print(f"{n} lentes auditadas -> {args.saida}", file=sys.stderr)
+        return 0
+
+    if args.modulo == "correntes":
+        correntes, intervalos = auditar_catalogo_correntes(ler_tabela(args.catalogo), args.amostras, colunas)
+        salvar_tabela(correntes, args.saida)
+        if args.intervalos:
+            salvar_tabela(intervalos, args.intervalos)
+        print(f"{len(correntes)} correntes / {len(intervalos)} rupturas -> {args.saida}", file=sys.stderr)
+        return 0
+
+    pontos, resumo = (ajustar_catalogo_dinamica if args.curva else auditar_catalogo_dinamica)(ler_tabela(args.catalogo), colunas)
+    salvar_tabela(resumo, args.saida)
+    if args.pontos:
+        salvar_tabela(pontos, args.pontos)
+    if args.relatorio:
+        from .relatorio import COLUNAS_DYN_MEDIANA
+        with _relatorio(args, "dyn", None if args.curva else COLUNAS_DYN_MEDIANA) as relatorio:
+            for nome, dados in objetos_dinamica(resumo):
+                relatorio.adicionar(nome, dados)
+    print(f"{len(resumo)} galáxias / {len(pontos)} pontos auditados -> {args.saida}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+from functools import lru_cache
+
+import numpy as np
+
+from .constantes import BETA, C, G, M_SOL, RAD_TO_ARCSEC
+from .cosmologia import calcular_D_A
+from .diagnostico import DIAG
+
+# ==========================================
+# ÓPTICA COSMOLÓGICA (ÍNDICE DE REFRAÇÃO TEMPORAL)
+# ==========================================
+def indice_refracao(zl, beta=BETA):
+    return 1.0 + beta * np.log1p(zl)
+
+def raio_einstein_barionico(mest, D_L, D_S, D_LS):
+    # Anel de Einstein clássico (radianos) para a massa fotométrica em 10^11 M_sol
+    M_kg = mest * 1e11 * M_SOL
+    return np.sqrt((4 * G * M_kg / C**2) * (D_LS / (D_L * D_S)))
+
+@DIAG.medir("optica")
+def auditar_optica_lote(zl, zs, mest, theta, beta=BETA):
+    # Versão vetorizada: cada argumento pode ser um array (uma lente por posição).
+    # Lentes fora do domínio (z_L <= 0 ou z_S <= z_L) ficam com NaN.
+    zl, zs, mest, theta = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (zl, zs, mest, theta)))
+    validos = (zl > 0) & (zs > zl)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        D_L, D_S, D_LS = calcular_D_A(0, zl), calcular_D_A(0, zs), calcular_D_A(zl, zs)
+        t_bar = raio_einstein_barionico(mest, D_L, D_S, D_LS) * RAD_TO_ARCSEC
+        etac = indice_refracao(zl, beta)
+        t_trr = t_bar * etac
+        err = np.abs(theta - t_trr) / theta
+    res = {'ttrr': t_trr, 'prec': np.maximum(0.0, 100.0 - err * 100.0), 'tbar': t_bar, 'etac': etac}
+    res = {k: np.where(validos, v, np.nan) for k, v in res.items()}
+    res['tobs'] = theta
+    return res
+
+@lru_cache(maxsize=1024)
+def distancias_lente(zl, zs):
+    # Etapa que só depende dos redshifts: mudar massa ou anel observado a reaproveita
+    return calcular_D_A(0, zl), calcular_D_A(0, zs), calcular_D_A(zl, zs)
+
+def auditar_optica(zl, zs, mest, theta):
+    if not (zl > 0 and zs > zl):
+        raise ValueError("É necessário 0 < z_L < z_S")
+    t_bar = float(raio_einstein_barionico(mest, *distancias_lente(float(zl), float(zs)))) * RAD_TO_ARCSEC
+    etac = float(indice_refracao(zl))
+    t_trr = t_bar * etac
+    with np.errstate(divide='ignore', invalid='ignore'):
+        prec = float(np.maximum(0.0, 100.0 - np.abs(theta - t_trr) / np.float64(theta) * 100.0))
+    return {'ttrr': t_trr, 'prec': prec, 'tbar': t_bar, 'tobs': float(theta), 'etac': etac}
@@ -0,0 +1,208 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from .constantes import RAD_TO_ARCSEC
+from .cosmologia import calcular_D_A
+from .diagnostico import DIAG
+from .optica import indice_refracao, raio_einstein_barionico
+
+# ==========================================
+# PREVISÃO DE REDSHIFT (AUDITORIA CEGA)
+# ==========================================
+DZ_MIN = 0.1              # Fonte pelo menos 0.1 em z atrás da lente
+Z_MAX_VARREDURA = 5.0
+PONTOS_VARREDURA = 100    # Modo "grade" (varredura original)
+PONTOS_GRAFICO = 40       # Amostragem grosseira usada apenas no gráfico
+AMOSTRAS_BRACKET = 16     # Amostras para isolar a raiz e detectar a virada de D_LS/D_S
+TOL_Z = 1e-6
+MAX_ITER = 100
+EPS = np.finfo(float).eps
+
+def theta_redshift(zs, zl, mest, D_L=None):
+    # Anéis clássico e TRR (arcsec) para fontes em zs, com a lente fixa em zl
+    if D_L is None:
+        D_L = calcular_D_A(0, zl)
+    t_class = raio_einstein_barionico(mest, D_L, calcular_D_A(0, zs), calcular_D_A(zl, zs)) * RAD_TO_ARCSEC
+    return t_class, t_class * indice_refracao(zl)
+
+@lru_cache(maxsize=1024)
+def geometria_fontes(zl, pontos, z_max=Z_MAX_VARREDURA):
+    # Etapa que só depende de z_L: D_L e, numa grade de z_S, D_S e D_LS. A massa entra
+    # depois (raio_einstein_barionico), então mudar M ou theta_obs não recalcula distâncias.
+    z = np.linspace(zl + DZ_MIN, z_max, pontos)
+    D_S, D_LS = calcular_D_A(0, z), calcular_D_A(zl, z)
+    z.flags.writeable = D_S.flags.writeable = D_LS.flags.writeable = False
+    return z, calcular_D_A(0, zl), D_S, D_LS
+
+def _theta_grade(zl, mest, geometria):
+    z, D_L, D_S, D_LS = geometria
+    t_class = raio_einstein_barionico(mest, D_L, D_S, D_LS) * RAD_TO_ARCSEC
+    return z, D_L, t_class, t_class * indice_refracao(zl)
+
+@DIAG.medir("redshift.curva")
+def curva_redshift(zl, mest, pontos=PONTOS_GRAFICO, z_max=Z_MAX_VARREDURA):
+    z_vals, _, t_class, t_trr = _theta_grade(zl, mest, geometria_fontes(float(zl), pontos, z_max))
+    return {'z_vals': z_vals, 't_class': t_class, 't_trr': t_trr}
+
+def _brent(f, a, b, fa, fb, tol, max_iter=MAX_ITER):
+    # Método de Brent (interpolação inversa quadrática / secante com bisseção de segurança)
+    c, fc = b, fb
+    d = e = b - a
+    n = 0
+    for _ in range(max_iter):
+        if (fb > 0) == (fc > 0):
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+        tol1 = 2 * EPS * abs(b) + 0.5 * tol
+        xm = 0.5 * (c - b)
+        if abs(xm) <= tol1 or fb == 0:
+            return b, n, True
+        if abs(e) >= tol1 and abs(fa) > abs(fb):
+            s = fb / fa
+            if a == c:
+                p, q = 2 * xm * s, 1 - s
+            else:
+                q, r = fa / fc, fb / fc
+                p = s * (2 * xm * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0: q = -q
+            p = abs(p)
+            if 2 * p < min(3 * xm * q - abs(tol1 * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = xm
+        else:
+            d = e = xm
+        a, fa = b, fb
+        b += d if abs(d) > tol1 else math.copysign(tol1, xm)
+        fb = f(b)
+        n += 1
+    return b, n, False
+
+@DIAG.medir("redshift.raiz")
+def _prever_por_raiz(zl, mest, theta, tol, z_max):
+    # Amostragem grosseira (distâncias em cache por z_L) para isolar a raiz no trecho monótono
+    z_b, D_L, _, t_b = _theta_grade(zl, mest, geometria_fontes(float(zl), AMOSTRAS_BRACKET, z_max))
+    f = lambda z: float(theta_redshift(z, zl, mest, D_L)[1]) - theta
+    f_b = t_b - theta
+    avaliacoes = AMOSTRAS_BRACKET
+
+    # Virada de D_LS/D_S: o anel deixa de crescer com z_S
+    queda = np.flatnonzero(np.diff(f_b) < 0)
+    fim = queda[0] + 1 if queda.size else z_b.size
+    z_turnover = float(z_b[fim - 1]) if queda.size else None
+
+    troca = np.flatnonzero(np.signbit(f_b[:fim - 1]) != np.signbit(f_b[1:fim]))
+    if f_b[0] == 0:
+        zs, has_solution = float(z_b[0]), True
+    elif troca.size:
+        i = troca[0]
+        zs, n, has_solution = _brent(f, z_b[i], z_b[i + 1], f_b[i], f_b[i + 1], tol)
+        avaliacoes += n
+    else:
+        # Sem solução no intervalo: reporta o ponto de menor erro do trecho monótono
+        zs, has_solution = float(z_b[np.argmin(np.abs(f_b[:fim]))]), False
+
+    t_trr = float(theta_redshift(zs, zl, mest, D_L)[1])
+    return {
+        'zs_pred': float(zs),
+        'prec': max(0.0, 100.0 - abs(theta - t_trr) / theta * 100.0),
+        'tobs': theta,
+        'has_solution': has_solution,
+        'z_turnover': z_turnover,
+        'avaliacoes': avaliacoes + 1,
+    }
+
+@DIAG.medir("redshift.grade")
+def _prever_por_grade(zl, mest, theta, pontos, z_max):
+    z_test = np.linspace(zl + DZ_MIN, z_max, pontos)
+    t_class, t_trr = theta_redshift(z_test, zl, mest)
+
+    # Erro relativo
+    erros = np.abs(theta - t_trr) / theta
+    idx_min = int(np.argmin(erros))
+    return {
+        'zs_pred': float(z_test[idx_min]),
+        'prec': max(0.0, 100.0 - float(erros[idx_min]) * 100.0),
+        'tobs': theta,
+        'has_solution': bool(0 < idx_min < pontos - 1),
+        'z_turnover': None,
+        'avaliacoes': pontos,
+        'z_vals': z_test,
+        't_class': t_class,
+        't_trr': t_trr,
+    }
+
+@DIAG.medir("redshift.lote")
+def prever_redshift_lote(zl, mest, theta, tol=TOL_Z, z_max=Z_MAX_VARREDURA, max_iter=MAX_ITER):
+    # Mesma previsão do modo "raiz" para muitas lentes de uma vez: amostragem (lentes x
+    # AMOSTRAS_BRACKET) para isolar a raiz e falsa posição de Illinois vetorizada no lugar
+    # do Brent escalar. Lentes fora do domínio ficam com NaN.
+    zl, mest, theta = (np.atleast_1d(np.asarray(x, dtype=float)) for x in np.broadcast_arrays(zl, mest, theta))
+    n = zl.size
+    res = {'zs_pred': np.full(n, np.nan), 'prec': np.full(n, np.nan), 'tobs': theta,
+           'has_solution': np.zeros(n, dtype=bool), 'z_turnover': np.full(n, np.nan)}
+    idx = np.flatnonzero((zl > 0) & (theta > 0) & (zl + DZ_MIN < z_max) & np.isfinite(mest))
+    if not idx.size:
+        return res
+    zl, mest, theta = zl[idx], mest[idx], theta[idx]
+    D_L = calcular_D_A(0, zl)
+    f = lambda z, sel: theta_redshift(z, zl[sel], mest[sel], D_L[sel])[1] - theta[sel]
+
+    z_b = np.linspace(zl + DZ_MIN, z_max, AMOSTRAS_BRACKET, axis=1)
+    f_b = theta_redshift(z_b, zl[:, None], mest[:, None], D_L[:, None])[1] - theta[:, None]
+    linhas = np.arange(idx.size)
+
+    # Virada de D_LS/D_S: só o trecho antes da primeira queda conta
+    queda = np.diff(f_b, axis=1) < 0
+    tem_queda = queda.any(axis=1)
+    fim = np.where(tem_queda, np.argmax(queda, axis=1) + 1, AMOSTRAS_BRACKET)
+    res['z_turnover'][idx[tem_queda]] = z_b[linhas, fim - 1][tem_queda]
+
+    troca = (np.signbit(f_b[:, :-1]) != np.signbit(f_b[:, 1:])) & (np.arange(AMOSTRAS_BRACKET - 1) < fim[:, None] - 1)
+    tem_troca = troca.any(axis=1) & (f_b[:, 0] != 0)
+    # Sem raiz: ponto de menor erro do trecho monótono (f_b[:, 0] == 0 cai aqui, com erro zero)
+    erro = np.where(np.arange(AMOSTRAS_BRACKET) < fim[:, None], np.abs(f_b), np.inf)
+    zs = z_b[linhas, np.argmin(erro, axis=1)]
+    solucao = (f_b[:, 0] == 0) | tem_troca
+
+    # Illinois: [a, b] sempre cerca a raiz; o extremo que fica parado tem f dividido por 2
+    sel = np.flatnonzero(tem_troca)
+    i = np.argmax(troca[sel], axis=1)
+    a, b = z_b[sel, i], z_b[sel, i + 1]
+    fa, fb = f_b[sel, i], f_b[sel, i + 1]
+    for _ in range(max_iter):
+        vivos = np.flatnonzero((np.abs(b - a) > tol) & (fb != 0))
+        if not vivos.size:
+            break
+        c = (a[vivos] * fb[vivos] - b[vivos] * fa[vivos]) / (fb[vivos] - fa[vivos])
+        fc = f(c, sel[vivos])
+        troca_lado = np.signbit(fc) != np.signbit(fb[vivos])
+        a[vivos] = np.where(troca_lado, b[vivos], a[vivos])
+        fa[vivos] = np.where(troca_lado, fb[vivos], fa[vivos] / 2)
+        b[vivos], fb[vivos] = c, fc
+    zs[sel] = b
+
+    t_trr = theta_redshift(zs, zl, mest, D_L)[1]
+    res['zs_pred'][idx] = zs
+    res['prec'][idx] = np.maximum(0.0, 100.0 - np.abs(theta - t_trr) / theta * 100.0)
+    res['has_solution'][idx] = solucao
+    return res
+
+def prever_redshift(zl, mest, theta, metodo="raiz", tol=TOL_Z, pontos=PONTOS_VARREDURA, z_max=Z_MAX_VARREDURA):
+    if not (zl > 0 and theta > 0):
+        raise ValueError("É necessário z_L > 0 e anel de Einstein > 0")
+    if zl + DZ_MIN >= z_max:
+        raise ValueError(f"z_L deve ser menor que {z_max - DZ_MIN:g}")
+    if metodo == "grade":
+        return _prever_por_grade(zl, mest, theta, pontos, z_max)
+    if metodo != "raiz":
+        raise ValueError(f"Método desconhecido: {metodo}")
+    res = _prever_por_raiz(zl, mest, theta, tol, z_max)
+    res.update(curva_redshift(zl, mest, z_max=z_max))
+    return res
@@ -0,0 +1,366 @@
+import os
+import shutil
+import string
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+
+from .diagnostico import DIAG
+from .fpdf_unicode import FAMILIA_UNICODE, PDF
+from .idiomas import LANG
+
+# ==========================================
+# MOTORES GRÁFICOS (AGG, EM MEMÓRIA)
+# ==========================================
+# Os gráficos são desenhados direto no canvas Agg (sem pyplot e sem arquivos
+# temporários) e devolvidos como matriz RGB. Cada thread reaproveita uma figura
+# por tipo de gráfico; os downloads do Streamlit rodam em threads separadas.
+DPI_GRAFICO = 150
+_modelos = threading.local()
+
+def _modelo_grafico(tipo):
+    figuras = _modelos.__dict__.setdefault("figuras", {})
+    if tipo not in figuras:
+        if tipo == "stream":
+            fig = Figure(figsize=(7, 6), dpi=DPI_GRAFICO)
+            eixos = fig.subplots(2, 1, sharex=True)
+        elif tipo == "mapa":
+            # Eixo fixo para a barra de cores, para que a figura reaproveitada não acumule barras
+            fig = Figure(figsize=(7, 5), dpi=DPI_GRAFICO)
+            eixos = fig.subplots(1, 2, gridspec_kw={"width_ratios": (20, 1)})
+        else:
+            fig = Figure(figsize=(7, 4), dpi=DPI_GRAFICO)
+            eixos = fig.subplots()
+        FigureCanvasAgg(fig)
+        figuras[tipo] = (fig, eixos)
+    fig, eixos = figuras[tipo]
+    for ax in np.atleast_1d(eixos): ax.clear()
+    return fig, eixos
+
+def _renderizar(fig):
+    fig.tight_layout()
+    fig.canvas.draw()
+    return np.asarray(fig.canvas.buffer_rgba())[:, :, :3].copy()
+
+def _propriedades_fonte(fonte):
+    # Rótulos no idioma do relatório: a fonte padrão do matplotlib não tem CJK
+    return FontProperties(fname=fonte) if fonte else None
+
+def criar_grafico(val_bar, val_trr, val_obs, lbl_bar, lbl_trr, lbl_obs, is_dyn=True, fonte=None):
+    fig, ax = _modelo_grafico("barras")
+    labels = [lbl_bar, lbl_trr, lbl_obs]
+    valores = [val_bar, val_trr, val_obs]
+    cores = ['#e74c3c', '#3498db', '#2ecc71'] 
+    ax.bar(range(3), valores, color=cores, width=0.6)
+    ax.set_xticks(range(3), labels, fontproperties=_propriedades_fonte(fonte))
+    ax.set_ylabel("Vel. (km/s)" if is_dyn else "Dev (arcsec)", fontweight='bold')
+    return _renderizar(fig)
+
+def criar_grafico_redshift(z_vals, theta_class, theta_trr, zs_pred, theta_obs):
+    fig, ax = _modelo_grafico("redshift")
+    ax.plot(z_vals, theta_class, color='#e74c3c', linestyle='--', label="Classical")
+    ax.plot(z_vals, theta_trr, color='#3498db', label="RRT Prediction")
+    ax.axhline(y=theta_obs, color='#2ecc71', label=f"Obs ({theta_obs}\")")
+    ax.scatter([zs_pred], [theta_obs], color='#f1c40f', s=100, zorder=5)
+    ax.set_xlabel("Source Redshift (z_S)"); ax.set_ylabel("Einstein Ring (arcsec)")
+    ax.legend()
+    return _renderizar(fig)
+
+def criar_grafico_stream(raios, arrasto, cisalhamento, limite):
+    fig, (ax1, ax2) = _modelo_grafico("stream")
+    ax1.plot(raios, arrasto, color='#2980b9', label="Viscous Drag")
+    ax2.plot(raios, cisalhamento, color='#8e44ad', label="Viscous Shear")
+    ax2.axhline(y=limite, color='#e74c3c', linestyle='--')
+    ax2.fill_between(raios, cisalhamento, limite, where=(np.array(cisalhamento) >= limite), color='#e74c3c', alpha=0.4)
+    return _renderizar(fig)
+
+def criar_grafico_histograma(contagens, bordas, lbl_prec, fonte=None):
+    fig, ax = _modelo_grafico("histograma")
+    ax.bar(bordas[:-1], contagens, width=np.diff(bordas), align='edge', color='#3498db', edgecolor='white')
+    ax.set_xlabel(f"{lbl_prec} (%)", fontproperties=_propriedades_fonte(fonte)); ax.set_ylabel("N", fontweight='bold')
+    return _renderizar(fig)
+
+def criar_grafico_mapa(betas, a0s, precisao, referencia=None):
+    fig, (ax, cax) = _modelo_grafico("mapa")
+    im = ax.pcolormesh(a0s, betas, precisao, cmap='viridis', shading='nearest')
+    ax.set_xscale('log')
+    fig.colorbar(im, cax=cax, label="Precision (%)")
+    if referencia is not None:
+        ax.scatter([referencia[1]], [referencia[0]], color='#e74c3c', marker='x', s=80, zorder=5)
+    ax.set_xlabel("A0 (m/s²)"); ax.set_ylabel("BETA", fontweight='bold')
+    return _renderizar(fig)
+
+# ==========================================
+# TEXTOS E FONTE DO PDF (POR IDIOMA, SOB DEMANDA)
+# ==========================================
+# Idiomas em latin-1 usam a fonte padrão do PDF (nada embutido). Os demais usam uma fonte
+# TrueType Unicode embutida como subconjunto: a primeira de TRR_FONTE_PDF (caminhos
+# separados por os.pathsep) ou de FONTES_CANDIDATAS que tenha todos os caracteres do
+# idioma. A DejaVu Sans do matplotlib (sempre instalada) cobre o cirílico; japonês e
+# chinês usam a Droid Sans Fallback (.ttf; o fpdf 1.7 não lê .ttc nem .otf CFF), do pacote
+# fonts-droid-fallback declarado em packages.txt. Sem fonte que cubra o idioma (ex.: uma
+# instalação sem esse pacote), o relatório sai em inglês e a interface avisa "(PDF - EN)".
+FONTES_CANDIDATAS = (
+    "/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf",
+    "/usr/share/fonts/truetype/arphic-gkai00mp/gkai00mp.ttf",
+    "/usr/share/fonts/truetype/fonts-japanese-gothic.ttf",
+    os.path.join(matplotlib.get_data_path(), "fonts", "ttf", "DejaVuSans.ttf"),
+)
+CHAVES_PDF = ("pdf_h1", "pdf_h2", "pdf_footer", "pdf_title_dyn", "pdf_title_opt", "pdf_title_red", "pdf_title_str", "pdf_title_cat",
+              "pdf_cat_stats", "pdf_cat_obj", "rep_dyn_text", "rep_opt_text", "rep_red_text", "rep_str_text",
+              "g_bar", "g_trr", "g_obs", "no_gap", "precision")
+
+def fontes_pdf():
+    return [f for f in os.environ.get("TRR_FONTE_PDF", "").split(os.pathsep) if f] + list(FONTES_CANDIDATAS)
+
+@lru_cache(maxsize=None)
+def _caracteres_fonte(caminho):
+    from matplotlib.ft2font import FT2Font
+    try:
+        return frozenset(FT2Font(caminho).get_charmap())
+    except (OSError, RuntimeError, ValueError):
+        return frozenset()
+
+def _latin1(texto):
+    return texto.encode('latin-1', 'replace').decode('latin-1')
+
+@lru_cache(maxsize=None)
+def textos_pdf(codigo):
+    # Montado uma vez por idioma, no primeiro relatório: escolhe a fonte e deixa os
+    # textos e modelos prontos para ela. Não alterar o dict devolvido (é compartilhado).
+    textos = {k: LANG[codigo][k] for k in CHAVES_PDF}
+    usados = {ord(c) for v in textos.values() for c in v if not c.isspace()}
+    if max(usados) < 256:
+        return dict(textos, code=codigo, fonte=None)
+    fonte = next((f for f in fontes_pdf() if os.path.isfile(f) and usados <= _caracteres_fonte(f)), None)
+    if fonte is None:
+        return dict({k: _latin1(LANG["EN"][k]) for k in CHAVES_PDF}, code="EN", fonte=None)
+    # Subconjunto fixo por idioma (todos os caracteres dos textos + ASCII): os relatórios
+    # do idioma pedem sempre o mesmo subconjunto, que fica em cache (fpdf_unicode)
+    caracteres = sorted((usados | {ord(c) for c in string.printable if c.isprintable()}) & _caracteres_fonte(fonte))
+    return dict(textos, code=codigo, fonte=fonte, caracteres=caracteres)
+
+def _texto(T, texto):
+    # Texto livre (ex.: nome do objeto): a fonte padrão só aceita latin-1
+    return texto if T["fonte"] else _latin1(texto)
+
+def _novo_pdf(T):
+    pdf = PDF()
+    if T["fonte"]:
+        pdf.usar_fonte_unicode(T["fonte"], T["caracteres"])
+    return pdf
+
+def _fonte(pdf, T, estilo='', tamanho=11):
+    # A fonte Unicode embutida é uma só: negrito/itálico viram só tamanho
+    if T["fonte"]:
+        pdf.set_font(FAMILIA_UNICODE, '', tamanho)
+    else:
+        pdf.set_font("Arial", estilo, tamanho)
+
+# ==========================================
+# GERADOR DE PDF
+# ==========================================
+def _cabecalho(pdf, T, titulo):
+    pdf.add_page()
+    _fonte(pdf, T, 'B', 16)
+    pdf.cell(0, 10, txt=T["pdf_h1"], ln=True, align='C')
+    _fonte(pdf, T, 'I', 10)
+    pdf.cell(0, 8, txt=T["pdf_h2"], ln=True, align='C')
+    pdf.line(10, 28, 200, 28); pdf.ln(10)
+    _fonte(pdf, T, 'B', 12)
+    pdf.cell(0, 10, txt=_texto(T, titulo), ln=True); pdf.ln(5)
+    _fonte(pdf, T, '', 11)
+
+def _rodape(pdf, T):
+    # Sem quebra automática: o rodapé fica na mesma página do conteúdo
+    pdf.set_auto_page_break(False)
+    pdf.set_y(-30); _fonte(pdf, T, 'I', 8); pdf.cell(0, 10, txt=T["pdf_footer"], align='C', ln=True)
+    pdf.set_auto_page_break(True, margin=20)
+
+def _titulo_modulo(modulo, T):
+    return {"dyn": T["pdf_title_dyn"], "opt": T["pdf_title_opt"], "red": T["pdf_title_red"], "str": T["pdf_title_str"]}[modulo]
+
+def _conteudo_modulo(modulo, dict_dados, T):
+    if modulo == "dyn":
+        texto = T["rep_dyn_text"].format(**dict_dados)
+        img = criar_grafico(dict_dados['vbar'], dict_dados['vtrr'], dict_dados['vobs'], T["g_bar"], T["g_trr"], T["g_obs"], True, T["fonte"])
+    elif modulo == "opt":
+        texto = T["rep_opt_text"].format(**dict_dados)
+        img = criar_grafico(dict_dados['tbar'], dict_dados['ttrr'], dict_dados['tobs'], T["g_bar"], T["g_trr"], T["g_obs"], False, T["fonte"])
+    elif modulo == "red":
+        texto = T["rep_red_text"].format(**dict_dados)
+        img = criar_grafico_redshift(dict_dados['z_vals'], dict_dados['t_class'], dict_dados['t_trr'], dict_dados['zs_pred'], dict_dados['tobs'])
+    else:
+        gaps = dict_dados.get('gaps', [(dict_dados['gap_start'], dict_dados['gap_end'])])
+        loc_str_pdf = ", ".join(f"[{ini:.1f} kpc - {fim:.1f} kpc]" for ini, fim in gaps) if dict_dados['has_gap'] else T["no_gap"]
+        texto = T["rep_str_text"].format(loc_str=loc_str_pdf, **dict_dados)
+        img = criar_grafico_stream(dict_dados['raios'], dict_dados['arrasto'], dict_dados['cisal'], dict_dados['limite'])
+    return texto, img
+
+def _pagina_objeto(pdf, modulo, dict_dados, T, titulo):
+    _cabecalho(pdf, T, titulo)
+    with DIAG.etapa("pdf.grafico"):
+        texto, img = _conteudo_modulo(modulo, dict_dados, T)
+    for linha in texto.split('\n'):
+        pdf.multi_cell(0, 7, txt=linha)
+    pdf.ln(10)
+    with DIAG.etapa("pdf.imagem"):
+        pdf.inserir_imagem(img, x=15, w=180)
+    _rodape(pdf, T)
+
+def gerar_pdf(modulo, dict_dados, L_original):
+    T = textos_pdf(L_original["code"])
+    pdf = _novo_pdf(T)
+    _pagina_objeto(pdf, modulo, dict_dados, T, _titulo_modulo(modulo, T))
+    with DIAG.etapa("pdf.fpdf"):
+        return pdf.output(dest='S').encode('latin-1', 'replace')
+
+# ==========================================
+# RELATÓRIO DE CATÁLOGO (VÁRIOS OBJETOS)
+# ==========================================
+# Colunas da tabela-resumo: (cabeçalho, chave no resultado, formato, largura em mm)
+COLUNAS_RESUMO = {
+    "dyn": [("M/L", "ml", "{:.2f}", 20), ("V_bar", "vbar", "{:.2f}", 28), ("V_TRR", "vtrr", "{:.2f}", 28), ("V_obs", "vobs", "{:.2f}", 28)],
+    "opt": [("theta_bar", "tbar", "{:.3f}", 26), ("theta_TRR", "ttrr", "{:.3f}", 26), ("theta_obs", "tobs", "{:.3f}", 26), ("eta_C", "etac", "{:.5f}", 24)],
+    "red": [("z_S", "zs_pred", "{:.4f}", 30), ("theta_obs", "tobs", "{:.3f}", 30)],
+    "str": [("r_gap_1", "gap_start", "{:.1f}", 30), ("r_gap_2", "gap_end", "{:.1f}", 30)],
+}
+# Resumo de dinâmica ponto a ponto: o M/L da galáxia é a mediana dos M/L de cada raio, não um ajuste
+COLUNAS_DYN_MEDIANA = [("M/L med.", "ml", "{:.2f}", 20)] + COLUNAS_RESUMO["dyn"][1:]
+LARGURA_PREC = 26
+OBJETOS_POR_PARTE = 50
+BORDAS_HISTOGRAMA = np.linspace(0.0, 100.0, 21)
+
+def _formatar(formato, valor):
+    try:
+        return formato.format(valor)
+    except (TypeError, ValueError):
+        return str(valor)
+
+def _renderizar_parte(modulo, codigo_idioma, objetos, caminho):
+    # Executado no processo principal ou num worker: uma parte = um PDF em disco
+    T = textos_pdf(codigo_idioma)
+    pdf = _novo_pdf(T)
+    for nome, dados in objetos:
+        _pagina_objeto(pdf, modulo, dados, T, f"{_titulo_modulo(modulo, T)} - {nome}")
+    pdf.output(caminho, 'F')
+    return caminho
+
+class RelatorioCatalogo:
+    # Relatório consolidado em fluxo: as páginas por objeto são geradas em partes de
+    # OBJETOS_POR_PARTE objetos, gravadas em disco (opcionalmente num pool de processos)
+    # e unidas no final atrás da página de resumo. Em memória ficam só as linhas da
+    # tabela-resumo e as precisões usadas no histograma.
+    def __init__(self, caminho, modulo, L_original, processos=1, objetos_por_parte=OBJETOS_POR_PARTE, paginas_objetos=True, colunas=None):
+        self.caminho = caminho
+        self.modulo = modulo
+        self.colunas = colunas or COLUNAS_RESUMO[modulo]
+        self.codigo = L_original["code"]
+        self.T = textos_pdf(L_original["code"])
+        self.objetos_por_parte = objetos_por_parte
+        self.paginas_objetos = paginas_objetos
+        self.precisoes = []
+        self.linhas = []
+        self._pendentes = []
+        self._partes = deque()
+        self._concluidas = []
+        self._processos = processos
+        self._pool = ProcessPoolExecutor(max_workers=processos) if processos > 1 else None
+        self._dir = tempfile.mkdtemp(prefix=".trr_relatorio_", dir=os.path.dirname(os.path.abspath(caminho)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *exc):
+        try:
+            if tipo is None:
+                self.finalizar()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+            shutil.rmtree(self._dir, ignore_errors=True)
+
+    def adicionar(self, nome, dados):
+        prec = float(dados.get('prec', np.nan))
+        if np.isfinite(prec):
+            self.precisoes.append(prec)
+        self.linhas.append((str(nome), [_formatar(fmt, dados.get(chave)) for _, chave, fmt, _ in self.colunas], prec))
+        if self.paginas_objetos:
+            self._pendentes.append((nome, dados))
+            if len(self._pendentes) >= self.objetos_por_parte:
+                self._enviar_parte()
+
+    def _enviar_parte(self):
+        if not self._pendentes:
+            return
+        caminho = os.path.join(self._dir, f"parte_{len(self._partes) + len(self._concluidas):06d}.pdf")
+        args = (self.modulo, self.codigo, self._pendentes, caminho)
+        self._pendentes = []
+        if self._pool is None:
+            self._concluidas.append(_renderizar_parte(*args))
+            return
+        self._partes.append(self._pool.submit(_renderizar_parte, *args))
+        # No máximo 2 partes por processo em voo
+        while len(self._partes) >= 2 * self._processos:
+            self._concluidas.append(self._partes.popleft().result())
+
+    def _pagina_resumo(self, caminho):
+        T = self.T
+        pdf = _novo_pdf(T)
+        _cabecalho(pdf, T, f"{T['pdf_title_cat']} - {_titulo_modulo(self.modulo, T)}")
+        prec = np.asarray(self.precisoes) if self.precisoes else np.zeros(1)
+        texto = T["pdf_cat_stats"].format(n=len(self.linhas), media=prec.mean(), mediana=np.median(prec), minimo=prec.min(), maximo=prec.max())
+        for linha in texto.split('\n'):
+            pdf.multi_cell(0, 7, txt=linha)
+        pdf.ln(5)
+        contagens = np.histogram(prec, bins=BORDAS_HISTOGRAMA)[0]
+        pdf.inserir_imagem(criar_grafico_histograma(contagens, BORDAS_HISTOGRAMA, T["precision"], T["fonte"]), x=25, w=160)
+        pdf.ln(5)
+
+        colunas = self.colunas
+        largura_nome = 190 - sum(c[3] for c in colunas) - LARGURA_PREC
+        def cabecalho_tabela():
+            _fonte(pdf, T, 'B', 9)
+            pdf.cell(largura_nome, 6, txt=T["pdf_cat_obj"], border=1)
+            for titulo, _, _, largura in colunas:
+                pdf.cell(largura, 6, txt=titulo, border=1, align='C')
+            pdf.cell(LARGURA_PREC, 6, txt="%", border=1, align='C', ln=True)
+            _fonte(pdf, T, '', 9)
+        cabecalho_tabela()
+        for nome, valores, p in self.linhas:
+            if pdf.get_y() + 6 > pdf.h - 25:
+                _rodape(pdf, T)
+                pdf.add_page()
+                cabecalho_tabela()
+            pdf.cell(largura_nome, 6, txt=_texto(T, nome[:40]), border=1)
+            for (_, _, _, largura), valor in zip(colunas, valores):
+                pdf.cell(largura, 6, txt=valor, border=1, align='R')
+            pdf.cell(LARGURA_PREC, 6, txt=_formatar("{:.2f}", p), border=1, align='R', ln=True)
+        _rodape(pdf, T)
+        pdf.output(caminho, 'F')
+        return caminho
+
+    def finalizar(self):
+        self._enviar_parte()
+        while self._partes:
+            self._concluidas.append(self._partes.popleft().result())
+        resumo = self._pagina_resumo(os.path.join(self._dir, "resumo.pdf"))
+        unir_pdfs([resumo] + self._concluidas, self.caminho)
+        return self.caminho
+
+def unir_pdfs(caminhos, destino):
+    from pypdf import PdfWriter
+    escritor = PdfWriter()
+    for caminho in caminhos:
+        escritor.append(caminho)
+    with open(destino, "wb") as f:
+        escritor.write(f)
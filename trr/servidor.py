@@ -0,0 +1,405 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from .correntes import AMOSTRAS_PERFIL
+from .diagnostico import DIAG
+from .redshift import DZ_MIN, TOL_Z, Z_MAX_VARREDURA
+
+# ==========================================
+# API HTTP/JSON LOCAL (COM AGRUPAMENTO DE REQUISIÇÕES)
+# ==========================================
+# POST /v1/<dyn|opt|red|str> com um objeto JSON (ou uma lista) devolve a auditoria; POST
+# /v1/<modulo>/pdf devolve o relatório. Os mesmos motores vetorizados da interface e do
+# lote: requisições de um objeto que chegam dentro de JANELA_LOTE são agrupadas numa
+# única avaliação vetorizada, feita num pool de processos. Um lote só sai quando há um
+# processo livre, então sob carga os lotes crescem sozinhos (até MAX_LOTE) em vez de a
+# fila de processos crescer. Só biblioteca padrão (asyncio): HTTP/1.1 com keep-alive.
+HOST = "127.0.0.1"
+PORTA = 8765
+JANELA_LOTE = 0.002
+MAX_LOTE = 4096
+MAX_CORPO = 8 << 20
+Z_MAX_FONTE = 1100.0        # Superfície de último espalhamento; além da tabela vale a cauda analítica
+
+# módulo -> (entrada, padrão ou None se obrigatória); opções valem para o lote inteiro e
+# têm faixa: amostras limita a memória de cada processo, tol abaixo de ~1e-12 só gasta iterações
+CAMPOS = {
+    "dyn": (("rad", None), ("vobs", None), ("vgas", 0.0), ("vdisk", 0.0), ("vbulge", 0.0)),
+    "opt": (("zl", None), ("zs", None), ("mest", None), ("theta", None)),
+    "red": (("zl", None), ("mest", None), ("theta", None)),
+    "str": (("r_peri", None), ("r_apo", None), ("mest", None)),
+}
+OPCOES = {"red": (("tol", TOL_Z, float, 1e-12, 0.1),), "str": (("amostras", AMOSTRAS_PERFIL, int, 10, 100_000),)}
+SAIDAS = {
+    "dyn": ("vtrr", "vbar", "ml", "prec", "vobs"),
+    "opt": ("ttrr", "prec", "tbar", "tobs", "etac"),
+    "red": ("zs_pred", "prec", "tobs", "has_solution", "z_turnover"),
+    "str": ("limite", "has_gap", "n_gaps", "gap_start", "gap_end", "gaps"),
+}
+MENSAGENS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+def _validar(modulo, dados):
+    # Mesmas condições das auditorias de um objeto (ValueError -> 400)
+    if not isinstance(dados, dict):
+        raise ValueError("Esperado um objeto JSON")
+    try:
+        entrada = {k: float(dados[k] if padrao is None else dados.get(k, padrao)) for k, padrao in CAMPOS[modulo]}
+        opcoes = tuple(tipo(dados.get(k, padrao)) for k, padrao, tipo, _, _ in OPCOES.get(modulo, ()))
+    except KeyError as e:
+        raise ValueError(f"Campo obrigatório ausente: {e.args[0]}") from None
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("Os campos devem ser numéricos") from None
+    if not all(np.isfinite(v) for v in entrada.values()):
+        raise ValueError("Os campos devem ser finitos")
+    for (k, _, _, minimo, maximo), valor in zip(OPCOES.get(modulo, ()), opcoes):
+        if not minimo <= valor <= maximo:
+            raise ValueError(f"É necessário {minimo:g} <= {k} <= {maximo:g}")
+    if modulo == "dyn" and not (entrada["rad"] > 0 and entrada["vobs"] > 0):
+        raise ValueError("É necessário raio > 0 e velocidade observada > 0")
+    if modulo == "opt" and not (Z_MAX_FONTE >= entrada["zs"] > entrada["zl"] > 0 and entrada["theta"] > 0):
+        raise ValueError(f"É necessário 0 < z_L < z_S <= {Z_MAX_FONTE:g} e anel de Einstein > 0")
+    if modulo == "red" and not (entrada["zl"] > 0 and entrada["theta"] > 0 and entrada["zl"] + DZ_MIN < Z_MAX_VARREDURA):
+        raise ValueError(f"É necessário 0 < z_L < {Z_MAX_VARREDURA - DZ_MIN:g} e anel de Einstein > 0")
+    if modulo == "str" and not (entrada["r_apo"] > entrada["r_peri"] > 0):
+        raise ValueError("É necessário 0 < pericentro < apocentro")
+    return entrada, opcoes
+
+def _lista(valores):
+    # Arrays -> listas do JSON, NaN e ±inf -> null (o JSON não tem esses valores)
+    if valores.dtype.kind != "f":
+        return valores.tolist()
+    return [x if finito else None for x, finito in zip(valores.tolist(), np.isfinite(valores).tolist())]
+
+def _serializar(resposta):
+    if isinstance(resposta, bytes):
+        return resposta
+    if isinstance(resposta, str):
+        return resposta.encode()
+    return json.dumps(resposta, ensure_ascii=False, allow_nan=False).encode()
+
+def avaliar_lote(modulo, opcoes, colunas):
+    # Roda no pool. colunas: entrada -> lista (um valor por objeto). Devolve saída -> lista.
+    col = {k: np.asarray(v, dtype=float) for k, v in colunas.items()}
+    if modulo == "dyn":
+        from .dinamica import auditar_dinamica
+        res = auditar_dinamica(col["rad"], col["vobs"], col["vgas"], col["vdisk"], col["vbulge"])
+    elif modulo == "opt":
+        from .optica import auditar_optica_lote
+        res = auditar_optica_lote(col["zl"], col["zs"], col["mest"], col["theta"])
+    elif modulo == "red":
+        from .redshift import prever_redshift_lote
+        res = prever_redshift_lote(col["zl"], col["mest"], col["theta"], tol=opcoes[0])
+    else:
+        from .correntes import auditar_correntes_lote
+        res = auditar_correntes_lote(col["r_peri"], col["r_apo"], col["mest"], amostras=opcoes[0])
+        gaps = res.pop("gaps")
+        # Intervalos já vêm ordenados por corrente: um corte por objeto
+        cortes = np.searchsorted(gaps["corrente"], np.arange(1, col["mest"].size))
+        pares = np.column_stack([gaps["inicio"], gaps["fim"]]).tolist()
+        limites = [0, *cortes.tolist(), len(pares)]
+        res["gaps"] = [pares[a:b] for a, b in zip(limites[:-1], limites[1:])]
+    n = len(next(iter(colunas.values())))
+    return {k: res[k] if isinstance(res[k], list) else _lista(np.broadcast_to(res[k], (n,))) for k in SAIDAS[modulo]}
+
+def renderizar_pdf(modulo, entrada, opcoes, idioma):
+    # Roda no pool: auditoria completa de um objeto (com as curvas) e o PDF da interface
+    from .idiomas import LANG
+    from .relatorio import gerar_pdf
+    if modulo == "dyn":
+        from .dinamica import auditar_ponto_dinamica
+        res = auditar_ponto_dinamica(**entrada)
+    elif modulo == "opt":
+        from .optica import auditar_optica
+        res = auditar_optica(**entrada)
+    elif modulo == "red":
+        from .redshift import prever_redshift
+        res = prever_redshift(**entrada, tol=opcoes[0])
+    else:
+        from .correntes import auditar_corrente
+        res = auditar_corrente(**entrada, amostras=opcoes[0])
+    return gerar_pdf(modulo, res, LANG[idioma])
+
+def _aquecer(_):
+    # Importações, tabela comóvel e caches de cada processo antes da primeira requisição
+    for modulo, entrada in (("dyn", {"rad": 8.0, "vobs": 180.0, "vgas": 20.0, "vdisk": 120.0, "vbulge": 30.0}),
+                            ("opt", {"zl": 0.3, "zs": 0.8, "mest": 3.0, "theta": 1.2}),
+                            ("red", {"zl": 0.3, "mest": 3.0, "theta": 1.2}),
+                            ("str", {"r_peri": 10.0, "r_apo": 30.0, "mest": 2.0})):
+        avaliar_lote(modulo, _validar(modulo, entrada)[1], {k: [v] for k, v in entrada.items()})
+    return os.getpid()
+
+def _novo_executor(processos):
+    return ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context("spawn"))
+
+class Agrupador:
+    # Junta as requisições de um objeto por (módulo, opções) e despacha lotes ao pool
+    def __init__(self, executor, processos, janela=JANELA_LOTE, max_lote=MAX_LOTE):
+        self.executor = executor
+        self.processos = processos
+        self.reconstrucoes = 0
+        self.janela = janela
+        self.max_lote = max_lote
+        self.lotes = 0
+        self.objetos = 0
+        self._vagas = asyncio.Semaphore(processos)
+        self._pendentes = {}    # (módulo, opções) -> [(entrada, futuro)]
+        self._agendados = set()
+        self._tarefas = set()   # referência forte: o laço só guarda referências fracas das tarefas
+
+    async def executar(self, funcao, *args):
+        # Um processo que morre (ex.: sem memória) quebra o pool inteiro: as requisições em
+        # voo falham, o pool é trocado por um novo e as seguintes seguem normalmente
+        executor = self.executor
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, funcao, *args)
+        except BrokenProcessPool:
+            if self.executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = _novo_executor(self.processos)
+                self.reconstrucoes += 1
+            raise
+
+    def _disparar(self, chave):
+        tarefa = asyncio.get_running_loop().create_task(self._despachar(chave))
+        self._tarefas.add(tarefa)
+        tarefa.add_done_callback(self._tarefas.discard)
+
+    def avaliar(self, modulo, entrada, opcoes=()):
+        laco = asyncio.get_running_loop()
+        chave = (modulo, opcoes)
+        futuro = laco.create_future()
+        fila = self._pendentes.setdefault(chave, [])
+        fila.append((entrada, futuro))
+        if len(fila) >= self.max_lote:
+            self._disparar(chave)
+        elif chave not in self._agendados:
+            self._agendados.add(chave)
+            laco.call_later(self.janela, self._disparar, chave)
+        return futuro
+
+    async def _despachar(self, chave):
+        async with self._vagas:
+            # Quem chegou enquanto se esperava por um processo livre entra no mesmo lote
+            fila = self._pendentes.pop(chave, [])
+            self._agendados.discard(chave)
+            if len(fila) > self.max_lote:
+                self._pendentes[chave] = fila[self.max_lote:] + self._pendentes.get(chave, [])
+                fila = fila[:self.max_lote]
+                self._disparar(chave)
+            fila = [(e, f) for e, f in fila if not f.cancelled()]
+            if not fila:
+                return
+            modulo, opcoes = chave
+            colunas = {k: [e[k] for e, _ in fila] for k, _ in CAMPOS[modulo]}
+            self.lotes += 1
+            self.objetos += len(fila)
+            try:
+                with DIAG.etapa(f"servidor.lote.{modulo}"):
+                    res = await self.executar(avaliar_lote, modulo, opcoes, colunas)
+            except Exception as e:
+                for _, futuro in fila:
+                    if not futuro.done(): futuro.set_exception(e)
+                return
+            for i, (_, futuro) in enumerate(fila):
+                if not futuro.done():
+                    futuro.set_result({k: v[i] for k, v in res.items()})
+
+class ServidorTRR:
+    def __init__(self, executor, processos, janela=JANELA_LOTE, max_lote=MAX_LOTE):
+        self.agrupador = Agrupador(executor, processos, janela, max_lote)
+        self.requisicoes = 0
+        self.erros = 0
+        self.inicio = time.time()
+
+    def estatisticas(self):
+        a = self.agrupador
+        return {"requisicoes": self.requisicoes, "erros": self.erros, "lotes": a.lotes, "objetos": a.objetos,
+                "objetos_por_lote": a.objetos / a.lotes if a.lotes else 0.0, "pools_reconstruidos": a.reconstrucoes, "segundos_ativo": time.time() - self.inicio}
+
+    async def _auditar(self, modulo, dados):
+        entrada, opcoes = _validar(modulo, dados)
+        return await self.agrupador.avaliar(modulo, entrada, opcoes)
+
+    async def _item(self, modulo, dados):
+        # Em listas, um objeto inválido não derruba os outros
+        try:
+            return await self._auditar(modulo, dados)
+        except ValueError as e:
+            return {"erro": str(e)}
+
+    async def rotear(self, metodo, alvo, corpo):
+        caminho = urlsplit(alvo).path.rstrip("/")
+        partes = caminho.strip("/").split("/")
+        if caminho == "/saude":
+            return 200, "application/json", {"ok": True, **self.estatisticas()}
+        if caminho == "/metricas":
+            return 200, "text/plain; version=0.0.4", DIAG.prometheus({f"servidor_{k}": v for k, v in self.estatisticas().items()})
+        if len(partes) not in (2, 3) or partes[0] != "v1" or partes[1] not in CAMPOS or partes[2:] not in ([], ["pdf"]):
+            return 404, "application/json", {"erro": f"Rota desconhecida: {caminho}"}
+        if metodo != "POST":
+            return 405, "application/json", {"erro": "Use POST"}
+        modulo = partes[1]
+        try:
+            dados = json.loads(corpo or b"null")
+            if partes[2:] == ["pdf"]:
+                entrada, opcoes = _validar(modulo, dados)
+                idioma = str(dados.get("idioma", "EN")).upper()
+                from .idiomas import LANG
+                if idioma not in LANG:
+                    raise ValueError(f"Idioma desconhecido: {idioma}")
+                pdf = await self.agrupador.executar(renderizar_pdf, modulo, entrada, opcoes, idioma)
+                return 200, "application/pdf", pdf
+            if isinstance(dados, list):
+                return 200, "application/json", await asyncio.gather(*(self._item(modulo, d) for d in dados))
+            return 200, "application/json", await self._auditar(modulo, dados)
+        except ValueError as e:
+            return 400, "application/json", {"erro": str(e)}
+
+    async def atender(self, leitor, escritor):
+        # Uma conexão: requisições HTTP/1.1 em sequência (keep-alive)
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha.strip():
+                    break
+                try:
+                    metodo, alvo, versao = linha.decode("latin-1").split()
+                except ValueError:
+                    break
+                cabecalhos = {}
+                while (h := await leitor.readline()).strip():
+                    k, _, v = h.decode("latin-1").partition(":")
+                    cabecalhos[k.strip().lower()] = v.strip()
+                manter = versao == "HTTP/1.1" and cabecalhos.get("connection", "").lower() != "close"
+                self.requisicoes += 1
+                try:
+                    tamanho = int(cabecalhos.get("content-length") or 0)
+                except ValueError:
+                    tamanho = -1
+                if tamanho < 0:
+                    # Sem um tamanho válido não há como achar o fim do corpo: responde e fecha
+                    status, tipo, resposta, manter = 400, "application/json", {"erro": "Content-Length inválido"}, False
+                elif tamanho > MAX_CORPO:
+                    status, tipo, resposta, manter = 413, "application/json", {"erro": "Corpo grande demais"}, False
+                else:
+                    corpo = await leitor.readexactly(tamanho) if tamanho else b""
+                    try:
+                        status, tipo, resposta = await self.rotear(metodo, alvo, corpo)
+                    except Exception as e:
+                        status, tipo, resposta = 500, "application/json", {"erro": f"{type(e).__name__}: {e}"}
+                try:
+                    dados = _serializar(resposta)
+                except (TypeError, ValueError) as e:
+                    # Resposta que não cabe em JSON: erro do servidor, sem derrubar a conexão
+                    status, tipo = 500, "application/json"
+                    dados = _serializar({"erro": f"{type(e).__name__}: {e}"})
+                self.erros += status >= 400
+                escritor.write(f"HTTP/1.1 {status} {MENSAGENS[status]}\r\nContent-Type: {tipo}\r\nContent-Length: {len(dados)}\r\n"
+                               f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n".encode() + dados)
+                await escritor.drain()
+                if not manter:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            escritor.close()
+
+async def servir(host=HOST, porta=PORTA, processos=None, janela=JANELA_LOTE, max_lote=MAX_LOTE):
+    processos = processos or os.cpu_count() or 1
+    servidor = ServidorTRR(_novo_executor(processos), processos, janela, max_lote)
+    try:
+        await asyncio.gather(*(servidor.agrupador.executar(_aquecer, i) for i in range(processos)))
+        srv = await asyncio.start_server(servidor.atender, host, porta, backlog=1024)
+        print(f"API TRR em http://{host}:{porta} ({processos} processo(s), janela {janela * 1e3:g} ms, lote máx. {max_lote})", file=sys.stderr)
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        servidor.agrupador.executor.shutdown(cancel_futures=True)
+
+# ==========================================
+# TESTE DE CARGA
+# ==========================================
+def _objetos(modulo, n, semente=0):
+    rng = np.random.default_rng(semente)
+    if modulo == "dyn":
+        return [{"rad": r, "vobs": v, "vgas": 20.0, "vdisk": 0.7 * v, "vbulge": 10.0}
+                for r, v in zip(rng.uniform(0.5, 30, n).tolist(), rng.uniform(50, 300, n).tolist())]
+    if modulo == "opt":
+        zl = rng.uniform(0.05, 0.8, n)
+        return [{"zl": a, "zs": b, "mest": m, "theta": t} for a, b, m, t in
+                zip(zl.tolist(), (zl + rng.uniform(0.1, 2.0, n)).tolist(), rng.uniform(0.5, 10, n).tolist(), rng.uniform(0.5, 2.5, n).tolist())]
+    if modulo == "red":
+        return [{"zl": a, "mest": m, "theta": t} for a, m, t in
+                zip(rng.uniform(0.05, 0.8, n).tolist(), rng.uniform(0.5, 10, n).tolist(), rng.uniform(0.5, 2.5, n).tolist())]
+    rp = rng.uniform(5, 20, n)
+    return [{"r_peri": a, "r_apo": b, "mest": m} for a, b, m in zip(rp.tolist(), (rp + rng.uniform(5, 40, n)).tolist(), rng.uniform(0.5, 5, n).tolist())]
+
+async def _cliente(host, porta, caminho, corpos, latencias, status):
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    try:
+        for corpo in corpos:
+            t0 = time.perf_counter()
+            escritor.write(f"POST {caminho} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                           f"Content-Length: {len(corpo)}\r\n\r\n".encode() + corpo)
+            codigo = int((await leitor.readline()).split()[1])
+            tamanho = 0
+            while (h := await leitor.readline()).strip():
+                k, _, v = h.decode("latin-1").partition(":")
+                if k.strip().lower() == "content-length": tamanho = int(v)
+            await leitor.readexactly(tamanho)
+            latencias.append(time.perf_counter() - t0)
+            status[codigo] = status.get(codigo, 0) + 1
+    finally:
+        escritor.close()
+
+async def carga(url, modulo="opt", conexoes=64, requisicoes=10_000, semente=0):
+    # Laço fechado: cada conexão manda a próxima requisição assim que recebe a resposta
+    partes = urlsplit(url)
+    host, porta = partes.hostname or HOST, partes.port or PORTA
+    corpos = [json.dumps(o).encode() for o in _objetos(modulo, requisicoes, semente)]
+    latencias, status = [], {}
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_cliente(host, porta, f"/v1/{modulo}", corpos[i::conexoes], latencias, status) for i in range(conexoes)))
+    total = time.perf_counter() - t0
+    ms = np.asarray(latencias) * 1e3
+    return {"modulo": modulo, "conexoes": conexoes, "requisicoes": len(latencias), "status": status,
+            "segundos": total, "req_por_s": len(latencias) / total,
+            "p50_ms": float(np.percentile(ms, 50)), "p99_ms": float(np.percentile(ms, 99)), "max_ms": float(ms.max())}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m trr.servidor", description="API HTTP/JSON local do Motor TRR.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p = sub.add_parser("servir", help="Sobe a API")
+    p.add_argument("--host", default=HOST)
+    p.add_argument("--porta", type=int, default=PORTA)
+    p.add_argument("-j", "--processos", type=int, default=os.cpu_count() or 1, help="Processos no pool de avaliação")
+    p.add_argument("--janela-ms", type=float, default=JANELA_LOTE * 1e3, help="Espera para agrupar requisições (0 = só o que já chegou)")
+    p.add_argument("--max-lote", type=int, default=MAX_LOTE, help="Objetos por avaliação vetorizada (1 = sem agrupamento)")
+    p = sub.add_parser("carga", help="Teste de carga contra uma API em execução (latência p50/p99 e vazão)")
+    p.add_argument("--url", default=f"http://{HOST}:{PORTA}")
+    p.add_argument("--modulo", choices=tuple(CAMPOS), default="opt")
+    p.add_argument("-c", "--conexoes", type=int, default=64)
+    p.add_argument("-n", "--requisicoes", type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    if args.comando == "carga":
+        print(json.dumps(asyncio.run(carga(args.url, args.modulo, args.conexoes, args.requisicoes)), indent=2))
+        return 0
+    try:
+        asyncio.run(servir(args.host, args.porta, args.processos, args.janela_ms / 1e3, max(1, args.max_lote)))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+import contextlib
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+# ==========================================
+# FILA DE TAREFAS EM SEGUNDO PLANO (CATÁLOGOS)
+# ==========================================
+# Auditorias de catálogo rodam num pool de processos fora da thread do Streamlit. Cada
+# tarefa tem uma pasta própria (TRR_TAREFAS_DIR/<id>) com a entrada, o estado.json
+# (atualizado a cada bloco: progresso e resultados parciais), a tabela de resultado e o
+# PDF. A interface só lê o estado do disco, então uma reconexão do navegador (ou outra
+# sessão com o mesmo id) retoma o acompanhamento. O pool tem MAX_SIMULTANEAS processos
+# (o resto espera na fila, em ordem de chegada) e cada cliente tem no máximo
+# MAX_POR_CLIENTE tarefas ativas, para que um catálogo gigante não tome o servidor dos
+# usuários interativos. O cliente é o endereço IP da conexão (a interface o passa), não a
+# sessão: uma aba nova ou um id trocado na URL não abre vagas novas. Clientes atrás do
+# mesmo NAT/proxy dividem o limite. Acima disso, MAX_NA_FILA limita as tarefas ativas de
+# todos os clientes juntos, para que a fila não cresça sem fim.
+# O id da tarefa começa por um prefixo derivado da sessão: listar as tarefas de uma
+# sessão (a cada poucos segundos na interface) não abre o estado das outras.
+DIRETORIO = (os.environ.get("TRR_TAREFAS_DIR")
+             or os.path.join(os.environ.get("TRR_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "trr"), "tarefas"))
+MAX_SIMULTANEAS = int(os.environ.get("TRR_TAREFAS_MAX", max(1, (os.cpu_count() or 2) // 2)))
+MAX_POR_CLIENTE = int(os.environ.get("TRR_TAREFAS_POR_CLIENTE", os.environ.get("TRR_TAREFAS_POR_SESSAO", "1")))
+MAX_NA_FILA = int(os.environ.get("TRR_TAREFAS_FILA", 4 * MAX_SIMULTANEAS))
+LINHAS_POR_BLOCO_TAREFA = 50_000   # blocos menores que no lote: progresso mais frequente
+MAX_OBJETOS_PDF = 5000             # a tabela-resumo do PDF lista todos os objetos: acima disso, sem PDF
+LINHAS_POR_PARTICAO = 500_000      # dyn: pontos guardados em disco por partição de galáxias até o resumo
+MAX_PARTICOES = 64
+MODULOS_TAREFA = ("dyn", "opt", "red", "str")
+MODULOS_PDF = ("dyn", "opt")       # relatório de catálogo: uma página por galáxia / lente
+ATIVOS = ("na_fila", "executando")
+
+class TarefaCancelada(Exception):
+    pass
+
+def _gravar_json(caminho, dados):
+    # Escrita atômica: a interface nunca lê um estado pela metade
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(dados, f)
+    os.replace(tmp, caminho)
+
+def ler_estado(pasta):
+    try:
+        with open(os.path.join(pasta, "estado.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _prefixo(sessao):
+    return hashlib.sha1(str(sessao).encode()).hexdigest()[:8]
+
+def _executar(pasta, modulo, idioma, com_pdf, colunas=None, curva=False):
+    # Roda no processo do pool. Estado: executando -> concluida | erro | cancelada.
+    # Todos os módulos leem a entrada em blocos e anexam o resultado de cada bloco a um
+    # CSV, que a interface já pode baixar (até a última linha completa) durante a execução.
+    # dyn com `curva`: no fim, um M/L por galáxia ajustado à curva inteira (resumo.csv e a
+    # curva ajustada em ajuste.csv); durante a execução segue o resultado ponto a ponto.
+    # Uma galáxia pode cruzar blocos, então os pontos do resumo vão para partições em disco
+    # (pelo hash do nome, cada galáxia inteira numa só) e o resumo sai partição a partição:
+    # a memória fica em ~LINHAS_POR_PARTICAO pontos, não no catálogo inteiro.
+    import numpy as np
+    import pandas as pd
+    from .catalogos import COLUNAS_DINAMICA, OPCIONAIS_DINAMICA, EscritorTabela, contar_linhas, ler_tabela_em_blocos, mapear_colunas
+    from .lote import (ajustar_catalogo_dinamica, auditar_bloco_optica, auditar_bloco_redshift, auditar_catalogo_correntes,
+                       auditar_pontos_dinamica, objetos_dinamica, resumir_dinamica)
+    entrada = next(os.path.join(pasta, f) for f in os.listdir(pasta) if f.startswith("entrada."))
+    arquivos = {"resultado": "resultado.csv"}
+    if modulo == "str":
+        arquivos["intervalos"] = "intervalos.csv"
+    estado = dict(ler_estado(pasta) or {}, estado="executando", inicio=time.time(), linhas=0,
+                  total=contar_linhas(entrada), parcial={}, arquivos=arquivos)
+    relatorio = None
+
+    def atualizar(**campos):
+        estado.update(campos)
+        _gravar_json(os.path.join(pasta, "estado.json"), estado)
+        if os.path.exists(os.path.join(pasta, "cancelar")):
+            raise TarefaCancelada()
+
+    try:
+        atualizar()
+        with contextlib.ExitStack() as pilha:
+            if com_pdf and modulo in MODULOS_PDF and estado["total"] > MAX_OBJETOS_PDF:
+                atualizar(aviso=f"PDF omitido: mais de {MAX_OBJETOS_PDF} linhas")
+            elif com_pdf and modulo in MODULOS_PDF:
+                from .idiomas import LANG
+                from .relatorio import COLUNAS_DYN_MEDIANA, RelatorioCatalogo
+                colunas_pdf = COLUNAS_DYN_MEDIANA if modulo == "dyn" and not curva else None
+                relatorio = pilha.enter_context(RelatorioCatalogo(os.path.join(pasta, "relatorio.pdf"), modulo, LANG[idioma], colunas=colunas_pdf))
+            escritor = pilha.enter_context(EscritorTabela(os.path.join(pasta, "resultado.csv")))
+            if modulo == "str":
+                escritor_intervalos = pilha.enter_context(EscritorTabela(os.path.join(pasta, "intervalos.csv")))
+            if modulo == "dyn":
+                particoes = int(np.clip(-(-estado["total"] // LINHAS_POR_PARTICAO), 1, MAX_PARTICOES))
+                temporaria = pilha.enter_context(tempfile.TemporaryDirectory(dir=pasta))
+                escritores_particao = pilha.enter_context(contextlib.ExitStack())
+                escritores = [escritores_particao.enter_context(EscritorTabela(os.path.join(temporaria, f"{k}.parquet")))
+                              for k in range(particoes)]
+            soma, validas, rupturas, lidas = 0.0, 0, 0, 0
+            for bloco in ler_tabela_em_blocos(entrada, LINHAS_POR_BLOCO_TAREFA):
+                lidas += len(bloco)
+                if modulo == "dyn":
+                    df = auditar_pontos_dinamica(bloco, colunas)
+                    if curva:
+                        col = mapear_colunas(bloco, COLUNAS_DINAMICA, OPCIONAIS_DINAMICA, colunas)
+                        pontos = pd.DataFrame({k: col[k] for k in COLUNAS_DINAMICA})
+                    else:
+                        pontos = df[["galaxia", "rad", "ml", "vbar", "vtrr", "vobs", "prec"]]
+                    # Tipos fixos: o esquema de cada partição não pode variar entre blocos
+                    pontos = pontos.astype({c: "string" if c == "galaxia" else float for c in pontos})
+                    if particoes == 1:
+                        escritores[0].escrever(pontos)
+                    else:
+                        codigos = pd.util.hash_pandas_object(pontos["galaxia"], index=False).to_numpy() % particoes
+                        for k in np.unique(codigos):
+                            escritores[k].escrever(pontos[codigos == k])
+                elif modulo == "opt":
+                    df = auditar_bloco_optica(bloco, colunas)
+                    if relatorio is not None:
+                        for i, dados in enumerate(df[["tbar", "ttrr", "tobs", "etac", "prec"]].to_dict("records")):
+                            relatorio.adicionar(escritor.linhas + i, dados)
+                elif modulo == "red":
+                    df = auditar_bloco_redshift(bloco, colunas)
+                else:
+                    df, intervalos = auditar_catalogo_correntes(bloco, colunas=colunas)
+                    escritor_intervalos.escrever(intervalos)
+                    rupturas += len(intervalos)
+                escritor.escrever(df)
+                if modulo == "str":
+                    parcial = {"rupturas": rupturas, "validas": escritor.linhas}
+                else:
+                    prec = df["prec"].dropna()
+                    soma += float(prec.sum()); validas += len(prec)
+                    parcial = {"prec_media": soma / validas if validas else None, "validas": validas}
+                atualizar(linhas=lidas, parcial=parcial)
+            if modulo == "dyn":
+                escritores_particao.close()
+                if not lidas:
+                    raise ValueError("Catálogo vazio")
+                with EscritorTabela(os.path.join(pasta, "resumo.csv")) as escritor_resumo, \
+                     EscritorTabela(os.path.join(pasta, "ajuste.csv")) as escritor_ajuste:
+                    for particao in escritores:
+                        if not particao.linhas:
+                            continue
+                        pontos = pd.read_parquet(particao.caminho)
+                        if curva:
+                            ajuste, resumo = ajustar_catalogo_dinamica(pontos)
+                            escritor_ajuste.escrever(ajuste)
+                        else:
+                            resumo = resumir_dinamica(pontos)
+                        del pontos
+                        escritor_resumo.escrever(resumo)
+                        if relatorio is not None:
+                            for nome, dados in objetos_dinamica(resumo):
+                                relatorio.adicionar(nome, dados)
+                        os.remove(particao.caminho)
+                arquivos["resumo"] = "resumo.csv"
+                if curva:
+                    arquivos["ajuste"] = "ajuste.csv"
+        if relatorio is not None:
+            arquivos["relatorio"] = "relatorio.pdf"
+        estado.update(estado="concluida", fim=time.time())
+    except TarefaCancelada:
+        estado.update(estado="cancelada", fim=time.time())
+    except Exception as e:
+        estado.update(estado="erro", fim=time.time(), mensagem=f"{type(e).__name__}: {e}")
+    _gravar_json(os.path.join(pasta, "estado.json"), estado)
+    return estado["estado"]
+
+class FilaTarefas:
+    def __init__(self, diretorio=DIRETORIO, max_simultaneas=MAX_SIMULTANEAS, max_por_cliente=MAX_POR_CLIENTE, max_na_fila=MAX_NA_FILA):
+        self.diretorio = diretorio
+        self.max_simultaneas = max_simultaneas
+        self.max_por_cliente = max_por_cliente
+        self.max_na_fila = max_na_fila
+        self._pool = None
+        self._futuros = {}      # id -> Future (só as tarefas enviadas por este processo)
+        self._trava = threading.Lock()
+
+    def _pasta(self, tarefa_id):
+        if not tarefa_id.isalnum():
+            raise ValueError(f"Id de tarefa inválido: {tarefa_id}")
+        return os.path.join(self.diretorio, tarefa_id)
+
+    def _obter_pool(self):
+        # "spawn": o servidor do Streamlit tem várias threads, fork não é seguro
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_simultaneas, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def enviar(self, nome_arquivo, conteudo, modulo, sessao, idioma="EN", com_pdf=False, colunas=None, curva=False, cliente=None):
+        # conteudo: bytes ou objeto de arquivo (ex.: UploadedFile do Streamlit);
+        # cliente: quem responde pelo limite (IP da conexão; sem ele, a própria sessão);
+        # colunas: {campo do motor: coluna do catálogo} (campos ausentes são detectados pelo nome);
+        # curva: dyn com um M/L por galáxia ajustado à curva inteira
+        from .catalogos import EXTENSOES
+        if modulo not in MODULOS_TAREFA:
+            raise ValueError(f"Módulo sem auditoria de catálogo: {modulo}")
+        ext = os.path.splitext(nome_arquivo)[1].lower()
+        if ext not in EXTENSOES:
+            raise ValueError(f"Formato não suportado: {ext or nome_arquivo}")
+        with self._trava:
+            # Todas as tarefas, não só as da sessão: envios são raros, a varredura é barata
+            ativas = [t for t in self.listar() if t["estado"] in ATIVOS]
+            if len(ativas) >= self.max_na_fila:
+                raise ValueError(f"Fila cheia ({self.max_na_fila} tarefas ativas): tente de novo mais tarde")
+            cliente = cliente or sessao
+            if sum(1 for t in ativas if (t.get("cliente") or t.get("sessao")) == cliente) >= self.max_por_cliente:
+                raise ValueError(f"Limite de {self.max_por_cliente} tarefa(s) ativa(s) por cliente")
+            tarefa_id = _prefixo(sessao) + uuid.uuid4().hex[:12]
+            pasta = self._pasta(tarefa_id)
+            os.makedirs(pasta)
+            with open(os.path.join(pasta, "entrada" + (".csv" if EXTENSOES[ext] == "csv" else ext)), "wb") as f:
+                if isinstance(conteudo, bytes):
+                    f.write(conteudo)
+                else:
+                    conteudo.seek(0)
+                    shutil.copyfileobj(conteudo, f)
+            _gravar_json(os.path.join(pasta, "estado.json"),
+                         {"id": tarefa_id, "modulo": modulo, "arquivo": nome_arquivo, "sessao": sessao, "cliente": cliente,
+                          "estado": "na_fila", "criada": time.time(), "linhas": 0, "total": None, "parcial": {}, "colunas": colunas or {},
+                          "curva": bool(curva and modulo == "dyn")})
+            self._futuros[tarefa_id] = self._obter_pool().submit(_executar, pasta, modulo, idioma, com_pdf, colunas, curva and modulo == "dyn")
+        return tarefa_id
+
+    def estado(self, tarefa_id):
+        estado = ler_estado(self._pasta(tarefa_id))
+        if estado is None:
+            return None
+        # Ativa no disco mas sem processo vivo (servidor reiniciado ou worker morto)
+        futuro = self._futuros.get(tarefa_id)
+        if estado["estado"] in ATIVOS and (futuro is None or futuro.done()):
+            estado["estado"] = "interrompida"
+        return estado
+
+    def listar(self, sessao=None):
+        if not os.path.isdir(self.diretorio):
+            return []
+        prefixo = "" if sessao is None else _prefixo(sessao)
+        tarefas = (self.estado(t) for t in os.listdir(self.diretorio) if t.isalnum() and t.startswith(prefixo))
+        return sorted((t for t in tarefas if t and (sessao is None or t.get("sessao") == sessao)),
+                      key=lambda t: t["criada"], reverse=True)
+
+    def arquivo(self, tarefa_id, chave):
+        estado = self.estado(tarefa_id)
+        nome = (estado or {}).get("arquivos", {}).get(chave)
+        return os.path.join(self._pasta(tarefa_id), nome) if nome else None
+
+    def conteudo(self, tarefa_id, chave):
+        # Durante a execução o CSV ainda cresce: só até a última linha completa
+        caminho = self.arquivo(tarefa_id, chave)
+        if caminho is None or not os.path.exists(caminho):
+            return b""
+        with open(caminho, "rb") as f:
+            dados = f.read()
+        return dados[:dados.rfind(b"\n") + 1] if caminho.endswith(".csv") else dados
+
+    def cancelar(self, tarefa_id):
+        futuro = self._futuros.get(tarefa_id)
+        if futuro is not None and futuro.cancel():
+            estado = ler_estado(self._pasta(tarefa_id))
+            _gravar_json(os.path.join(self._pasta(tarefa_id), "estado.json"), dict(estado, estado="cancelada", fim=time.time()))
+            return
+        # Já em execução: o worker confere o sinal a cada bloco
+        open(os.path.join(self._pasta(tarefa_id), "cancelar"), "w").close()
+
+    def remover(self, tarefa_id):
+        if (self.estado(tarefa_id) or {}).get("estado") in ATIVOS:
+            raise ValueError("Cancele a tarefa antes de removê-la")
+        shutil.rmtree(self._pasta(tarefa_id), ignore_errors=True)
+        self._futuros.pop(tarefa_id, None)
+
+# Instância do processo: compartilhada por todas as sessões do Streamlit
+FILA = FilaTarefas()
@@ -0,0 +1,161 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .constantes import A0, BETA, KPC_TO_M
+from .dinamica import GRADE_ML, aceleracao_trr
+from .optica import auditar_optica_lote
+
+# ==========================================
+# VARREDURA DO ESPAÇO DE PARÂMETROS (BETA x A0)
+# ==========================================
+# Precisão média de um catálogo inteiro (dinâmica SPARC + óptica SLACS) em cada ponto
+# de uma grade (BETA, A0). Com A0 fixo, a aceleração de interpolação F(M/L) de cada
+# ponto não depende de BETA e é crescente em M/L; então, em vez de avaliar a grade M/L
+# inteira para cada BETA, basta uma busca binária vetorizada do alvo g_obs / (1 + BETA r)
+# em F. A óptica não depende de A0 (só do índice de refração) e é calculada uma vez.
+GRADE_BETA = np.linspace(0.0, 0.06, 200)
+GRADE_A0 = np.geomspace(0.6e-10, 2.4e-10, 200)
+ELEMENTOS_POR_BLOCO = 1 << 20   # limita (pontos x max(M/L, BETA)) por bloco
+
+def _busca_crescente(F, alvo):
+    # F: (pontos, m) crescente em cada linha; alvo: (k, pontos).
+    # Primeiro índice j com F[linha, j] >= alvo (m se nenhum), como np.searchsorted.
+    m = F.shape[1]
+    plano = F.ravel()
+    base = np.arange(F.shape[0]) * m
+    lo = np.zeros(alvo.shape, dtype=np.intp)
+    hi = np.full(alvo.shape, m, dtype=np.intp)
+    for _ in range(int(np.ceil(np.log2(m + 1)))):
+        meio = (lo + hi) >> 1
+        menor = plano.take(base + np.minimum(meio, m - 1)) < alvo
+        # Intervalos já fechados (lo == hi) não se movem: meio == lo == hi
+        np.copyto(lo, meio + 1, where=menor & (meio < hi))
+        np.copyto(hi, meio, where=~menor)
+    return lo
+
+def _precisao_dinamica_a0(rad, vobs, vgas, vdisk, vbulge, betas, a0, grade_ml):
+    # Soma das precisões (por BETA) e número de pontos válidos, para um único A0
+    soma, n = np.zeros(betas.size), 0
+    m = grade_ml.size
+    bloco = max(1, ELEMENTOS_POR_BLOCO // max(m, betas.size))
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for ini in range(0, rad.size, bloco):
+            r = rad[ini:ini + bloco]
+            v_sq = vgas[ini:ini + bloco, None]**2 + grade_ml * vdisk[ini:ini + bloco, None]**2 + (grade_ml + 0.2) * vbulge[ini:ini + bloco, None]**2
+            F = aceleracao_trr((v_sq * 1e6) / (r[:, None] * KPC_TO_M), 0.0, a0=a0)
+            g_obs = (vobs[ini:ini + bloco]**2 * 1e6) / (r * KPC_TO_M)
+            arrasto = 1 + betas[:, None] * r
+            j = _busca_crescente(F, g_obs / arrasto)
+            linhas = np.arange(r.size)
+            # O mínimo de |g_obs - F (1 + BETA r)| está no vizinho à esquerda ou à direita do alvo
+            err = np.fmin(np.abs(g_obs - F[linhas, np.maximum(j - 1, 0)] * arrasto),
+                          np.abs(g_obs - F[linhas, np.minimum(j, m - 1)] * arrasto)) / g_obs
+            prec = np.maximum(0.0, 100.0 - err * 100.0)
+            validos = np.isfinite(prec[0])
+            soma += prec[:, validos].sum(axis=1)
+            n += int(validos.sum())
+    return soma, n
+
+def _tarefa_dinamica(pontos, betas, a0s, grade_ml):
+    res = [_precisao_dinamica_a0(*pontos, betas, a0, grade_ml) for a0 in a0s]
+    return np.column_stack([s for s, _ in res]), res[0][1] if res else 0
+
+def precisao_dinamica(rad, vobs, vgas, vdisk, vbulge, betas=GRADE_BETA, a0s=GRADE_A0, grade_ml=GRADE_ML, processos=1):
+    # Mapa (len(betas), len(a0s)) da precisão média ponto a ponto, com M/L ajustado por ponto
+    pontos = tuple(np.atleast_1d(np.asarray(x, dtype=float)) for x in np.broadcast_arrays(rad, vobs, vgas, vdisk, vbulge))
+    ok = (pontos[0] > 0) & (pontos[1] > 0)
+    pontos = tuple(x[ok] for x in pontos)
+    betas, a0s, grade_ml = (np.asarray(x, dtype=float) for x in (betas, a0s, grade_ml))
+    if processos <= 1:
+        soma, n = _tarefa_dinamica(pontos, betas, a0s, grade_ml)
+    else:
+        # Colunas de A0 repartidas entre os processos (4 fatias por processo para equilibrar)
+        fatias = [f for f in np.array_split(a0s, min(a0s.size, 4 * processos)) if f.size]
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            partes = list(pool.map(_tarefa_dinamica, *zip(*[(pontos, betas, f, grade_ml) for f in fatias])))
+        soma, n = np.hstack([s for s, _ in partes]), partes[0][1]
+    with np.errstate(invalid='ignore'):
+        return soma / n, n
+
+def precisao_optica(zl, zs, mest, theta, betas=GRADE_BETA):
+    # Vetor (len(betas),) da precisão média das lentes; o anel bariônico é calculado uma vez
+    base = auditar_optica_lote(zl, zs, mest, theta)
+    ok = np.isfinite(base['tbar']) & (np.asarray(base['tobs']) > 0)
+    zl = np.broadcast_to(np.asarray(zl, dtype=float), ok.shape)[ok]
+    tbar, tobs = base['tbar'][ok], np.asarray(base['tobs'], dtype=float)[ok]
+    betas = np.asarray(betas, dtype=float)
+    soma = np.zeros(betas.size)
+    bloco = max(1, ELEMENTOS_POR_BLOCO // max(betas.size, 1))
+    for ini in range(0, tbar.size, bloco):
+        ttrr = tbar[ini:ini + bloco] * (1 + betas[:, None] * np.log1p(zl[ini:ini + bloco]))
+        err = np.abs(tobs[ini:ini + bloco] - ttrr) / tobs[ini:ini + bloco]
+        soma += np.maximum(0.0, 100.0 - err * 100.0).sum(axis=1)
+    with np.errstate(invalid='ignore'):
+        return soma / tbar.size, int(tbar.size)
+
+def varrer_parametros(dinamica=None, optica=None, betas=GRADE_BETA, a0s=GRADE_A0, processos=1):
+    # dinamica: dict rad/vobs/vgas/vdisk/vbulge; optica: dict zl/zs/mest/theta (colunas já mapeadas).
+    # 'combinada' pondera as duas superfícies pelo número de objetos de cada uma.
+    betas, a0s = np.asarray(betas, dtype=float), np.asarray(a0s, dtype=float)
+    forma = (betas.size, a0s.size)
+    res = {'betas': betas, 'a0s': a0s, 'n_pontos': 0, 'n_lentes': 0}
+    total = np.zeros(forma)
+    if dinamica is not None:
+        res['dinamica'], res['n_pontos'] = precisao_dinamica(**dinamica, betas=betas, a0s=a0s, processos=processos)
+        if res['n_pontos']:     # sem pontos válidos a superfície é NaN e não entra na soma
+            total += res['dinamica'] * res['n_pontos']
+    if optica is not None:
+        prec, res['n_lentes'] = precisao_optica(**optica, betas=betas)
+        res['optica'] = np.broadcast_to(prec[:, None], forma).copy()
+        if res['n_lentes']:
+            total += res['optica'] * res['n_lentes']
+    n = res['n_pontos'] + res['n_lentes']
+    res['combinada'] = total / n if n else np.full(forma, np.nan)
+    i, j = np.unravel_index(np.nanargmax(res['combinada']), forma) if np.isfinite(res['combinada']).any() else (0, 0)
+    res['melhor'] = {'beta': float(betas[i]), 'a0': float(a0s[j]), 'prec': float(res['combinada'][i, j])}
+    return res
+
+def main(argv=None):
+    from .catalogos import COLUNAS_DINAMICA, COLUNAS_OPTICA, OPCIONAIS_DINAMICA, ler_tabela, mapear_colunas
+    parser = argparse.ArgumentParser(prog="python -m trr.varredura", description="Mapa de precisão do catálogo na grade (BETA, A0).")
+    parser.add_argument("--dinamica", help="Curvas de rotação estilo SPARC (.csv / .parquet)")
+    parser.add_argument("--optica", help="Lentes estilo SLACS (.csv / .parquet)")
+    parser.add_argument("-o", "--saida", required=True, help="Superfícies em .npz (betas, a0s, dinamica, optica, combinada)")
+    parser.add_argument("--mapa", help="Mapa de calor da superfície combinada (.png)")
+    parser.add_argument("--beta", type=float, nargs=3, metavar=("MIN", "MAX", "N"), default=(GRADE_BETA[0], GRADE_BETA[-1], GRADE_BETA.size))
+    parser.add_argument("--a0", type=float, nargs=3, metavar=("MIN", "MAX", "N"), default=(GRADE_A0[0], GRADE_A0[-1], GRADE_A0.size), help="Grade logarítmica")
+    parser.add_argument("-j", "--processos", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+    if not (args.dinamica or args.optica):
+        parser.error("informe --dinamica e/ou --optica")
+
+    try:
+        dinamica = optica = None
+        if args.dinamica:
+            col = mapear_colunas(ler_tabela(args.dinamica), COLUNAS_DINAMICA, OPCIONAIS_DINAMICA)
+            dinamica = {k: col[k] for k in ("rad", "vobs", "vgas", "vdisk", "vbulge")}
+        if args.optica:
+            col = mapear_colunas(ler_tabela(args.optica), COLUNAS_OPTICA)
+            optica = {k: col[k] for k in ("zl", "zs", "mest", "theta")}
+    except ValueError as e:
+        parser.error(str(e))
+    betas = np.linspace(args.beta[0], args.beta[1], int(args.beta[2]))
+    a0s = np.geomspace(args.a0[0], args.a0[1], int(args.a0[2]))
+    res = varrer_parametros(dinamica, optica, betas, a0s, args.processos)
+    np.savez(args.saida, **{k: v for k, v in res.items() if isinstance(v, np.ndarray)},
+             n_pontos=res['n_pontos'], n_lentes=res['n_lentes'])
+    if args.mapa:
+        from matplotlib.image import imsave
+        from .relatorio import criar_grafico_mapa
+        imsave(args.mapa, criar_grafico_mapa(betas, a0s, res['combinada'], (BETA, A0)))
+    m = res['melhor']
+    print(f"{res['n_pontos']} pontos / {res['n_lentes']} lentes, grade {betas.size}x{a0s.size} -> {args.saida}; "
+          f"melhor: BETA={m['beta']:.6f} A0={m['a0']:.4e} ({m['prec']:.2f}%)", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())